@@ -0,0 +1,148 @@
+"""
+Сравнение прежних generate_*_preview (их копии ниже — в боте они больше не используются) с PreviewPages на 100k строк.
+
+Запуск из корня проекта:
+    python -m benchmarks.preview_pages
+"""
+import time
+import pandas as pd
+from utils.html_preview import build_engineers_pages, build_case_counts_pages, build_managers_pages
+
+
+ROWS = 100_000
+FLIPS = 50
+
+
+def generate_engineers_preview(df: pd.DataFrame, page: int = 0, max_rows: int = 10) -> tuple[str, int, int]:
+    """
+    Генерирует HTML-превью для списка инженеров из DataFrame с пагинацией.
+    Возвращает HTML-код, текущую страницу и общее количество страниц.
+    """
+    start = page * max_rows
+    end = start + max_rows
+    total_pages = (len(df) + max_rows - 1) // max_rows
+
+    html = '<b>📋 Превью инженеров</b>\n'
+    html += '<i>Листайте, чтобы просмотреть записи</i>\n'
+    html += '<pre>┌' + '─' * 48 + '┐\n'
+
+    html += f"│ {'📧 Почта':<23} │ {'👤 ФИ':<20} │\n"
+    html += '├' + '─' * 48 + '┤\n'
+
+    for index, row in df[start:end].iterrows():
+        username = row.get('Почта', '—')[:25]
+        first_name = row.get('ФИ', '—')[:25]
+        html += f"│ {username:<23} │ {first_name:<20} │\n"
+
+    html += '└' + '─' * 48 + '┘\n'
+    html += f'<i>Страница {page + 1} из {total_pages}</i></pre>'
+
+    return html, page, total_pages
+
+
+def generate_cases_preview(df: pd.DataFrame, page: int = 0, max_rows: int = 10) -> tuple[str, int, int]:
+    """
+    Генерирует HTML-превью для списка кейсов из DataFrame с пагинацией, показывая уникальных исполнителей и их количество кейсов.
+    Возвращает HTML-код, текущую страницу и общее количество страниц.
+    """
+    case_counts = df['Исполнитель'].value_counts().reset_index()
+    case_counts.columns = ['Исполнитель', 'Кол-во кейсов']
+
+    start = page * max_rows
+    end = start + max_rows
+    total_pages = (len(case_counts) + max_rows - 1) // max_rows
+
+    html = '<b>📋 Превью кейсов</b>\n'
+    html += '<i>Листайте, чтобы просмотреть записи</i>\n'
+    html += '<pre>┌' + '─' * 48 + '┐\n'
+
+    html += f"│ {'👤 Исполнитель':<23} │ {'📊 Кол-во кейсов':<20} │\n"
+    html += '├' + '─' * 48 + '┤\n'
+
+    for index, row in case_counts[start:end].iterrows():
+        executor = str(row['Исполнитель'])[:25]
+        count = row['Кол-во кейсов']
+        html += f"│ {executor:<23} │ {count:<20} │\n"
+
+    html += '└' + '─' * 48 + '┘\n'
+    html += f'<i>Страница {page + 1} из {total_pages}</i></pre>'
+
+    return html, page, total_pages
+
+
+def generate_managers_preview(df: pd.DataFrame, page: int = 0, max_rows: int = 10) -> tuple[str, int, int]:
+    """
+    Генерирует HTML-превью для списка активностей из DataFrame с пагинацией.
+    Возвращает HTML-код, текущую страницу и общее количество страниц.
+    """
+    start = page * max_rows
+    end = start + max_rows
+    total_pages = (len(df) + max_rows - 1) // max_rows
+
+    html = '<b>📋 Превью активностей</b>\n'
+    html += '<i>Листайте, чтобы просмотреть записи</i>\n'
+    html += '<pre>┌' + '─' * 48 + '┐\n'
+
+    html += f"│ {'📋 Название активности':<23} │ {'👤 Сервис-менеджер':<20} │\n"
+    html += '├' + '─' * 48 + '┤\n'
+
+    for index, row in df[start:end].iterrows():
+        activity_name = str(row.get('Название активности', '—'))[:20]  # Сокращаем до 20 символов
+        if len(str(row.get('Название активности', ''))) > 20:
+            activity_name += '...'  # Добавляем многоточие, если обрезано
+        manager = str(row.get('Сервис-менеджер', '—'))[:20]
+        html += f"│ {activity_name:<23} │ {manager:<20} │\n"
+
+    html += '└' + '─' * 48 + '┘\n'
+    html += f'<i>Страница {page + 1} из {total_pages}</i></pre>'
+
+    return html, page, total_pages
+
+
+def make_frames(rows: int = ROWS) -> dict[str, pd.DataFrame]:
+    index = pd.RangeIndex(rows).astype(str)
+    return {
+        'engineers': pd.DataFrame({'Почта': 'user' + index + '@example.com', 'ФИ': 'Фамилия Имя ' + index}),
+        'cases': pd.DataFrame({'Исполнитель': 'Инженер ' + (pd.RangeIndex(rows) % 500).astype(str)}),
+        'managers': pd.DataFrame({'Название активности': 'Очень длинное название активности ' + index,
+                                  'Сервис-менеджер': 'Менеджер ' + index}),
+    }
+
+
+def timed(func) -> float:
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+def flip_legacy(generate, df: pd.DataFrame):
+    for page in range(FLIPS):
+        generate(df, page % 10)
+
+
+def flip_pages(build, df: pd.DataFrame):
+    pages = build(df)
+    for page in range(FLIPS):
+        pages.render(page % 10)
+
+
+def main():
+    frames = make_frames()
+    case_counts = frames['cases']['Исполнитель'].value_counts().reset_index()
+    case_counts.columns = ['Исполнитель', 'Кол-во кейсов']
+    runs = [
+        ('engineers', lambda: flip_legacy(generate_engineers_preview, frames['engineers']),
+         lambda: flip_pages(build_engineers_pages, frames['engineers'])),
+        ('cases', lambda: flip_legacy(generate_cases_preview, frames['cases']),
+         lambda: flip_pages(build_case_counts_pages, case_counts)),
+        ('managers', lambda: flip_legacy(generate_managers_preview, frames['managers']),
+         lambda: flip_pages(build_managers_pages, frames['managers'])),
+    ]
+    print(f'{ROWS} строк, {FLIPS} перелистываний')
+    for name, legacy, pages in runs:
+        legacy_time, pages_time = timed(legacy), timed(pages)
+        print(f'{name:<10} generate_*: {legacy_time * 1000:8.1f} ms   PreviewPages: {pages_time * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,10 @@
+from .db import BotDatabase
+from settings.config import DB_PATH
+
+
+db = BotDatabase(DB_PATH)
+
+__all__ = [
+    'BotDatabase',
+    'db'
+]
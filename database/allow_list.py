@@ -0,0 +1,86 @@
+import time
+from database.db import BotDatabase
+from database import db
+from database.generations import Generations, generations
+from settings.config import ALLOW_LIST_TTL, CLUSTERED
+
+
+GENERATION_KEY = 'allow_list'
+
+
+class AllowList:
+    """
+    Кэш разрешённых chat_id поверх BotDatabase.
+    Проверка доступа — поиск в set; обновление по TTL идёт в потоке БД.
+    Изменения пользователей должны идти через этот класс: он увеличивает общий счётчик generations,
+    и кэши остальных процессов кластера перечитывают список при следующей проверке.
+    Без кластера generations=None: проверка доступа не обращается к БД.
+    """
+
+    def __init__(self, db: BotDatabase, ttl: float = ALLOW_LIST_TTL,
+                 generations: Generations | None = generations):
+        self.db = db
+        self.ttl = ttl
+        self.generations = generations
+        self.hits = 0
+        self.misses = 0
+        self._allowed: set[int] = set()
+        self._loaded_at: float | None = None
+        self._generation = 0
+
+    def load(self):
+        """Перечитывает список из БД. ttl=0 отключает периодическое обновление."""
+        if self.generations is not None:
+            self._generation = self.generations.load_generation(GENERATION_KEY)
+        self._set_users(self.db.get_all_users())
+
+    async def refresh(self):
+        if self.generations is not None:
+            self._generation = await self.generations.get(GENERATION_KEY)
+        self._set_users(await self.db.run(self.db.get_all_users))
+
+    def _set_users(self, users):
+        self._allowed = {chat_id for chat_id, _, is_allowed in users if is_allowed}
+        self._loaded_at = time.monotonic()
+
+    def _is_stale(self) -> bool:
+        if self._loaded_at is None:
+            return True
+        return self.ttl > 0 and time.monotonic() - self._loaded_at > self.ttl
+
+    async def _changed_elsewhere(self) -> bool:
+        if self.generations is None:
+            return False
+        return await self.generations.get(GENERATION_KEY) != self._generation
+
+    async def is_allowed(self, chat_id: int) -> bool:
+        if self._is_stale() or await self._changed_elsewhere():
+            await self.refresh()
+        if chat_id in self._allowed:
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    async def add_user(self, chat_id: int, email: str, is_allowed: bool = True):
+        await self.db.run(self.db.add_user, chat_id, email, is_allowed)
+        await self._bump()
+        if is_allowed:
+            self._allowed.add(chat_id)
+        else:
+            self._allowed.discard(chat_id)
+
+    async def remove_user(self, chat_id: int):
+        await self.db.run(self.db.remove_user, chat_id)
+        await self._bump()
+        self._allowed.discard(chat_id)
+
+    async def _bump(self):
+        if self.generations is not None:
+            await self.generations.bump(GENERATION_KEY)
+
+    def stats(self) -> dict:
+        return {'size': len(self._allowed), 'hits': self.hits, 'misses': self.misses}
+
+
+allow_list = AllowList(db, generations=generations if CLUSTERED else None)
@@ -1,16 +1,34 @@
+import asyncio
 import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
+from functools import partial
+
+
+ADD_USER_SQL = "INSERT OR REPLACE INTO users (chat_id, email, is_allowed) VALUES (?, ?, ?)"
+REMOVE_USER_SQL = "DELETE FROM users WHERE chat_id = ?"
+IS_ALLOWED_SQL = "SELECT is_allowed FROM users WHERE chat_id = ?"
+ALL_USERS_SQL = "SELECT chat_id, email, is_allowed FROM users"
 
 
 class BotDatabase:
+    """
+    Одно долгоживущее соединение с SQLite (WAL, synchronous=NORMAL).
+    Синхронные методы безопасны из любого потока, асинхронный код вызывает их
+    через run(), который выполняет запрос в отдельном потоке БД и не блокирует event loop.
+    """
+
     def __init__(self, db_path="bot_database.db"):
         self.db_path = db_path
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.RLock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='bot-db')
         self.init_db()
 
     def init_db(self):
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
+            conn.execute("""
                 CREATE TABLE IF NOT EXISTS users (
                     chat_id INTEGER PRIMARY KEY,
                     email TEXT NOT NULL,
@@ -19,38 +37,52 @@ class BotDatabase:
             """)
             conn.commit()
 
+    def _connect(self) -> sqlite3.Connection:
+        # Повторяющиеся запросы берутся из кэша подготовленных выражений sqlite3.
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=256)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
     @contextmanager
     def get_connection(self):
-        conn = sqlite3.connect(self.db_path)
-        try:
-            yield conn
-        finally:
-            conn.close()
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._connect()
+            try:
+                yield self._conn
+            except BaseException:
+                # Соединение общее: незакоммиченная часть упавшей записи ушла бы со следующим commit()
+                self._conn.rollback()
+                raise
+
+    async def run(self, func, *args, **kwargs):
+        """Выполняет синхронный метод БД в потоке БД."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
 
     def add_user(self, chat_id, email, is_allowed=True):
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT OR REPLACE INTO users (chat_id, email, is_allowed) VALUES (?, ?, ?)",
-                (chat_id, email, is_allowed)
-            )
+            conn.execute(ADD_USER_SQL, (chat_id, email, is_allowed))
             conn.commit()
 
     def remove_user(self, chat_id):
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM users WHERE chat_id = ?", (chat_id,))
+            conn.execute(REMOVE_USER_SQL, (chat_id,))
             conn.commit()
 
     def is_user_allowed(self, chat_id):
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT is_allowed FROM users WHERE chat_id = ?", (chat_id,))
-            result = cursor.fetchone()
+            result = conn.execute(IS_ALLOWED_SQL, (chat_id,)).fetchone()
             return result and result[0]
 
     def get_all_users(self):
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT chat_id, email, is_allowed FROM users")
-            return cursor.fetchall()
+            return conn.execute(ALL_USERS_SQL).fetchall()
@@ -0,0 +1,59 @@
+from itertools import repeat
+import numpy as np
+import pandas as pd
+from database.db import BotDatabase
+from database import db
+
+
+SELECT_FINGERPRINTS_SQL = "SELECT row_key, row_hash FROM upload_fingerprints WHERE category = ?"
+DELETE_FINGERPRINTS_SQL = "DELETE FROM upload_fingerprints WHERE category = ?"
+INSERT_FINGERPRINT_SQL = "INSERT OR REPLACE INTO upload_fingerprints (category, row_key, row_hash) VALUES (?, ?, ?)"
+
+
+class FingerprintStore:
+    """
+    Отпечатки строк последней принятой бэкендом загрузки по категориям:
+    ключ строки (например, почта инженера) → 64-битный хэш значений её столбцов.
+    """
+
+    def __init__(self, db: BotDatabase):
+        self.db = db
+        self._init_table()
+
+    def _init_table(self):
+        with self.db.get_connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS upload_fingerprints (
+                    category TEXT NOT NULL,
+                    row_key TEXT NOT NULL,
+                    row_hash INTEGER NOT NULL,
+                    PRIMARY KEY (category, row_key)
+                )
+            """)
+            conn.commit()
+
+    def load(self, category: str) -> pd.Series | None:
+        """Возвращает Series хэшей с ключами строк в индексе или None, если загрузок ещё не было."""
+        with self.db.get_connection() as conn:
+            rows = conn.execute(SELECT_FINGERPRINTS_SQL, (category,)).fetchall()
+        if not rows:
+            return None
+        keys, hashes = zip(*rows)
+        return pd.Series(np.array(hashes, dtype='int64'), index=pd.Index(keys, dtype=object))
+
+    async def get(self, category: str) -> pd.Series | None:
+        return await self.db.run(self.load, category)
+
+    async def put(self, category: str, fingerprints: pd.Series):
+        await self.db.run(self.save, category, fingerprints)
+
+    def save(self, category: str, fingerprints: pd.Series):
+        """Заменяет отпечатки категории целиком одной транзакцией."""
+        rows = zip(repeat(category), fingerprints.index, fingerprints.tolist())
+        with self.db.get_connection() as conn:
+            conn.execute(DELETE_FINGERPRINTS_SQL, (category,))
+            conn.executemany(INSERT_FINGERPRINT_SQL, rows)
+            conn.commit()
+
+
+fingerprint_store = FingerprintStore(db)
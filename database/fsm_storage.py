@@ -0,0 +1,119 @@
+import asyncio
+import pickle
+import time
+from typing import Any
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StorageKey, StateType
+from database.db import BotDatabase
+from settings.config import FSM_TTL, FSM_FLUSH_INTERVAL, FSM_FLUSH_BATCH
+
+
+UPSERT_STATE_SQL = """
+    INSERT INTO fsm_states (key, state, updated_at) VALUES (?, ?, ?)
+    ON CONFLICT(key) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at
+"""
+UPSERT_DATA_SQL = """
+    INSERT INTO fsm_states (key, data, updated_at) VALUES (?, ?, ?)
+    ON CONFLICT(key) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at
+"""
+DELETE_EMPTY_SQL = "DELETE FROM fsm_states WHERE state IS NULL AND data IS NULL"
+DELETE_EXPIRED_SQL = "DELETE FROM fsm_states WHERE updated_at < ?"
+SELECT_STATE_SQL = "SELECT state FROM fsm_states WHERE key = ? AND updated_at >= ?"
+SELECT_DATA_SQL = "SELECT data FROM fsm_states WHERE key = ? AND updated_at >= ?"
+
+
+class SQLiteStorage(BaseStorage):
+    """
+    FSM-хранилище aiogram в SQLite бота: диалоги переживают перезапуск.
+    Записи копятся в памяти и пишутся пачкой раз в flush_interval (или при batch_size изменений),
+    брошенные диалоги удаляются через ttl секунд после последнего изменения.
+    """
+
+    def __init__(self, db: BotDatabase, ttl: float = FSM_TTL,
+                 flush_interval: float = FSM_FLUSH_INTERVAL, batch_size: int = FSM_FLUSH_BATCH):
+        self.db = db
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._states: dict[str, str | None] = {}
+        self._data: dict[str, bytes | None] = {}
+        self._flusher: asyncio.Task | None = None
+        self._init_table()
+
+    def _init_table(self):
+        with self.db.get_connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS fsm_states (
+                    key TEXT PRIMARY KEY,
+                    state TEXT,
+                    data BLOB,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS fsm_states_updated_at ON fsm_states (updated_at)")
+            conn.commit()
+
+    @staticmethod
+    def _key(key: StorageKey) -> str:
+        return f"{key.bot_id}:{key.chat_id}:{key.user_id}:{key.thread_id}:{key.business_connection_id}:{key.destiny}"
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        self._states[self._key(key)] = state.state if isinstance(state, State) else state
+        await self._schedule_flush()
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        storage_key = self._key(key)
+        if storage_key in self._states:
+            return self._states[storage_key]
+        row = await self.db.run(self._select, SELECT_STATE_SQL, storage_key)
+        return row[0] if row else None
+
+    async def set_data(self, key: StorageKey, data: dict[str, Any]) -> None:
+        self._data[self._key(key)] = pickle.dumps(data, pickle.HIGHEST_PROTOCOL) if data else None
+        await self._schedule_flush()
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        storage_key = self._key(key)
+        if storage_key in self._data:
+            raw = self._data[storage_key]
+        else:
+            row = await self.db.run(self._select, SELECT_DATA_SQL, storage_key)
+            raw = row[0] if row else None
+        return pickle.loads(raw) if raw else {}
+
+    async def _schedule_flush(self):
+        if len(self._states) + len(self._data) >= self.batch_size:
+            await self.flush()
+        elif self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    async def flush(self):
+        # Буферы подменяются до отправки в поток БД: поток один, поэтому чтения,
+        # поставленные после этой записи, уже увидят её результат.
+        states, self._states = self._states, {}
+        data, self._data = self._data, {}
+        if states or data:
+            await self.db.run(self._write, states, data)
+
+    def _write(self, states: dict, data: dict):
+        now = time.time()
+        with self.db.get_connection() as conn:
+            # Просроченные записи удаляются до обновления, чтобы старые данные не «ожили»
+            conn.execute(DELETE_EXPIRED_SQL, (now - self.ttl,))
+            conn.executemany(UPSERT_STATE_SQL, [(key, state, now) for key, state in states.items()])
+            conn.executemany(UPSERT_DATA_SQL, [(key, raw, now) for key, raw in data.items()])
+            conn.execute(DELETE_EMPTY_SQL)
+            conn.commit()
+
+    def _select(self, sql: str, storage_key: str):
+        with self.db.get_connection() as conn:
+            return conn.execute(sql, (storage_key, time.time() - self.ttl)).fetchone()
+
+    async def close(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+        await self.flush()
@@ -0,0 +1,59 @@
+from database.db import BotDatabase
+from database import db
+
+
+BUMP_SQL = """
+    INSERT INTO generations (key, generation) VALUES (?, 1)
+    ON CONFLICT (key) DO UPDATE SET generation = generation + 1
+"""
+SELECT_GENERATION_SQL = "SELECT generation FROM generations WHERE key = ?"
+SELECT_PREFIX_SQL = "SELECT key, generation FROM generations WHERE substr(key, 1, length(?1)) = ?1"
+
+
+class Generations:
+    """
+    Счётчики изменений по ключу в SQLite бота, общие для всех процессов кластера.
+    Процесс, изменивший данные, увеличивает счётчик; остальные сравнивают его с последним
+    увиденным значением и сбрасывают свои кэши, если он изменился.
+    """
+
+    def __init__(self, db: BotDatabase):
+        self.db = db
+        self._init_table()
+
+    def _init_table(self):
+        with self.db.get_connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS generations (
+                    key TEXT PRIMARY KEY,
+                    generation INTEGER NOT NULL
+                ) WITHOUT ROWID
+            """)
+            conn.commit()
+
+    async def bump(self, *keys: str):
+        await self.db.run(self.save_bump, keys)
+
+    async def get(self, key: str) -> int:
+        return await self.db.run(self.load_generation, key)
+
+    async def get_prefixed(self, prefix: str) -> dict[str, int]:
+        return await self.db.run(self.load_prefixed, prefix)
+
+    def save_bump(self, keys: tuple[str, ...]):
+        with self.db.get_connection() as conn:
+            conn.executemany(BUMP_SQL, ((key,) for key in keys))
+            conn.commit()
+
+    def load_generation(self, key: str) -> int:
+        """0, если ключ ещё ни разу не менялся."""
+        with self.db.get_connection() as conn:
+            row = conn.execute(SELECT_GENERATION_SQL, (key,)).fetchone()
+        return row[0] if row else 0
+
+    def load_prefixed(self, prefix: str) -> dict[str, int]:
+        with self.db.get_connection() as conn:
+            return dict(conn.execute(SELECT_PREFIX_SQL, (prefix,)).fetchall())
+
+
+generations = Generations(db)
@@ -0,0 +1,162 @@
+import time
+from database.db import BotDatabase
+from database import db
+from settings.config import MAILING_EVENTS_RESYNC
+
+
+TASK_STATUSES = {
+    'CREATE': 'Запланирована',
+    'SUCCESS': 'Выполнена',
+    'FAILURE': 'Ошибка',
+    'SKIPPED': 'Пропущено',
+    'RETRY': 'Повтор',
+}
+TASK_STATUS_EMOJI = {
+    'CREATE': '⏳',
+    'SUCCESS': '✅',
+    'FAILURE': '❌',
+    'SKIPPED': '⏭️',
+    'RETRY': '🔄',
+}
+
+SELECT_STATUS_SQL = """
+    SELECT status, updated_at FROM mailing_tasks WHERE mailing_id = ? AND scheduled_date = ? AND task_name = ?
+"""
+UPSERT_TASK_SQL = """
+    INSERT OR REPLACE INTO mailing_tasks (mailing_id, scheduled_date, task_name, status, updated_at)
+    VALUES (?, ?, ?, ?, ?)
+"""
+# Состояние из tasklog не перетирает события, пришедшие после его запроса
+SEED_TASK_SQL = """
+    INSERT INTO mailing_tasks (mailing_id, scheduled_date, task_name, status, updated_at)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (mailing_id, scheduled_date, task_name) DO UPDATE
+    SET status = excluded.status, updated_at = excluded.updated_at
+    WHERE excluded.updated_at >= mailing_tasks.updated_at
+"""
+SELECT_TASKS_SQL = "SELECT scheduled_date, task_name, status FROM mailing_tasks WHERE mailing_id = ?"
+SET_OWNER_SQL = """
+    INSERT INTO mailing_sync (mailing_id, chat_id) VALUES (?, ?)
+    ON CONFLICT (mailing_id) DO UPDATE SET chat_id = excluded.chat_id
+"""
+SET_SYNCED_SQL = """
+    INSERT INTO mailing_sync (mailing_id, synced_at) VALUES (?, ?)
+    ON CONFLICT (mailing_id) DO UPDATE SET synced_at = excluded.synced_at
+"""
+SELECT_SYNC_SQL = "SELECT chat_id, synced_at FROM mailing_sync WHERE mailing_id = ?"
+DELETE_TASKS_SQL = "DELETE FROM mailing_tasks WHERE mailing_id = ?"
+DELETE_SYNC_SQL = "DELETE FROM mailing_sync WHERE mailing_id = ?"
+
+
+class MailingEvents:
+    """
+    Локальное состояние задач рассылок: статус по ключу (рассылка, дата, задача) из событий бэкенда.
+    Рассылка считается синхронизированной после загрузки её tasklog (seed), дальше карточка строится
+    по этой таблице. Через resync секунд после загрузки tasklog запрашивается снова, чтобы исправить
+    события, не доставленные бэкендом. Здесь же хранится chat_id создателя из событий.
+    """
+
+    def __init__(self, db: BotDatabase, resync: float = MAILING_EVENTS_RESYNC):
+        self.db = db
+        self.resync = resync
+        self._init_table()
+
+    def _init_table(self):
+        with self.db.get_connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS mailing_tasks (
+                    mailing_id INTEGER NOT NULL,
+                    scheduled_date TEXT NOT NULL,
+                    task_name TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (mailing_id, scheduled_date, task_name)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS mailing_sync (
+                    mailing_id INTEGER PRIMARY KEY,
+                    chat_id INTEGER,
+                    synced_at REAL
+                )
+            """)
+            conn.commit()
+
+    async def put(self, events: list[dict]) -> list[dict]:
+        return await self.db.run(self.save_events, events)
+
+    async def seed(self, mailing_id: int, task_logs: list[dict], fetched_at: float):
+        await self.db.run(self.save_tasklog, mailing_id, task_logs, fetched_at)
+
+    async def get_tasks(self, mailing_id: int) -> tuple[dict[tuple[str, str], str] | None, bool]:
+        return await self.db.run(self.load_tasks, mailing_id)
+
+    async def get_owner(self, mailing_id: int) -> int | None:
+        return await self.db.run(self.load_owner, mailing_id)
+
+    async def forget(self, mailing_id: int):
+        await self.db.run(self.delete_mailing, mailing_id)
+
+    def save_events(self, events: list[dict]) -> list[dict]:
+        """
+        events — словари mailing_id, scheduled_date, task_name, status, updated_at и необязательный chat_id.
+        Событие старше сохранённого не применяется. Возвращает события, изменившие статус.
+        """
+        changed = []
+        with self.db.get_connection() as conn:
+            for event in events:
+                key = (event['mailing_id'], event['scheduled_date'], event['task_name'])
+                current = conn.execute(SELECT_STATUS_SQL, key).fetchone()
+                if current is not None and current[1] > event['updated_at']:
+                    continue
+                conn.execute(UPSERT_TASK_SQL, (*key, event['status'], event['updated_at']))
+                if event.get('chat_id') is not None:
+                    conn.execute(SET_OWNER_SQL, (event['mailing_id'], event['chat_id']))
+                if current is None or current[0] != event['status']:
+                    changed.append(event)
+            conn.commit()
+        return changed
+
+    def save_tasklog(self, mailing_id: int, task_logs: list[dict], fetched_at: float):
+        """
+        Первая запись tasklog на ключ побеждает, как и при разборе ответа в карточке рассылки.
+        tasklog отражает состояние на момент запроса fetched_at: он заменяет более ранние статусы,
+        но не события, пришедшие позже.
+        """
+        tasks = {}
+        for task in task_logs:
+            tasks.setdefault((task['scheduled_date'], task['task_name']), task['status'])
+        with self.db.get_connection() as conn:
+            conn.executemany(SEED_TASK_SQL, (
+                (mailing_id, scheduled_date, task_name, status, fetched_at)
+                for (scheduled_date, task_name), status in tasks.items()
+            ))
+            conn.execute(SET_SYNCED_SQL, (mailing_id, fetched_at))
+            conn.commit()
+
+    def load_tasks(self, mailing_id: int) -> tuple[dict[tuple[str, str], str] | None, bool]:
+        """
+        Статусы по (дата, задача) и признак, что tasklog пора запросить заново.
+        Статусов нет (None), если рассылка ещё не синхронизирована.
+        """
+        with self.db.get_connection() as conn:
+            sync = conn.execute(SELECT_SYNC_SQL, (mailing_id,)).fetchone()
+            if sync is None or sync[1] is None:
+                return None, True
+            rows = conn.execute(SELECT_TASKS_SQL, (mailing_id,)).fetchall()
+        tasks = {(scheduled_date, task_name): status for scheduled_date, task_name, status in rows}
+        return tasks, time.time() - sync[1] > self.resync
+
+    def load_owner(self, mailing_id: int) -> int | None:
+        with self.db.get_connection() as conn:
+            sync = conn.execute(SELECT_SYNC_SQL, (mailing_id,)).fetchone()
+        return sync[0] if sync else None
+
+    def delete_mailing(self, mailing_id: int):
+        with self.db.get_connection() as conn:
+            conn.execute(DELETE_TASKS_SQL, (mailing_id,))
+            conn.execute(DELETE_SYNC_SQL, (mailing_id,))
+            conn.commit()
+
+
+mailing_events = MailingEvents(db)
@@ -0,0 +1,112 @@
+import time
+from database.db import BotDatabase
+from database import db
+from settings.config import STATS_HISTORY_TTL
+
+
+# Строка пишется, только если значения отличаются от последних сохранённых для того же ключа
+INSERT_MAILING_SQL = """
+    INSERT OR REPLACE INTO mailing_snapshots (mailing_id, taken_at, sent, unsent)
+    SELECT ?1, ?2, ?3, ?4
+    WHERE (SELECT sent, unsent FROM mailing_snapshots WHERE mailing_id = ?1 ORDER BY taken_at DESC LIMIT 1)
+        IS NOT (?3, ?4)
+"""
+INSERT_ENGINEER_SQL = """
+    INSERT OR REPLACE INTO engineer_snapshots (engineer, taken_at, sent, unsent)
+    SELECT ?1, ?2, ?3, ?4
+    WHERE (SELECT sent, unsent FROM engineer_snapshots WHERE engineer = ?1 ORDER BY taken_at DESC LIMIT 1)
+        IS NOT (?3, ?4)
+"""
+UPSERT_MAILING_NAME_SQL = "INSERT OR REPLACE INTO stats_mailings (mailing_id, name) VALUES (?, ?)"
+SELECT_MAILING_NAMES_SQL = "SELECT mailing_id, name FROM stats_mailings"
+# Точки окна плюс последняя точка перед ним — значение на начало окна
+SELECT_WINDOW_SQL = """
+    SELECT {key}, taken_at, sent, unsent FROM {table} WHERE taken_at >= ?1
+    UNION ALL
+    SELECT {key}, MAX(taken_at), sent, unsent FROM {table} WHERE taken_at < ?1 GROUP BY {key}
+    ORDER BY 1, 2
+"""
+# Последняя точка ключа остаётся всегда: без неё неизменившееся значение потерялось бы
+DELETE_OLD_SQL = """
+    DELETE FROM {table} WHERE taken_at < ?
+    AND taken_at < (SELECT MAX(taken_at) FROM {table} AS latest WHERE latest.{key} = {table}.{key})
+"""
+
+
+class StatsHistory:
+    """
+    История снимков статистики: /stats/count/{id}/ по рассылкам и /stats/all по инженерам.
+    Храним только изменения (отправлено/не отправлено) с временем снимка в секундах;
+    между соседними строками значение считается неизменным. Строки старше ttl удаляются при записи.
+    """
+
+    def __init__(self, db: BotDatabase, ttl: float = STATS_HISTORY_TTL):
+        self.db = db
+        self.ttl = ttl
+        self._init_table()
+
+    def _init_table(self):
+        with self.db.get_connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS mailing_snapshots (
+                    mailing_id INTEGER NOT NULL,
+                    taken_at INTEGER NOT NULL,
+                    sent INTEGER NOT NULL,
+                    unsent INTEGER NOT NULL,
+                    PRIMARY KEY (mailing_id, taken_at)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS engineer_snapshots (
+                    engineer TEXT NOT NULL,
+                    taken_at INTEGER NOT NULL,
+                    sent INTEGER NOT NULL,
+                    unsent INTEGER NOT NULL,
+                    PRIMARY KEY (engineer, taken_at)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS stats_mailings (
+                    mailing_id INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL
+                )
+            """)
+            conn.commit()
+
+    async def put(self, mailings: list[tuple[int, str, int, int]], engineers: list[tuple[str, int, int]],
+                  taken_at: float | None = None):
+        await self.db.run(self.save_snapshot, mailings, engineers, taken_at)
+
+    async def get(self, since: float) -> tuple[dict[int, str], list[tuple], list[tuple]]:
+        return await self.db.run(self.load_window, since)
+
+    def save_snapshot(self, mailings: list[tuple[int, str, int, int]], engineers: list[tuple[str, int, int]],
+                      taken_at: float | None = None):
+        """mailings — (id, название, отправлено, не отправлено), engineers — (имя, отправлено, не отправлено)."""
+        taken_at = int(taken_at if taken_at is not None else time.time())
+        with self.db.get_connection() as conn:
+            conn.executemany(UPSERT_MAILING_NAME_SQL, ((mailing_id, name) for mailing_id, name, _, _ in mailings))
+            conn.executemany(INSERT_MAILING_SQL, (
+                (mailing_id, taken_at, sent, unsent) for mailing_id, _, sent, unsent in mailings
+            ))
+            conn.executemany(INSERT_ENGINEER_SQL, (
+                (engineer, taken_at, sent, unsent) for engineer, sent, unsent in engineers
+            ))
+            for table, key in (('mailing_snapshots', 'mailing_id'), ('engineer_snapshots', 'engineer')):
+                conn.execute(DELETE_OLD_SQL.format(table=table, key=key), (taken_at - self.ttl,))
+            conn.commit()
+
+    def load_window(self, since: float) -> tuple[dict[int, str], list[tuple], list[tuple]]:
+        """Названия рассылок и строки (ключ, время, отправлено, не отправлено) по рассылкам и инженерам."""
+        with self.db.get_connection() as conn:
+            names = dict(conn.execute(SELECT_MAILING_NAMES_SQL).fetchall())
+            mailings = conn.execute(
+                SELECT_WINDOW_SQL.format(table='mailing_snapshots', key='mailing_id'), (int(since),)
+            ).fetchall()
+            engineers = conn.execute(
+                SELECT_WINDOW_SQL.format(table='engineer_snapshots', key='engineer'), (int(since),)
+            ).fetchall()
+        return names, mailings, engineers
+
+
+stats_history = StatsHistory(db)
@@ -0,0 +1,105 @@
+import json
+import time
+from database.db import BotDatabase
+from database import db
+from settings.config import UPLOAD_BATCHES_TTL
+
+
+INSERT_BATCH_SQL = """
+    INSERT OR REPLACE INTO upload_batches (upload_id, batch, first_row, rows, row_ranges, status, attempts, updated_at)
+    VALUES (?, ?, ?, ?, ?, 'pending', 0, ?)
+"""
+UPDATE_BATCH_SQL = """
+    UPDATE upload_batches SET status = ?, status_code = ?, error = ?, attempts = attempts + 1, updated_at = ?
+    WHERE upload_id = ? AND batch = ?
+"""
+SELECT_BATCHES_SQL = """
+    SELECT batch, first_row, rows, row_ranges, status, status_code, error, attempts FROM upload_batches
+    WHERE upload_id = ? ORDER BY batch
+"""
+SELECT_PENDING_SQL = """
+    SELECT batch FROM upload_batches WHERE upload_id = ? AND status IN ('pending', 'failed') ORDER BY batch
+"""
+DELETE_OLD_BATCHES_SQL = "DELETE FROM upload_batches WHERE updated_at < ?"
+
+
+class UploadBatches:
+    """
+    Журнал пакетной загрузки: по строке на пакет с его строками Excel (отрезками, см. row_ranges), статусом
+    ('pending', 'done', 'rejected', 'failed'), последним HTTP-статусом, ошибкой и числом попыток.
+    'pending' и 'failed' ещё подлежат отправке.
+    Записи старше ttl удаляются при регистрации новой загрузки.
+    """
+
+    def __init__(self, db: BotDatabase, ttl: float = UPLOAD_BATCHES_TTL):
+        self.db = db
+        self.ttl = ttl
+        self._init_table()
+
+    def _init_table(self):
+        with self.db.get_connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS upload_batches (
+                    upload_id TEXT NOT NULL,
+                    batch INTEGER NOT NULL,
+                    first_row INTEGER NOT NULL,
+                    rows INTEGER NOT NULL,
+                    row_ranges TEXT,
+                    status TEXT NOT NULL,
+                    status_code INTEGER,
+                    error TEXT,
+                    attempts INTEGER NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (upload_id, batch)
+                )
+            """)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(upload_batches)")}
+            if 'row_ranges' not in columns:
+                # Журнал из версии без отрезков строк: его записи читаются как один отрезок от first_row
+                conn.execute("ALTER TABLE upload_batches ADD COLUMN row_ranges TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS upload_batches_updated_at ON upload_batches (updated_at)")
+            conn.commit()
+
+    async def start(self, upload_id: str, batches: list[list[list[int]]]):
+        await self.db.run(self.save_batches, upload_id, batches)
+
+    async def finish(self, upload_id: str, batch: int, status: str, status_code: int | None, error: str | None = None):
+        await self.db.run(self.save_result, upload_id, batch, status, status_code, error)
+
+    async def get(self, upload_id: str) -> list[tuple]:
+        return await self.db.run(self.load_batches, upload_id)
+
+    async def get_pending(self, upload_id: str) -> list[int]:
+        return await self.db.run(self.load_pending, upload_id)
+
+    def save_batches(self, upload_id: str, batches: list[list[list[int]]]):
+        """batches — строки Excel каждого пакета по порядку, отрезками [первая, последняя]."""
+        now = time.time()
+        with self.db.get_connection() as conn:
+            conn.execute(DELETE_OLD_BATCHES_SQL, (now - self.ttl,))
+            conn.executemany(INSERT_BATCH_SQL, (
+                (upload_id, batch, ranges[0][0], sum(end - start + 1 for start, end in ranges), json.dumps(ranges), now)
+                for batch, ranges in enumerate(batches)
+            ))
+            conn.commit()
+
+    def save_result(self, upload_id: str, batch: int, status: str, status_code: int | None, error: str | None):
+        with self.db.get_connection() as conn:
+            conn.execute(UPDATE_BATCH_SQL, (status, status_code, error, time.time(), upload_id, batch))
+            conn.commit()
+
+    def load_batches(self, upload_id: str) -> list[tuple]:
+        """(пакет, отрезки строк, число строк, статус, HTTP-статус, ошибка, попытки) по порядку пакетов."""
+        with self.db.get_connection() as conn:
+            rows = conn.execute(SELECT_BATCHES_SQL, (upload_id,)).fetchall()
+        return [
+            (batch, json.loads(ranges) if ranges else [[first_row, first_row + count - 1]], count, *rest)
+            for batch, first_row, count, ranges, *rest in rows
+        ]
+
+    def load_pending(self, upload_id: str) -> list[int]:
+        with self.db.get_connection() as conn:
+            return [row[0] for row in conn.execute(SELECT_PENDING_SQL, (upload_id,)).fetchall()]
+
+
+upload_batches = UploadBatches(db)
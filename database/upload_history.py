@@ -0,0 +1,93 @@
+import time
+from database.db import BotDatabase
+from database import db
+from settings.config import UPLOAD_HISTORY_TTL, UPLOAD_HISTORY_FILES
+
+
+SELECT_DIGEST_SQL = "SELECT digest FROM upload_files WHERE file_unique_id = ?"
+INSERT_DIGEST_SQL = "INSERT OR REPLACE INTO upload_files (file_unique_id, digest) VALUES (?, ?)"
+SELECT_RESPONSE_SQL = """
+    SELECT status_code, content, uploaded_at FROM upload_responses WHERE digest = ? AND category = ?
+"""
+UPSERT_RESPONSE_SQL = """
+    INSERT INTO upload_responses (digest, category, status_code, content, uploaded_at) VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(digest, category) DO UPDATE SET
+        status_code = excluded.status_code, content = excluded.content, uploaded_at = excluded.uploaded_at
+"""
+DELETE_OLD_RESPONSES_SQL = "DELETE FROM upload_responses WHERE uploaded_at < ?"
+# INSERT OR REPLACE выдаёт заменённой строке новый rowid, поэтому rowid растёт вместе с давностью использования
+DELETE_OLD_FILES_SQL = "DELETE FROM upload_files WHERE rowid <= (SELECT MAX(rowid) FROM upload_files) - ?"
+
+
+class UploadHistory:
+    """
+    История загрузок по содержимому файла (sha256):
+    file_unique_id Telegram → digest, чтобы не хэшировать повторно присланный документ,
+    и последний ответ бэкенда на загрузку файла с таким digest в категорию.
+    При записи удаляются ответы старше ttl и все соответствия file_unique_id, кроме max_files последних.
+    """
+
+    def __init__(self, db: BotDatabase, ttl: float = UPLOAD_HISTORY_TTL, max_files: int = UPLOAD_HISTORY_FILES):
+        self.db = db
+        self.ttl = ttl
+        self.max_files = max_files
+        self._init_tables()
+
+    def _init_tables(self):
+        with self.db.get_connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS upload_files (
+                    file_unique_id TEXT PRIMARY KEY,
+                    digest TEXT NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS upload_responses (
+                    digest TEXT NOT NULL,
+                    category TEXT NOT NULL,
+                    status_code INTEGER NOT NULL,
+                    content BLOB NOT NULL,
+                    uploaded_at REAL NOT NULL,
+                    PRIMARY KEY (digest, category)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS upload_responses_uploaded_at ON upload_responses (uploaded_at)")
+            conn.commit()
+
+    async def get_digest(self, file_unique_id: str) -> str | None:
+        return await self.db.run(self.load_digest, file_unique_id)
+
+    async def put_digest(self, file_unique_id: str, digest: str):
+        await self.db.run(self.save_digest, file_unique_id, digest)
+
+    async def get_response(self, digest: str, category: str) -> tuple[int, bytes, float] | None:
+        return await self.db.run(self.load_response, digest, category)
+
+    async def put_response(self, digest: str, category: str, status_code: int, content: bytes):
+        await self.db.run(self.save_response, digest, category, status_code, content)
+
+    def load_digest(self, file_unique_id: str) -> str | None:
+        with self.db.get_connection() as conn:
+            row = conn.execute(SELECT_DIGEST_SQL, (file_unique_id,)).fetchone()
+            return row[0] if row else None
+
+    def save_digest(self, file_unique_id: str, digest: str):
+        with self.db.get_connection() as conn:
+            conn.execute(INSERT_DIGEST_SQL, (file_unique_id, digest))
+            conn.execute(DELETE_OLD_FILES_SQL, (self.max_files,))
+            conn.commit()
+
+    def load_response(self, digest: str, category: str) -> tuple[int, bytes, float] | None:
+        """Последний ответ бэкенда: (status_code, тело, время загрузки) или None."""
+        with self.db.get_connection() as conn:
+            return conn.execute(SELECT_RESPONSE_SQL, (digest, category)).fetchone()
+
+    def save_response(self, digest: str, category: str, status_code: int, content: bytes):
+        with self.db.get_connection() as conn:
+            now = time.time()
+            conn.execute(DELETE_OLD_RESPONSES_SQL, (now - self.ttl,))
+            conn.execute(UPSERT_RESPONSE_SQL, (digest, category, status_code, content, now))
+            conn.commit()
+
+
+upload_history = UploadHistory(db)
@@ -3,6 +3,7 @@ from .setup import setup_router
 from .upload import upload_router
 from .information import information_router
 from .mailing import mailing_router
+from .trend import trend_router
 
 __all__ = [
     "start_router",
@@ -10,4 +11,5 @@ __all__ = [
     "upload_router",
     "information_router",
     "mailing_router",
+    "trend_router",
 ]
@@ -1,15 +1,23 @@
+import asyncio
+import logging
+import time
 from aiogram import Router, F
 from aiogram.filters import Command
 from aiogram.types import Message, CallbackQuery
+from aiogram.exceptions import TelegramBadRequest
 from keyboards.inline_keyboards import information_inline_keyboard, cancel_existing_mailing_keyboard
 from aiogram.fsm.context import FSMContext
-import requests
-from settings.config import API_URL, HEADER
+from aiogram.fsm.state import State, StatesGroup
+from settings.config import API_URL, MAILING_EVENTS_SECRET
+from utils import api_client, api_cache, ApiError, ApiHTTPError, ApiTimeoutError
+from utils.engineer_stats import engineer_stats, SORTS
+from database.mailing_events import mailing_events, TASK_STATUSES, TASK_STATUS_EMOJI
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from datetime import datetime
 
 
 information_router = Router()
+logger = logging.getLogger(__name__)
 
 @information_router.message(Command('information'))
 async def information(message: Message, state: FSMContext):
@@ -23,39 +31,90 @@ async def information(message: Message, state: FSMContext):
     )
 
 
+class EngineerStates(StatesGroup):
+    search = State()
+
+
 @information_router.callback_query(F.data.in_(['info_option_1']))
 async def list_engineers(callback: CallbackQuery, state: FSMContext):
     """Обработка кнопки 'Список опрашиваемых'"""
-    try:
-        await callback.message.delete()
-        loading_msg = await callback.message.answer("🔄 Запрос на сервер...")
-        response = requests.get(f'{API_URL}/stats/all', headers=HEADER, verify=False)
-        response_data = response.json()
+    await callback.message.delete()
+    loading_msg = await callback.message.answer("🔄 Запрос на сервер...")
+    await state.update_data(engineers_sort='default', engineers_query='')
+    await show_engineers_page(loading_msg, 0, 'default', '')
+
+
+@information_router.callback_query(F.data.startswith('engineers_page:'))
+async def engineers_page(callback: CallbackQuery, state: FSMContext):
+    """Листание и сортировка списка: engineers_page:<страница>:<сортировка>."""
+    _, page, sort = callback.data.split(':')
+    state_data = await state.get_data()
+    await state.update_data(engineers_sort=sort)
+    await show_engineers_page(callback.message, int(page), sort, state_data.get('engineers_query', ''))
+    await callback.answer()
+
 
-        engineers = response_data.get("engineers", [])
-        total_feedbacks = response_data.get("total_feedbacks", {})
+@information_router.callback_query(F.data == 'engineers_search')
+async def engineers_search(callback: CallbackQuery, state: FSMContext):
+    await state.set_state(EngineerStates.search)
+    await callback.message.answer("🔎 Введите часть имени или фамилии инженера:")
+    await callback.answer()
 
-        message_text = "📋 *Список опрашиваемых инженеров:*\n\n"
-        message_text += "👷‍♂️ **Имя Фамилия** — **Отправлено/Не отправлено**\n\n"
 
+@information_router.callback_query(F.data == 'engineers_reset')
+async def engineers_reset(callback: CallbackQuery, state: FSMContext):
+    state_data = await state.get_data()
+    sort = state_data.get('engineers_sort', 'default')
+    await state.update_data(engineers_query='')
+    await show_engineers_page(callback.message, 0, sort, '')
+    await callback.answer()
 
-        if not engineers:
-            message_text += "Нет инженеров с проектами.\n"
-        else:
-            for engineer in engineers:
-                message_text += (
-                    f"👷‍♂️ {engineer['engineer']} — "
-                    f"{engineer['feedback_stats']}\n"
-                )
 
-        message_text += "\n📊 *Общая статистика:*\n"
-        message_text += f"✅ Отправлено: {total_feedbacks.get('total_sent', 0)}\n"
-        message_text += f"❌ Не отправлено: {total_feedbacks.get('total_unsent', 0)}\n"
+# Команды в состоянии поиска не считаются запросом и уходят своим обработчикам
+@information_router.message(EngineerStates.search, F.text, ~F.text.startswith('/'))
+async def engineers_search_query(message: Message, state: FSMContext):
+    query = message.text.strip()
+    state_data = await state.get_data()
+    sort = state_data.get('engineers_sort', 'default')
+    await state.set_state(None)
+    await state.update_data(engineers_query=query)
+    loading_msg = await message.answer("🔄 Ищу...")
+    await show_engineers_page(loading_msg, 0, sort, query)
 
-        await loading_msg.edit_text(message_text, parse_mode="Markdown")
 
-    except Exception as e:
-        await loading_msg.edit_text("❌ Произошла ошибка при получении данных. Попробуйте позже.")
+async def show_engineers_page(target: Message, page: int, sort: str, query: str):
+    """Рендерит страницу из локального снимка /stats/all (обновляется по TTL api_cache) в сообщение target."""
+    try:
+        response = await api_cache.get(f'{API_URL}/stats/all')
+        stats = engineer_stats.get(response)
+    except (ApiError, ValueError):
+        logger.exception("Не удалось получить статистику инженеров")
+        await target.edit_text("❌ Произошла ошибка при получении данных. Попробуйте позже.")
+        return
+
+    text, page, total_pages = stats.render(page, sort, query)
+    try:
+        await target.edit_text(text, parse_mode="HTML", reply_markup=build_engineers_keyboard(page, total_pages, sort, query))
+    except TelegramBadRequest as e:
+        # Повторное нажатие на текущую сортировку ничего не меняет
+        if 'message is not modified' not in str(e):
+            raise
+
+
+def build_engineers_keyboard(page: int, total_pages: int, sort: str, query: str) -> InlineKeyboardMarkup:
+    navigation = []
+    if page > 0:
+        navigation.append(InlineKeyboardButton(text="⬅️ Назад", callback_data=f"engineers_page:{page - 1}:{sort}"))
+    if page < total_pages - 1:
+        navigation.append(InlineKeyboardButton(text="Вперёд ➡️", callback_data=f"engineers_page:{page + 1}:{sort}"))
+    sorting = [
+        InlineKeyboardButton(text=("• " if sort == key else "") + label.capitalize(),
+                             callback_data=f"engineers_page:0:{key}")
+        for key, label in SORTS.items()
+    ]
+    search = (InlineKeyboardButton(text="✖️ Сбросить поиск", callback_data="engineers_reset") if query
+              else InlineKeyboardButton(text="🔎 Поиск по имени", callback_data="engineers_search"))
+    return InlineKeyboardMarkup(inline_keyboard=[row for row in (navigation, sorting, [search]) if row])
 
 
 @information_router.callback_query(F.data.in_(['info_option_2']))
@@ -113,11 +172,7 @@ async def show_mailing_list(callback: CallbackQuery):
     try:
         loading_msg = await callback.message.answer("🔄 Получаем список рассылок...")
 
-        response = requests.get(
-            f"{API_URL}/mailing/all/",
-            headers=HEADER,
-            verify=False,
-        )
+        response = await api_cache.get(f"{API_URL}/mailing/all/")
         response.raise_for_status()
 
         data = response.json()
@@ -132,11 +187,11 @@ async def show_mailing_list(callback: CallbackQuery):
                 reply_markup=create_mailing_list_keyboard(data['data'])
             )
 
-    except requests.exceptions.RequestException as e:
+    except ApiError as e:
         error_detail = str(e)
-        if isinstance(e, requests.exceptions.Timeout):
+        if isinstance(e, ApiTimeoutError):
             error_detail = "Сервер не отвечает (таймаут)"
-        elif isinstance(e, requests.exceptions.HTTPError):
+        elif isinstance(e, ApiHTTPError):
             error_detail = f"HTTP ошибка: {e.response.status_code}"
 
         await loading_msg.edit_text(f"🚫 Ошибка запроса: {error_detail}")
@@ -156,30 +211,62 @@ async def show_mailing_info(callback: CallbackQuery):
         mailing_id = callback.data.split("_")[-1]
         loading_msg = await callback.message.answer("🔄 Запрос на сервер...")
 
-        response = requests.get(
-            f"{API_URL}/mailing/{mailing_id}/",
-            headers=HEADER,
-            verify=False
+        # При включённом приёме событий статусы задач берутся из локального состояния; tasklog запрашивается,
+        # пока рассылка не синхронизирована или с последней синхронизации прошло MAILING_EVENTS_RESYNC,
+        # и обновляет это состояние.
+        tasks_by_date, needs_tasklog = (
+            await mailing_events.get_tasks(int(mailing_id)) if MAILING_EVENTS_SECRET else (None, True)
         )
+        # tasklog не зависит от рассылки и идёт параллельно с ней. Его сбой не мешает показать карточку:
+        # она выводится с локальными статусами, а если их нет — без статусов задач.
+        fetched_at = time.time()
+        requests = [api_cache.get(f"{API_URL}/mailing/{mailing_id}/")]
+        if needs_tasklog:
+            requests.append(api_client.get(f"{API_URL}/mailing/tasklog/{mailing_id}/"))
+        response, *tasklog_results = await asyncio.gather(*requests, return_exceptions=True)
+        if isinstance(response, BaseException):
+            raise response
         response.raise_for_status()
         mailing_data = response.json()
 
+        # Статистика запрашивается, только если её нет в данных рассылки; без неё карточка выводится без раздела
         stats_mailing = mailing_data.get('statistics', '')
+        stats_response = None
         feedback_stats = None
         if not stats_mailing:
-            stats_response = requests.get(
-                f"{API_URL}/stats/count/{mailing_id}/",
-                headers=HEADER,
-                verify=False
-            )
-            feedback_stats = stats_response.json()
-
-        tasklog_response = requests.get(
-            f"{API_URL}/mailing/tasklog/{mailing_id}/",
-            headers=HEADER,
-            verify=False
+            try:
+                stats_response = await api_client.get(f"{API_URL}/stats/count/{mailing_id}/")
+                feedback_stats = stats_response.json()
+            except (ApiError, ValueError):
+                logger.warning("Не удалось получить статистику рассылки %s", mailing_id, exc_info=True)
+                stats_response = None
+
+        tasklog_response = tasklog_results[0] if tasklog_results else None
+        if isinstance(tasklog_response, BaseException):
+            logger.warning("Не удалось получить tasklog рассылки %s: %s", mailing_id, tasklog_response)
+            tasklog_response = None
+        logger.info(
+            "Рассылка %s: mailing %.0f мс, stats %s, tasklog %s",
+            mailing_id, response.elapsed * 1000,
+            f"{stats_response.elapsed * 1000:.0f} мс" if stats_response is not None else "—",
+            f"{tasklog_response.elapsed * 1000:.0f} мс" if tasklog_response is not None
+            else ("локально" if tasks_by_date is not None else "—")
         )
-        task_logs = tasklog_response.json()
+
+        task_logs = None
+        if tasklog_response is not None and tasklog_response.status_code == 200:
+            try:
+                task_logs = tasklog_response.json()
+            except ValueError:
+                logger.warning("Некорректный tasklog рассылки %s", mailing_id)
+        if task_logs is not None and MAILING_EVENTS_SECRET:
+            await mailing_events.seed(int(mailing_id), task_logs, fetched_at)
+            # События, пришедшие во время запроса, новее tasklog и остаются в силе
+            tasks_by_date, _ = await mailing_events.get_tasks(int(mailing_id))
+        elif task_logs is not None:
+            tasks_by_date = {}
+            for task in task_logs:
+                tasks_by_date.setdefault((task['scheduled_date'], task['task_name']), task['status'])
         start_date_formated = datetime.strptime(mailing_data.get('start_date', '-'), "%Y-%m-%d").strftime("%d.%m.%Y")
         end_date_formated = datetime.strptime(mailing_data.get('end_date', '-'), "%Y-%m-%d").strftime("%d.%m.%Y")
 
@@ -192,28 +279,11 @@ async def show_mailing_info(callback: CallbackQuery):
         intermediate_dates = mailing_data.get('intermediate_dates', [])
         if intermediate_dates:
             message_text += "\n📍 **Даты рассылок**:\n"
-            if task_logs and tasklog_response.status_code == 200:
-                status_mapping = {
-                        'CREATE': 'Запланирована',
-                        'SUCCESS': 'Выполнена',
-                        'FAILURE': 'Ошибка',
-                        'SKIPPED': 'Пропущено',
-                        'RETRY': 'Повтор'
-                    }
+            if tasks_by_date:
                 for date in intermediate_dates:
-                    matching_task = next(
-                        (task for task in task_logs if task['scheduled_date'] == date and task['task_name'] == 'send_emails'),
-                        None
-                    )
-                    status = matching_task['status'] if matching_task else "Не выполнено"
-                    status_display = status_mapping.get(status, status)
-                    status_emoji = {
-                        'CREATE': '⏳',
-                        'SUCCESS': '✅',
-                        'FAILURE': '❌',
-                        'SKIPPED': '⏭️',
-                        'RETRY': '🔄'
-                    }.get(status, '⚪')
+                    status = tasks_by_date.get((date, 'send_emails'), "Не выполнено")
+                    status_display = TASK_STATUSES.get(status, status)
+                    status_emoji = TASK_STATUS_EMOJI.get(status, '⚪')
                     date_formated = datetime.strptime(date, "%Y-%m-%d").strftime("%d.%m.%Y")
                     message_text += f"- {date_formated} {status_emoji} {status_display}\n"
             else:
@@ -223,24 +293,24 @@ async def show_mailing_info(callback: CallbackQuery):
         else:
             message_text += "\n📍 **Промежуточные даты**: Отсутствуют\n"
 
-        if not stats_mailing:
+        if stats_mailing:
+            message_text += "\n📋 **Статистика отзывов**:\n"
+            message_text += f"✅ Отправлено: {stats_mailing.get('total_sent', 0)}\n"
+            message_text += f"⏳ Не отправлено: {stats_mailing.get('total_unsent', 0)}\n"
+        elif stats_response is not None:
             if feedback_stats and stats_response.status_code == 200:
                 message_text += "\n📋 **Статистика отзывов**:\n"
                 message_text += f"✅ Отправлено: {feedback_stats.get('total_sent', 0)}\n"
                 message_text += f"⏳ Не отправлено: {feedback_stats.get('total_unsent', 0)}\n"
             elif stats_response.status_code == 404:
                 message_text += f"\n⚠️ **{feedback_stats.get('detail', 'Статистика недоступна')}** \n"
-        else:
-            message_text += "\n📋 **Статистика отзывов**:\n"
-            message_text += f"✅ Отправлено: {stats_mailing.get('total_sent', 0)}\n"
-            message_text += f"⏳ Не отправлено: {stats_mailing.get('total_unsent', 0)}\n"
 
         await loading_msg.edit_text(
             message_text,
             parse_mode="Markdown",
             reply_markup=create_mailing_action_keyboard(mailing_data['id'], mailing_data['status'])
         )
-    except requests.exceptions.RequestException as e:
+    except ApiError as e:
         await loading_msg.edit_text(f"🚫 Ошибка при получении информации о рассылке: {str(e)}")
 
 
@@ -250,11 +320,7 @@ async def cancel_mailing(callback: CallbackQuery):
     await callback.message.delete()
     try:
         mailing_id = callback.data.split("_")[-1]
-        response = requests.get(
-            f"{API_URL}/mailing/{mailing_id}/",
-            headers=HEADER,
-            verify=False
-        )
+        response = await api_client.get(f"{API_URL}/mailing/{mailing_id}/")
         response.raise_for_status()
         mailing_data = response.json()
 
@@ -262,17 +328,15 @@ async def cancel_mailing(callback: CallbackQuery):
             await callback.message.answer("🚫 Нельзя отменить завершенную рассылку.")
             return
 
-        response = requests.delete(
-            f"{API_URL}/mailing/{mailing_id}/",
-            headers=HEADER,
-            verify=False
-        )
+        response = await api_client.delete(f"{API_URL}/mailing/{mailing_id}/")
+        await api_cache.invalidate('/mailing/')
         response.raise_for_status()
+        await mailing_events.forget(int(mailing_id))
         await callback.message.answer(
             "✅ *Рассылка отменена*\n"
             f"📌 Период: `{mailing_data['period_name']}`\n",
             parse_mode="Markdown"
         )
-    except requests.exceptions.RequestException as e:
+    except ApiError as e:
         await callback.message.answer(f"❗ Ошибка при отмене рассылки: {str(e)}")
     await callback.answer()
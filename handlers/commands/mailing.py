@@ -3,9 +3,10 @@ from aiogram.types import CallbackQuery
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.fsm.context import FSMContext
 from datetime import datetime, timedelta
-import requests
 from keyboards.inline_keyboards import emails_start_inline_keyboard, emails_end_inline_keyboard, emails_accept_settings_keyboard, cancel_existing_mailing_keyboard_restart, setup_inline_keyboard
-from settings.config import API_URL, HEADER
+from settings.config import API_URL
+from utils import api_client, api_cache, ApiError, ApiHTTPError
+from database.mailing_events import mailing_events
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, Message
 import re
 
@@ -108,12 +109,13 @@ async def confirm_mailing(callback: CallbackQuery, state: FSMContext):
             }
 
             try:
-                response = requests.post(f'{API_URL}/mailing/settings/', json=payload, headers=HEADER, verify=False)
+                response = await api_client.post(f'{API_URL}/mailing/settings/', json=payload)
+                await api_cache.invalidate('/mailing/')
                 response.raise_for_status()
                 await loading_msg.edit_text("✅ Рассылка сохранена в системе!")
                 await state.clear()
 
-            except requests.exceptions.HTTPError as e:
+            except ApiHTTPError as e:
                 if response.status_code == 400:
                     try:
                         error_msg = response.json().get("error", "Неизвестная ошибка")
@@ -162,7 +164,7 @@ async def confirm_mailing(callback: CallbackQuery, state: FSMContext):
                     await loading_msg.edit_text(f"❌ Неожиданная ошибка при создании рассылки: {str(e)}")
                     await state.clear()
 
-            except requests.exceptions.RequestException as e:
+            except ApiError as e:
                 await loading_msg.edit_text(f"❌ Ошибка связи с сервером: {str(e)}")
                 await state.clear()
 
@@ -189,11 +191,7 @@ async def cancel_existing_mailing(callback: CallbackQuery, state: FSMContext):
     try:
         loading_msg = await callback.message.answer("🔄 Удаление рассылки...")
         if callback.data == 'cancel_existing_mailing_restart':
-            list_response = requests.get(
-                f"{API_URL}/mailing/all/",
-                headers=HEADER,
-                verify=False
-            )
+            list_response = await api_client.get(f"{API_URL}/mailing/all/")
             list_response.raise_for_status()
 
             mailings = list_response.json().get('data', [])
@@ -207,12 +205,10 @@ async def cancel_existing_mailing(callback: CallbackQuery, state: FSMContext):
             latest_mailing = mailings[0]
             mailing_id = latest_mailing['id']
 
-            delete_response = requests.delete(
-                f"{API_URL}/mailing/{mailing_id}/",
-                headers=HEADER,
-                verify=False
-            )
+            delete_response = await api_client.delete(f"{API_URL}/mailing/{mailing_id}/")
+            await api_cache.invalidate('/mailing/')
             delete_response.raise_for_status()
+            await mailing_events.forget(int(mailing_id))
 
             await loading_msg.edit_text(
                 "✅ Рассылка удалена. Выберите новые даты:",
@@ -223,7 +219,7 @@ async def cancel_existing_mailing(callback: CallbackQuery, state: FSMContext):
 
         await callback.answer()
 
-    except requests.exceptions.HTTPError as e:
+    except ApiHTTPError as e:
         error_msg = "Неизвестная ошибка сервера"
         try:
             error_msg = e.response.json().get('error', str(e))
@@ -233,7 +229,7 @@ async def cancel_existing_mailing(callback: CallbackQuery, state: FSMContext):
             f"❌ Ошибка при удалении рассылки: {error_msg}",
             parse_mode="Markdown"
         )
-    except requests.exceptions.RequestException as e:
+    except ApiError as e:
         await loading_msg.edit_text(
             f"❌ Ошибка соединения: {str(e)}",
             parse_mode="Markdown"
@@ -310,7 +306,7 @@ async def process_full_name(message: Message, state: FSMContext):
     }
     await message.answer("🔄 Отправка на сервер...", parse_mode="Markdown")
     try:
-        response = requests.post(test_api_url, json=test_data, headers=HEADER, verify=False)
+        response = await api_client.post(test_api_url, json=test_data)
         response.raise_for_status()
         if response.status_code == 201:
             await message.answer(
@@ -318,7 +314,7 @@ async def process_full_name(message: Message, state: FSMContext):
                 f"📬 Письмо отправлено на {email}.",
             )
         await state.clear()
-    except requests.exceptions.HTTPError as e:
+    except ApiHTTPError as e:
         try:
             error_msg = response.json().get("error", "Неизвестная ошибка сервера")
         except:
@@ -331,6 +327,6 @@ async def process_full_name(message: Message, state: FSMContext):
         else:
             await message.answer(f"❌ Ошибка сервера: {error_msg}", parse_mode="Markdown")
         await state.clear()
-    except requests.exceptions.RequestException as e:
+    except ApiError as e:
         await message.answer(f"❌ Ошибка соединения: {str(e)}", parse_mode="Markdown")
         await state.clear()
@@ -3,20 +3,20 @@ from aiogram.filters import Command
 from aiogram.types import Message, BotCommand
 from aiogram.fsm.context import FSMContext
 from aiogram import Bot
-import requests
-from database.db import BotDatabase
-from settings.config import API_URL, HEADER
+from database.allow_list import allow_list
+from settings.config import API_URL
+from utils import api_client, ApiError
 
 
 start_router = Router()
-db = BotDatabase()
 
 
 async def set_bot_commands(bot: Bot):
     commands = [
         BotCommand(command="setup", description="🔧 Настройка"),
         BotCommand(command='upload', description='📦 Загрузить/Выгрузить'),
-        BotCommand(command='information', description='❗Информация')
+        BotCommand(command='information', description='❗Информация'),
+        BotCommand(command='trend', description='📈 Динамика')
     ]
     await bot.set_my_commands(commands)
 
@@ -30,25 +30,27 @@ async def start_with_token(message: Message, state: FSMContext):
     token = args[1] if len(args) > 1 else None
 
     if token:
-        response = requests.post(
-            f"{API_URL}/telegram/verify-token/",
-            headers=HEADER,
-            data={"token": token, "chat_id": chat_id},
-            verify=False
-        )
+        try:
+            response = await api_client.post(
+                f"{API_URL}/telegram/verify-token/",
+                data={"token": token, "chat_id": chat_id},
+            )
+            data = response.json()
+        except (ApiError, ValueError):
+            await message.answer("❌ Ошибка связи с сервером. Попробуйте позже.")
+            return
 
-        data = response.json()
         if data.get("status") == "success":
             email = data.get("email")
             if not email:
                 await message.answer("❌ Не получили почту от сервера!")
-            db.add_user(chat_id, email, is_allowed=True)
+            await allow_list.add_user(chat_id, email, is_allowed=True)
             await message.answer("✅ Ваш Telegram успешно привязан!")
             await show_menu(message)
         else:
             await message.answer(f"❌ Ошибка: {data.get('error', 'Токен неверный')}")
     else:
-        if not db.is_user_allowed(chat_id):
+        if not await allow_list.is_allowed(chat_id):
             await message.answer("❌ У вас нет доступа к боту.")
         else:
             await show_menu(message)
@@ -61,7 +63,8 @@ async def show_menu(message: Message):
         "Этот бот поможет вам управлять опросами и загружать данные в систему. В меню доступны следующие команды:\n\n"
         "⚙️ */setup* — Настройки опросника.\n"
         "📂 */upload* — Загрузка данных в базу.\n"
-        "ℹ️ */information* — Информация опросникам.\n\n"
+        "ℹ️ */information* — Информация опросникам.\n"
+        "📈 */trend* — Динамика статистики.\n\n"
         "Выберите команду из меню или введите её вручную.",
         parse_mode="Markdown"
     )
@@ -0,0 +1,60 @@
+import logging
+import time
+from aiogram import Router, F
+from aiogram.filters import Command
+from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.fsm.context import FSMContext
+from database.stats_history import stats_history
+from utils.trends import Trends, VIEWS
+from settings.config import TREND_DAYS
+
+
+trend_router = Router()
+logger = logging.getLogger(__name__)
+
+
+@trend_router.message(Command('trend'))
+async def trend(message: Message, state: FSMContext):
+    """Команда /trend: динамика статистики из локальной истории снимков, без запросов к бэкенду."""
+    await state.clear()
+    loading_msg = await message.answer("🔄 Строю графики...")
+    await show_trend(loading_msg, 'mailings', 0)
+
+
+@trend_router.callback_query(F.data.startswith('trend:'))
+async def trend_page(callback: CallbackQuery):
+    """Переключение представления и листание: trend:<представление>:<страница>."""
+    _, view, page = callback.data.split(':')
+    await show_trend(callback.message, view, int(page))
+    await callback.answer()
+
+
+async def show_trend(target: Message, view: str, page: int):
+    now = time.time()
+    since = now - TREND_DAYS * 24 * 3600
+    names, mailing_rows, engineer_rows = await stats_history.get(since)
+    trends = Trends(names, mailing_rows, engineer_rows, since, now)
+    if trends.empty:
+        await target.edit_text("⚠️ Снимков статистики пока нет. Первый появится после запуска планировщика.")
+        return
+
+    text, page, total_pages = trends.render(view, page, TREND_DAYS)
+    try:
+        await target.edit_text(text, parse_mode="HTML", reply_markup=build_trend_keyboard(view, page, total_pages))
+    except TelegramBadRequest as e:
+        if 'message is not modified' not in str(e):
+            raise
+
+
+def build_trend_keyboard(view: str, page: int, total_pages: int) -> InlineKeyboardMarkup:
+    navigation = []
+    if page > 0:
+        navigation.append(InlineKeyboardButton(text="⬅️ Назад", callback_data=f"trend:{view}:{page - 1}"))
+    if page < total_pages - 1:
+        navigation.append(InlineKeyboardButton(text="Вперёд ➡️", callback_data=f"trend:{view}:{page + 1}"))
+    views = [
+        InlineKeyboardButton(text=("• " if view == key else "") + label.capitalize(), callback_data=f"trend:{key}:0")
+        for key, label in VIEWS.items()
+    ]
+    return InlineKeyboardMarkup(inline_keyboard=[row for row in (navigation, views) if row])
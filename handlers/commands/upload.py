@@ -4,14 +4,26 @@ from aiogram.types import Message, CallbackQuery
 from keyboards.inline_keyboards import upload_inline_keyboard
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from utils import read_excel, validate_columns, get_file_stream, get_category_config
-from utils.html_preview import generate_engineers_preview, generate_cases_preview, generate_managers_preview
-import requests
-from settings.config import HEADER
-from io import BytesIO
-from aiogram.types import BufferedInputFile
+from utils import UploadFile, get_category_config, parse_upload, api_client, api_cache, ApiError
+from utils.parse_pool import parse_pool, ParseQueueFull, ParseCancelled
+from utils.api_client import ApiResponse
+from utils.preview_store import preview_store
+from utils.export_cache import export_cache
+from database.fingerprints import fingerprint_store
+from database.upload_history import upload_history
+from utils.parse_cache import parse_cache
+from utils.batch_upload import BatchUpload
+from utils.reports import Report
+from utils.jobs import job_queue, Job
+from utils.html_preview import PREVIEW_BUILDERS
+from settings.config import API_UPLOAD_TIMEOUT, DELTA_UPLOADS
+import asyncio
 from datetime import datetime
+from io import BytesIO
+from typing import BinaryIO
+from multidict import CIMultiDict
 import pandas as pd
+from aiogram.types import FSInputFile
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
 
@@ -56,8 +68,16 @@ async def choose_category(callback: CallbackQuery, state: FSMContext):
     await state.update_data(category=callback.data)
     if callback.data == 'download_xlsx':
         dowload_config = get_category_config(callback.data)
-        await callback.message.answer("⚠️ Скачиваю...")
-        await handle_download_xlsx(callback, dowload_config["url"])
+        status_message = await callback.message.answer("⏳ В очереди...")
+
+        async def run_download(job: Job):
+            job.set_status("⚠️ Скачиваю...")
+            if await handle_download_xlsx(callback, dowload_config["url"]):
+                job.set_status("✅ Выгрузка отправлена")
+            else:
+                job.set_status("❌ Выгрузка не удалась")
+
+        job_queue.submit(callback.data, status_message, run_download)
         return
     else:
         await callback.message.answer(
@@ -68,19 +88,16 @@ async def choose_category(callback: CallbackQuery, state: FSMContext):
         await state.set_state(UploadStates.waiting_for_file)
 
 
-async def handle_download_xlsx(callback: CallbackQuery, url: str):
+async def handle_download_xlsx(callback: CallbackQuery, url: str) -> bool:
     try:
-        response = requests.get(url, headers=HEADER, verify=False)
-        response.raise_for_status()
-
-        file_bytes = BytesIO(response.content)
-        file_bytes.name = f"export_{datetime.now().strftime('%Y-%m-%d')}.xlsx"
-
-        xlsx_file = BufferedInputFile(file_bytes.read(), filename="export.xlsx")
+        path = await export_cache.fetch(url)
+        xlsx_file = FSInputFile(path, filename="export.xlsx")
 
         await callback.message.answer_document(xlsx_file, caption="✅ Финальная выгрузка")
+        return True
     except Exception as e:
         await callback.message.answer(f"❌ Не удалось скачать файл.\nОшибка: {str(e)}")
+        return False
 
 
 @upload_router.message(F.document, UploadStates.waiting_for_file)
@@ -107,56 +124,82 @@ async def handle_file_upload(message: Message, state: FSMContext):
         await message.answer("❌ Неизвестная категория загрузки.")
         return
 
-    file_stream = await get_file_stream(message)
-    file_stream.seek(0)
-    file_bytes = file_stream.read()
-    file_stream.seek(0)
+    upload_file = await UploadFile.download(message)
+    status_message = None
+    try:
+        digest = await get_upload_digest(message.document.file_unique_id, upload_file)
+        # Повторно присланный файл не разбирается заново
+        result = parse_cache.get(digest, category)
+        if result is None:
+            status_message = await message.answer("⏳ Обрабатываю файл...", reply_markup=InlineKeyboardMarkup(inline_keyboard=[
+                [InlineKeyboardButton(text="❌ Не отправлять", callback_data="preview_cancel")]
+            ]))
+            previous = await fingerprint_store.get(category) if config.get('key_column') else None
+            result = await parse_pool.run(chat_id, parse_upload, upload_file.source(), category, previous, DELTA_UPLOADS)
+            await status_message.delete()
+            parse_cache.put(digest, category, result)
+        last_response = await upload_history.get_response(digest, category)
+    except ParseQueueFull:
+        upload_file.close()
+        await status_message.edit_text("⏳ Очередь обработки файлов заполнена. Попробуйте через минуту.")
+        return
+    except ParseCancelled as e:
+        upload_file.close()
+        # Отменённое кнопкой сообщение удаляет обработчик кнопки
+        if e.replaced:
+            await status_message.edit_text("↩️ Заменено новым файлом.")
+        return
+    except BaseException:
+        upload_file.close()
+        raise
 
-    df = read_excel(file_stream)
-    if df is None:
+    if result.get('error') == 'read':
+        upload_file.close()
         await message.answer("❌ Ошибка при чтении Excel-файла.")
         return
 
-    if not validate_columns(df, config['columns']):
-        await message.answer(build_error_message(config['columns']), parse_mode="HTML")
+    if result.get('error') == 'columns':
+        upload_file.close()
+        suggested = result['suggested']
+        markup = None
+        if suggested:
+            markup = InlineKeyboardMarkup(inline_keyboard=[
+                [InlineKeyboardButton(text=f"📂 Выбрать «{categorys[suggested]}»", callback_data=suggested)]
+            ])
+        await message.answer(build_error_message(config['columns'], suggested), parse_mode="HTML", reply_markup=markup)
         return
 
-    if category == 'upload_engineers':
-        preview_html, page, total_pages = generate_engineers_preview(df)
-        markup = InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="Вперёд ➡️", callback_data="preview_next")] if total_pages > 1 else [],
-            [
-                InlineKeyboardButton(text="✅ Отправить", callback_data="preview_send"),
-                InlineKeyboardButton(text="❌ Не отправлять", callback_data="preview_cancel")
-            ]
-        ])
-    elif category == 'upload_cases':
-        preview_html, page, total_pages = generate_cases_preview(df)
-        markup = InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="Вперёд ➡️", callback_data="preview_next")] if total_pages > 1 else [],
-            [
-                InlineKeyboardButton(text="✅ Отправить", callback_data="preview_send"),
-                InlineKeyboardButton(text="❌ Не отправлять", callback_data="preview_cancel")
-            ]
-        ])
-    elif category == 'upload_managers':
-        preview_html, page, total_pages = generate_managers_preview(df)
-        markup = InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="Вперёд ➡️", callback_data="preview_next")] if total_pages > 1 else [],
-            [
-                InlineKeyboardButton(text="✅ Отправить", callback_data="preview_send"),
-                InlineKeyboardButton(text="❌ Не отправлять", callback_data="preview_cancel")
-            ]
-        ])
-    else:
-        await message.answer("⚠️ Началась обработка и загрузка данных в БД.\n\nНеобходимо подождать 👀")
-        response = await upload_xlsx_to_api(file_stream, config['url'])
-        await handle_upload_response(message, response)
+    if result.get('error') == 'rows':
+        upload_file.close()
+        await build_validation_report(result['errors'], result['error_count']).send(message)
+        return
+
+    df = result['preview']
+    delta = result.get('delta')
+    fingerprints = delta['fingerprints'] if delta else None
+    if delta and delta['delta_file']:
+        # Вместо всего файла уйдут только новые и изменённые строки
+        upload_file.close()
+        upload_file = UploadFile(BytesIO(delta['delta_file']))
+
+    build_pages = PREVIEW_BUILDERS.get(category)
+    if build_pages is None:
+        await enqueue_upload(message, category, upload_file, fingerprints, digest)
         await state.clear()
         return
 
-    await state.update_data(df=df.to_dict(), page=page, file_stream=file_bytes, category=category)
-    await message.answer(preview_html, parse_mode="HTML", reply_markup=markup)
+    pages = build_pages(df)
+    summary = []
+    if last_response is not None:
+        summary.append(build_duplicate_warning(*last_response))
+    if delta and delta['compared']:
+        summary.append(build_delta_summary(delta))
+    pages.set_summary("\n".join(summary))
+    duplicate = last_response is not None
+    preview_html, page, total_pages = pages.render(0)
+    upload_id = preview_store.put(category, pages, upload_file, fingerprints, digest, duplicate)
+    await state.update_data(upload_id=upload_id, page=page, category=category)
+    await message.answer(preview_html, parse_mode="HTML", reply_markup=build_preview_markup(page, total_pages, duplicate))
 
 
 @upload_router.callback_query(F.data.startswith("preview_"))
@@ -164,30 +207,40 @@ async def handle_preview_pagination(callback: CallbackQuery, state: FSMContext):
     """Обрабатывает перелистывание страниц, отправку или отмену."""
     action = callback.data.split("_")[1]
     state_data = await state.get_data()
-    df_dict = state_data.get('df')
+    upload_id = state_data.get('upload_id')
+    entry = preview_store.get(upload_id)
     current_page = state_data.get('page', 0)
     message = callback.message
 
-    if not df_dict:
-        await callback.message.edit_text("❌ Данные устарели. Загрузите файл заново.")
+    if action == "cancel":
+        # Отмена возможна и во время разбора файла, когда превью ещё нет
+        parse_pool.cancel(message.chat.id)
+        cancelled = preview_store.pop(upload_id)
+        if cancelled is not None:
+            cancelled.file.close()
+        await callback.message.delete()
+        await callback.message.answer("❌ Отправка данных отменена.")
+        await state.clear()
         return
 
-    df = pd.DataFrame(df_dict)
+    if entry is None:
+        await callback.message.edit_text("❌ Данные устарели. Загрузите файл заново.")
+        await state.clear()
+        return
 
     if action == "send":
+        preview_store.pop(upload_id)
         await callback.message.delete()
-        await callback.message.answer("⚠️ Отправляю данные в БД.\n\nПодождите 👀")
-        config = get_category_config(state_data.get('category'))
-        file_stream = BytesIO(state_data.get('file_stream'))
-        response = await upload_xlsx_to_api(file_stream, config['url'])
-        await handle_upload_response(callback.message, response)
+        await enqueue_upload(callback.message, entry.category, entry.file, entry.fingerprints, entry.digest)
         await state.clear()
         return
 
-    if action == "cancel":
-        await callback.message.delete()
-        await callback.message.answer("❌ Отправка данных отменена.")
-        await state.clear()
+    if action == "last":
+        last_response = await upload_history.get_response(entry.digest, entry.category)
+        if last_response is not None:
+            status_code, content, _ = last_response
+            await handle_upload_response(message, ApiResponse(status_code, '', content, CIMultiDict()))
+        await callback.answer()
         return
 
     if action == "next":
@@ -197,37 +250,104 @@ async def handle_preview_pagination(callback: CallbackQuery, state: FSMContext):
     else:
         new_page = current_page
 
-    if state_data.get('category') == 'upload_engineers':
-        from utils.html_preview import generate_engineers_preview
-        preview_html, page, total_pages = generate_engineers_preview(df, new_page)
-    elif state_data.get('category') == 'upload_cases':
-        preview_html, page, total_pages = generate_cases_preview(df, new_page)
-    elif state_data.get('category') == 'upload_managers':
-        preview_html, page, total_pages = generate_managers_preview(df, new_page)
-    else:
-        preview_html, page, total_pages = generate_engineers_preview(df, new_page)
+    preview_html, page, total_pages = entry.preview.render(new_page)
+    await message.edit_text(preview_html, parse_mode="HTML", reply_markup=build_preview_markup(page, total_pages, entry.duplicate))
+    await state.update_data(page=page)
+
 
+def build_preview_markup(page: int, total_pages: int, duplicate: bool = False) -> InlineKeyboardMarkup:
     markup = InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="Вперёд ➡️", callback_data="preview_next")] if total_pages > 1 and page < total_pages - 1 else [],
-            [
-                InlineKeyboardButton(text="✅ Отправить", callback_data="preview_send"),
-                InlineKeyboardButton(text="❌ Не отправлять", callback_data="preview_cancel")
-            ]
-        ])
+        [InlineKeyboardButton(text="Вперёд ➡️", callback_data="preview_next")] if page < total_pages - 1 else [],
+        [
+            InlineKeyboardButton(text="🔁 Отправить повторно" if duplicate else "✅ Отправить", callback_data="preview_send"),
+            InlineKeyboardButton(text="❌ Не отправлять", callback_data="preview_cancel")
+        ]
+    ])
     if page > 0:
         markup.inline_keyboard.insert(0, [InlineKeyboardButton(text="⬅️ Назад", callback_data="preview_prev")])
+    if duplicate:
+        markup.inline_keyboard.append([InlineKeyboardButton(text="📄 Прошлый ответ сервера", callback_data="preview_last")])
+    return markup
+
+
+async def get_upload_digest(file_unique_id: str, upload_file: UploadFile) -> str:
+    """sha256 документа: для уже встречавшегося file_unique_id берётся из истории, иначе считается в отдельном потоке."""
+    digest = await upload_history.get_digest(file_unique_id)
+    if digest is None:
+        digest = await asyncio.to_thread(upload_file.digest)
+        await upload_history.put_digest(file_unique_id, digest)
+    return digest
+
+
+async def enqueue_upload(message: Message, category: str, upload_file: UploadFile,
+                         fingerprints: pd.Series | None = None, digest: str | None = None):
+    """
+    Ставит загрузку файла в фоновую очередь; ход загрузки виден в одном статусном сообщении.
+    Задача забирает upload_file себе и закрывает его после отправки.
+    Отпечатки строк сохраняются, только если бэкенд принял файл полностью (201);
+    ответ бэкенда запоминается по digest, чтобы показать его при повторной отправке того же файла.
+    """
+    status_message = await message.answer("⏳ В очереди...")
+    config = get_category_config(category)
+    url = config['url']
 
-    await message.edit_text(preview_html, parse_mode="HTML", reply_markup=markup)
-    await state.update_data(page=page)
+    async def run_upload(job: Job):
+        try:
+            await send_upload(job)
+        finally:
+            upload_file.close()
+
+    async def send_upload(job: Job):
+        size = upload_file.size or 1
+        sent = 0
+
+        def on_sent(chunk_size: int):
+            nonlocal sent
+            sent += chunk_size
+            if sent >= size:
+                job.set_status("🧮 Сервер обрабатывает данные...")
+            else:
+                job.set_status(f"📤 Загрузка файла: {sent * 100 // size}%")
 
+        def on_batch(done: int, total: int):
+            job.set_status(f"📤 Загружено пакетов: {done} из {total}")
 
-async def upload_xlsx_to_api(file_stream: BytesIO, url: str) -> requests.Response:
-    file_stream.seek(0)
-    return requests.post(
+        job.set_status("📤 Загрузка файла...")
+        try:
+            if config.get('batch_size'):
+                response = await BatchUpload(url, config['batch_size']).run(upload_file, on_progress=on_batch)
+            else:
+                response = await upload_xlsx_to_api(upload_file.open(), url, progress=on_sent)
+        except ApiError as e:
+            job.set_status(f"❌ Ошибка связи с сервером: {str(e)}")
+            return
+        except ParseQueueFull:
+            job.set_status("❌ Очередь разбора файлов переполнена. Попробуйте позже.")
+            return
+        except ParseCancelled:
+            job.set_status("❌ Разбиение файла на пакеты отменено.")
+            return
+        # Новые инженеры и кейсы меняют статистику, в том числе в карточках рассылок
+        await api_cache.invalidate('/stats/', '/mailing/')
+        if fingerprints is not None and response.status_code == 201:
+            await fingerprint_store.put(category, fingerprints)
+            # Сводки изменений в закэшированных разборах посчитаны от прежних отпечатков
+            parse_cache.discard_category(category)
+        if digest is not None:
+            await upload_history.put_response(digest, category, response.status_code, response.content)
+        await handle_upload_response(message, response)
+        job.set_status("✅ Готово")
+
+    job_queue.submit(category, status_message, run_upload)
+
+
+async def upload_xlsx_to_api(file_stream: BinaryIO, url: str, progress=None) -> ApiResponse:
+    """Отправляет файл multipart-запросом; тело читается из потока кусками, без копии в памяти."""
+    return await api_client.post(
         url,
-        headers=HEADER,
         files={'file': ('uploaded_file.xlsx', file_stream, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')},
-        verify=False
+        timeout=API_UPLOAD_TIMEOUT,
+        progress=progress
     )
 
 
@@ -238,58 +358,79 @@ async def handle_upload_response(message, response):
         await message.answer("❌ Ошибка сервера. Попробуйте позже.", parse_mode="Markdown")
         return
 
-    msg = ""
+    report = Report(filename='upload_report.csv')
     if response.status_code == 201:
-        msg = f"✅ {data.get('message', 'Файл успешно загружен!')}\n"
+        report.line(f"✅ {data.get('message', 'Файл успешно загружен!')}")
         new_users = data.get("new_users")
         if new_users:
-            msg += "\n👥 *Добавлены пользователи:*\n"
-            for user in new_users:
-                first_name = str(user.get("first_name", "")).strip()
-                last_name = str(user.get("last_name", "")).strip()
-                email = user.get("email", "—")
-                msg += f"- {last_name} {first_name} – {email}\n"
+            report.section("\n👥 *Добавлены пользователи:*", (
+                f"- {str(user.get('last_name', '')).strip()} {str(user.get('first_name', '')).strip()} – "
+                f"{user.get('email', '—')}"
+                for user in new_users
+            ))
     elif response.status_code == 207:
-        msg = f"⚠️ {data.get('message', 'Частичная загрузка')}\n"
+        report.line(f"⚠️ {data.get('message', 'Частичная загрузка')}")
         missing_users = data.get("missing_users")
         missing_actives = data.get("activities_without_cases")
         if missing_users:
-            msg += "\n❌ *Пользователи с кейсами, но без УЗ:*\n"
-            for user in missing_users:
-                msg += f"- {user}\n"
+            report.section("\n❌ *Пользователи с кейсами, но без УЗ:*", (f"- {user}" for user in missing_users))
         serialization_errors = data.get("serialization_errors")
         if serialization_errors:
-            msg += "\n❌ *Ошибки валидации кейсов:*\n"
-            for error in serialization_errors:
-                msg += f"- Строка {error['row']}: {error['errors']}\n"
+            report.section("\n❌ *Ошибки валидации кейсов:*", (
+                f"- Строка {error['row']}: {error['errors']}" for error in serialization_errors
+            ))
         if missing_actives:
-            msg += "\n❌ *Проекты по которым нет кейсов:*\n"
-            for active in missing_actives:
-                msg += f"{active}\n"
+            report.section("\n❌ *Проекты по которым нет кейсов:*", missing_actives)
+        failed_batches = data.get("failed_batches")
+        if failed_batches:
+            report.section("\n❌ *Не загружены пакеты:*", (f"- {batch}" for batch in failed_batches))
     elif response.status_code == 400:
-        msg = "❌ *Ошибки загрузки:*\n"
         errors = data if isinstance(data, dict) else {"error": "Ошибка валидации."}
-        for field, messages in errors.items():
-            if isinstance(messages, list):
-                for m in messages:
-                    msg += f"- *{field}*: {m}\n"
-            else:
-                msg += f"- *{field}*: {messages}\n"
+        report.section("❌ *Ошибки загрузки:*", (
+            f"- *{field}*: {m}"
+            for field, messages in errors.items()
+            for m in (messages if isinstance(messages, list) else [messages])
+        ))
     else:
         error = data.get("error", f"Неизвестная ошибка ({response.status_code})")
-        msg = f"❌ {error}"
+        report.line(f"❌ {error}")
 
-    await message.answer(msg,)
+    await report.send(message)
 
-def build_error_message(columns: list[str]) -> str:
-    return (
-        "❌ Ошибка! Проверьте файл, он должен содержать следующие столбцы:\n\n"
-        + ", ".join(columns)
-    )
+def build_duplicate_warning(status_code: int, content: bytes, uploaded_at: float) -> str:
+    outcome = {
+        201: "принят полностью",
+        207: "принят частично",
+        400: "отклонён",
+    }.get(status_code, f"ошибка сервера ({status_code})")
+    when = datetime.fromtimestamp(uploaded_at).strftime('%d.%m.%Y %H:%M')
+    return f"⚠️ Этот файл уже отправлялся {when}: {outcome}"
+
+
+def build_delta_summary(delta: dict) -> str:
+    if not (delta['new'] or delta['changed'] or delta['removed']):
+        return "🟰 С прошлой загрузки ничего не изменилось"
+    summary = f"🆕 Новых: {delta['new']} · ✏️ Изменено: {delta['changed']} · 🗑 Удалено: {delta['removed']}"
+    if delta['delta_file']:
+        summary += "\n📤 Будут отправлены только новые и изменённые строки"
+    return summary
+
+
+def build_validation_report(errors: list[dict], error_count: int) -> Report:
+    report = Report(filename='validation_errors.csv')
+    report.line(f"❌ Файл не отправлен: ошибки в строках ({error_count}).")
+    report.section("\nСтроки с ошибками:", (f"- Строка {error['row']}: {error['errors']}" for error in errors))
+    if error_count > len(errors):
+        report.line(f"… и ещё строк с ошибками: {error_count - len(errors)}")
+    report.line("\n🔄 Исправьте файл и отправьте его заново.")
+    return report
 
 
-def build_error_message(columns: list[str]) -> str:
-    return (
+def build_error_message(columns: list[str], suggested: str | None = None) -> str:
+    message = (
         "❌ Ошибка! Проверьте файл, он должен содержать следующие столбцы:\n\n"
         + ", ".join(columns)
     )
+    if suggested:
+        message += f"\n\n💡 Похоже, это файл категории <b>{categorys[suggested]}</b>. Выберите её и отправьте файл заново."
+    return message
@@ -1,26 +1,80 @@
 from aiogram import Bot, Dispatcher
-from aiogram import Dispatcher
 import asyncio
-from settings.config import BOT_TOKEN
-from handlers.commands import start, setup, upload, information, mailing
+import logging
+from settings.config import BOT_TOKEN, LOG_LEVEL, BOT_MODE, CLUSTERED, MAILING_EVENTS_SECRET
+from handlers.commands import start, setup, upload, information, mailing, trend
 from handlers.commands.start import set_bot_commands
 from middlewares.access import AccessMiddleware
+from middlewares.rate_limit import rate_limiter
+from utils import api_client
+from database import db
+from database.allow_list import allow_list
+from database.fsm_storage import SQLiteStorage
+from utils.jobs import job_queue
+from utils.parse_pool import parse_pool
+from utils.export_cache import export_cache
+from utils.stats_snapshots import stats_snapshotter
+from server import run_webhook, run_cluster, start_events_server
 
 
-async def main():
-    bot = Bot(token=BOT_TOKEN)
-    dp = Dispatcher()
+async def on_startup():
+    allow_list.load()
+    await job_queue.start()
+    # В кластере снимки снимает фронт, а не каждый воркер
+    if not CLUSTERED:
+        await stats_snapshotter.start()
+
+
+async def on_shutdown():
+    await job_queue.stop()
+    await stats_snapshotter.stop()
+    await api_client.close()
+    parse_pool.shutdown()
+    export_cache.close()
+
+
+def build_dispatcher() -> Dispatcher:
+    dp = Dispatcher(storage=SQLiteStorage(db))
 
     dp.include_router(start.start_router)
     dp.include_router(setup.setup_router)
     dp.include_router(upload.upload_router)
     dp.include_router(information.information_router)
     dp.include_router(mailing.mailing_router)
+    dp.include_router(trend.trend_router)
 
     dp.message.middleware(AccessMiddleware())
+    dp.startup.register(on_startup)
+    dp.shutdown.register(on_shutdown)
+    return dp
+
+
+async def main():
+    if CLUSTERED:
+        await run_cluster(build_dispatcher)
+        return
+
+    bot = Bot(token=BOT_TOKEN)
+    bot.session.middleware(rate_limiter)
+    dp = build_dispatcher()
 
     await set_bot_commands(bot)
-    await dp.start_polling(bot)
+    try:
+        if BOT_MODE == 'webhook':
+            await run_webhook(dp, bot)
+        else:
+            # Вебхука нет, поэтому для событий рассылок поднимается свой сервер
+            events_server = await start_events_server(bot) if MAILING_EVENTS_SECRET else None
+            try:
+                # Вебхук, оставшийся от запуска в режиме webhook, не даёт получать апдейты через getUpdates
+                await bot.delete_webhook()
+                await dp.start_polling(bot)
+            finally:
+                if events_server is not None:
+                    await events_server.cleanup()
+    finally:
+        db.close()
 
 if __name__ == "__main__":
+    logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
     asyncio.run(main())
@@ -1,8 +1,6 @@
 from aiogram import types
 from aiogram.dispatcher.middlewares.base import BaseMiddleware
-from database.db import BotDatabase
-
-db = BotDatabase()
+from database.allow_list import allow_list
 
 
 class AccessMiddleware(BaseMiddleware):
@@ -14,8 +12,8 @@ class AccessMiddleware(BaseMiddleware):
             if event.text and event.text.startswith('/start'):
                 return await handler(event, data)
  
-            if not db.is_user_allowed(chat_id):
+            if not await allow_list.is_allowed(chat_id):
                 await event.answer("❌ У вас нет доступа к боту.")
                 return
 
-        return await handler(event, data)
\ No newline at end of file
+        return await handler(event, data)
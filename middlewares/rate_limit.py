@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import time
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import EditMessageText, TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+from settings.config import (
+    TG_GLOBAL_RATE, TG_CHAT_RATE, TG_CHAT_BURST, TG_MAX_RETRIES, TG_CHAT_BUCKETS, BOT_WORKERS, CLUSTERED
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Асинхронный token bucket: rate токенов в секунду, не больше capacity в запасе.
+    Ожидающие обслуживаются по очереди; block() приостанавливает выдачу (flood control Telegram).
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.waiting = 0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        self.waiting += 1
+        try:
+            async with self._lock:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    delay = max(self.blocked_until - now, (1 - self.tokens) / self.rate)
+                    if delay <= 0:
+                        self.tokens -= 1
+                        return
+                    await asyncio.sleep(delay)
+        finally:
+            self.waiting -= 1
+
+    def block(self, seconds: float):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    @property
+    def idle(self) -> bool:
+        now = time.monotonic()
+        self._refill(now)
+        return not self.waiting and self.tokens >= self.capacity and self.blocked_until <= now
+
+
+class PendingEdit:
+    """
+    Ожидающее отправки редактирование сообщения; более поздние правки подменяют method.
+    Отправка идёт в отдельной задаче task, которую ждут waiters вызвавших.
+    """
+
+    def __init__(self, method: EditMessageText):
+        self.method = method
+        self.task: asyncio.Task | None = None
+        self.waiters = 0
+
+
+class RateLimitMiddleware(BaseRequestMiddleware):
+    """
+    Все исходящие запросы бота в чаты проходят через общий и поочередной token bucket.
+    Запросы без chat_id (getMe, setWebhook, answerCallbackQuery и т.п.) идут мимо лимитера.
+    На TelegramRetryAfter на паузу ставится только очередь этого чата, и запрос повторяется.
+    Несколько edit_text одного сообщения, ждущих очереди, схлопываются в один запрос с последним текстом;
+    все вызвавшие получают его результат. Отмена одного из них не мешает остальным,
+    запрос отменяется, только когда отменены все ждущие его.
+    """
+
+    def __init__(self, global_rate: float = TG_GLOBAL_RATE, chat_rate: float = TG_CHAT_RATE,
+                 chat_burst: float = TG_CHAT_BURST, max_retries: int = TG_MAX_RETRIES,
+                 max_chat_buckets: int = TG_CHAT_BUCKETS):
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.max_chat_buckets = max_chat_buckets
+        self._chat_buckets: dict[int | str, TokenBucket] = {}
+        self._pending_edits: dict[tuple, PendingEdit] = {}
+        self.coalesced = 0
+        self.retry_after = 0
+
+    def _chat_bucket(self, chat_id: int | str) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self._chat_buckets) >= self.max_chat_buckets:
+                self._chat_buckets = {key: value for key, value in self._chat_buckets.items() if not value.idle}
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    async def __call__(self, make_request: NextRequestMiddlewareType[TelegramType], bot: Bot,
+                       method: TelegramMethod[TelegramType]) -> Response[TelegramType]:
+        chat_id = getattr(method, 'chat_id', None)
+        if chat_id is None:
+            return await make_request(bot, method)
+
+        if isinstance(method, EditMessageText) and method.message_id is not None:
+            key = (chat_id, method.message_id)
+            pending = self._pending_edits.get(key)
+            if pending is not None:
+                pending.method = method
+                self.coalesced += 1
+            else:
+                pending = self._pending_edits[key] = PendingEdit(method)
+                pending.task = asyncio.create_task(self._send_edit(make_request, bot, key, pending))
+            pending.waiters += 1
+            try:
+                return await asyncio.shield(pending.task)
+            finally:
+                pending.waiters -= 1
+                if not pending.waiters and not pending.task.done():
+                    pending.task.cancel()
+
+        return await self._send(make_request, bot, method, chat_id)
+
+    async def _send_edit(self, make_request, bot: Bot, key: tuple, pending: PendingEdit):
+        chat_id = key[0]
+        try:
+            await self._acquire(chat_id)
+        finally:
+            # Правки, пришедшие после получения токена, ждут уже следующего запроса
+            del self._pending_edits[key]
+        return await self._send(make_request, bot, pending.method, chat_id, acquired=True)
+
+    async def _acquire(self, chat_id: int | str):
+        await self._chat_bucket(chat_id).acquire()
+        await self.global_bucket.acquire()
+
+    async def _send(self, make_request, bot: Bot, method: TelegramMethod, chat_id: int | str, acquired: bool = False):
+        for attempt in range(self.max_retries + 1):
+            if not acquired:
+                await self._acquire(chat_id)
+            acquired = False
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                if attempt == self.max_retries:
+                    raise
+                self.retry_after += 1
+                logger.warning("Flood control в чате %s: пауза %s с", chat_id, e.retry_after)
+                self._chat_bucket(chat_id).block(e.retry_after)
+
+    def stats(self) -> dict:
+        return {
+            'global_waiting': self.global_bucket.waiting,
+            'chat_waiting': sum(bucket.waiting for bucket in self._chat_buckets.values()),
+            'chats': len(self._chat_buckets),
+            'pending_edits': len(self._pending_edits),
+            'coalesced_edits': self.coalesced,
+            'retry_after': self.retry_after,
+        }
+
+
+# В кластере у каждого воркера свой лимитер, общий лимит бота делится между ними
+rate_limiter = RateLimitMiddleware(
+    global_rate=TG_GLOBAL_RATE / BOT_WORKERS if CLUSTERED else TG_GLOBAL_RATE
+)
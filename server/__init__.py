@@ -0,0 +1,10 @@
+from .webhook import build_webhook_app, run_webhook, start_events_server
+from .cluster import run_cluster
+
+
+__all__ = [
+    'build_webhook_app',
+    'run_webhook',
+    'start_events_server',
+    'run_cluster'
+]
@@ -0,0 +1,175 @@
+import asyncio
+import json
+import logging
+import multiprocessing
+import time
+import aiohttp
+from aiohttp import web
+from aiogram import Bot
+from database import db
+from handlers.commands.start import set_bot_commands
+from middlewares.rate_limit import rate_limiter
+from server.mailing_events import MailingEventsReceiver
+from server.webhook import build_webhook_app, serve, webhook_url
+from utils import api_client
+from utils.stats_snapshots import stats_snapshotter
+from settings.config import (
+    BOT_TOKEN, LOG_LEVEL, BOT_WORKERS, WORKER_BASE_PORT, WEBHOOK_PATH, WEBHOOK_SECRET, WEBAPP_HOST, WEBAPP_PORT,
+    HEALTH_PATH, MAILING_EVENTS_SECRET
+)
+
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+# Сколько ждать штатного завершения воркеров перед SIGKILL
+WORKER_STOP_TIMEOUT = 10
+
+
+def update_chat_id(update: dict) -> int:
+    """chat_id апдейта (для inline-запросов без чата — id пользователя), 0 если не найден."""
+    for value in update.values():
+        if not isinstance(value, dict):
+            continue
+        chat = value.get('chat') or (value.get('message') or {}).get('chat')
+        if chat:
+            return chat['id']
+        user = value.get('from') or value.get('user')
+        if user:
+            return user['id']
+    return 0
+
+
+def worker_main(port: int, build_dispatcher):
+    """Точка входа процесса-воркера: свой бот и диспетчер за локальным вебхуком."""
+    logging.basicConfig(level=LOG_LEVEL, format=f"%(asctime)s %(levelname)s worker:{port} %(name)s: %(message)s")
+    asyncio.run(run_worker(port, build_dispatcher))
+
+
+async def run_worker(port: int, build_dispatcher):
+    bot = Bot(token=BOT_TOKEN)
+    bot.session.middleware(rate_limiter)
+    dp = build_dispatcher()
+    try:
+        await serve(build_webhook_app(dp, bot), '127.0.0.1', port)
+    finally:
+        db.close()
+
+
+class UpdateRouter:
+    """
+    Фронт кластера: принимает вебхук Telegram и пересылает апдейт воркеру по chat_id.
+    Один чат всегда попадает в один процесс, поэтому его FSM, превью и кэши остаются согласованными.
+    """
+
+    def __init__(self, ports: list[int]):
+        self.ports = ports
+        self._session: aiohttp.ClientSession | None = None
+
+    def worker_port(self, update: dict) -> int:
+        return self.ports[update_chat_id(update) % len(self.ports)]
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if request.headers.get(SECRET_HEADER) != WEBHOOK_SECRET:
+            return web.Response(status=401)
+        body = await request.read()
+        try:
+            update = json.loads(body)
+        except ValueError:
+            return web.Response(status=400)
+        if not isinstance(update, dict):
+            return web.Response(status=400)
+        port = self.worker_port(update)
+        if self._session is None:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10))
+        headers = {'Content-Type': 'application/json', SECRET_HEADER: WEBHOOK_SECRET}
+        try:
+            async with self._session.post(f"http://127.0.0.1:{port}{WEBHOOK_PATH}", data=body, headers=headers) as response:
+                return web.Response(status=response.status)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            logger.exception("Воркер на порту %s недоступен", port)
+            # Telegram повторит доставку апдейта
+            return web.Response(status=502)
+
+    async def close(self, app: web.Application = None):
+        if self._session is not None:
+            await self._session.close()
+
+
+def stop_workers(workers: list, timeout: float = WORKER_STOP_TIMEOUT):
+    """
+    Воркеры не демонические (им нужны свои дочерние процессы для разбора файлов), поэтому фронт
+    останавливает их сам: SIGTERM для штатного завершения, по истечении timeout — SIGKILL.
+    """
+    workers = [worker for worker in workers if worker.pid is not None]
+    for worker in workers:
+        if worker.is_alive():
+            worker.terminate()
+    deadline = time.monotonic() + timeout
+    for worker in workers:
+        worker.join(timeout=max(0.0, deadline - time.monotonic()))
+    for worker in workers:
+        if worker.is_alive():
+            logger.warning("Воркер %s не завершился за %s с, принудительная остановка", worker.name, timeout)
+            worker.kill()
+            worker.join()
+
+
+async def run_cluster(build_dispatcher):
+    """
+    Запускает BOT_WORKERS процессов-воркеров и фронт на WEBAPP_PORT.
+    Общее состояние (пользователи, FSM, счётчики сброса кэшей) живёт в SQLite бота, доступной всем процессам.
+    Очередь фоновых задач у каждого воркера своя: порядок загрузок CATEGORY_ORDER соблюдается в пределах воркера.
+    Воркеры запускаются не демоническими, чтобы в них работал пул процессов разбора файлов;
+    при любом выходе фронт останавливает их через stop_workers.
+    Снимки статистики для /trend снимает фронт, чтобы бэкенд не опрашивался каждым воркером;
+    он же принимает события рассылок — их состояние в SQLite видят все воркеры.
+    """
+    url = webhook_url()
+    # Фронт сам апдейты не обрабатывает, диспетчер нужен только для списка типов, на которые есть обработчики
+    allowed_updates = build_dispatcher().resolve_used_update_types()
+    context = multiprocessing.get_context('spawn')
+    ports = [WORKER_BASE_PORT + index for index in range(BOT_WORKERS)]
+    workers = [
+        context.Process(target=worker_main, args=(port, build_dispatcher), name=f'bot-worker-{port}')
+        for port in ports
+    ]
+    try:
+        for worker in workers:
+            worker.start()
+        await serve_front(workers, ports, url, allowed_updates)
+    finally:
+        stop_workers(workers)
+        db.close()
+
+
+async def serve_front(workers: list, ports: list[int], url: str, allowed_updates: list[str]):
+    """Фронт кластера: приём вебхука, health по воркерам, события рассылок и снимки статистики."""
+    async def health(request: web.Request) -> web.Response:
+        alive = [worker.is_alive() for worker in workers]
+        return web.json_response({'status': 'ok' if all(alive) else 'degraded', 'workers': alive},
+                                 status=200 if all(alive) else 503)
+
+    router = UpdateRouter(ports)
+    app = web.Application()
+    app.router.add_post(WEBHOOK_PATH, router.handle)
+    app.router.add_get(HEALTH_PATH, health)
+    app.on_shutdown.append(router.close)
+
+    bot = Bot(token=BOT_TOKEN)
+    bot.session.middleware(rate_limiter)
+    if MAILING_EVENTS_SECRET:
+        MailingEventsReceiver(bot).register(app)
+
+    async def register_webhook():
+        await set_bot_commands(bot)
+        await bot.set_webhook(url, secret_token=WEBHOOK_SECRET, allowed_updates=allowed_updates)
+        await bot.session.close()
+        await stats_snapshotter.start()
+
+    try:
+        await serve(app, WEBAPP_HOST, WEBAPP_PORT, register_webhook)
+    finally:
+        await stats_snapshotter.stop()
+        await api_client.close()
+        await bot.session.close()
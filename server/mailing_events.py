@@ -0,0 +1,120 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import time
+from datetime import datetime
+from aiohttp import web
+from aiogram import Bot
+from database.mailing_events import MailingEvents, mailing_events, TASK_STATUSES, TASK_STATUS_EMOJI
+from settings.config import MAILING_EVENTS_PATH, MAILING_EVENTS_SECRET, MAILING_EVENTS_NOTIFY, MAILING_EVENTS_MAX_AGE
+
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = 'X-Signature'
+TIMESTAMP_HEADER = 'X-Timestamp'
+# Уведомление создателю уходит только о завершении задачи
+NOTIFY_STATUSES = {'SUCCESS', 'FAILURE', 'SKIPPED'}
+
+
+def parse_event(item: dict, signed_at: float) -> dict:
+    """
+    Проверяет событие бэкенда; бросает ValueError/KeyError/TypeError на неверных данных.
+    Без updated_at временем события считается подписанное время запроса: повтор перехваченного
+    запроса не окажется новее уже сохранённого статуса.
+    """
+    status = item['status']
+    if status not in TASK_STATUSES:
+        raise ValueError(f"Неизвестный статус {status!r}")
+    scheduled_date = item['scheduled_date']
+    datetime.strptime(scheduled_date, "%Y-%m-%d")
+    updated_at = item.get('updated_at')
+    if updated_at is None:
+        updated_at = signed_at
+    elif isinstance(updated_at, str):
+        updated_at = datetime.fromisoformat(updated_at).timestamp()
+    chat_id = item.get('chat_id')
+    return {
+        'mailing_id': int(item['mailing_id']),
+        'scheduled_date': scheduled_date,
+        'task_name': str(item['task_name']),
+        'status': status,
+        'updated_at': float(updated_at),
+        'chat_id': int(chat_id) if chat_id is not None else None,
+    }
+
+
+class MailingEventsReceiver:
+    """
+    Приём событий задач рассылок от бэкенда: POST на MAILING_EVENTS_PATH с одним событием или списком.
+    Бэкенд подписывает HMAC-SHA256 общим секретом строку "<X-Timestamp>." + тело, подпись — в заголовке
+    X-Signature: sha256=<hex>. Запросы со временем, отличающимся от текущего больше чем на max_age, отклоняются,
+    поэтому перехваченный запрос нельзя повторить позже.
+    Изменившиеся статусы пишутся в mailing_events, о завершённых задачах уведомляется создатель рассылки.
+    """
+
+    def __init__(self, bot: Bot | None, secret: str | None = MAILING_EVENTS_SECRET,
+                 notify: bool = MAILING_EVENTS_NOTIFY, events: MailingEvents = mailing_events,
+                 max_age: float = MAILING_EVENTS_MAX_AGE):
+        self.bot = bot
+        self.secret = secret
+        self.max_age = max_age
+        self.notify = notify
+        self.events = events
+        self._notifications: set[asyncio.Task] = set()
+
+    def register(self, app: web.Application):
+        app.router.add_post(MAILING_EVENTS_PATH, self.handle)
+
+    def _signed_at(self, request: web.Request, body: bytes) -> float | None:
+        """Подписанное время запроса или None, если подпись неверна либо время вне окна max_age."""
+        timestamp = request.headers.get(TIMESTAMP_HEADER, '')
+        message = timestamp.encode() + b'.' + body
+        expected = 'sha256=' + hmac.new(self.secret.encode(), message, hashlib.sha256).hexdigest()
+        if not hmac.compare_digest(expected, request.headers.get(SIGNATURE_HEADER, '')):
+            return None
+        try:
+            signed_at = float(timestamp)
+        except ValueError:
+            return None
+        return signed_at if abs(time.time() - signed_at) <= self.max_age else None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        body = await request.read()
+        signed_at = self._signed_at(request, body)
+        if signed_at is None:
+            return web.Response(status=401)
+        try:
+            payload = json.loads(body)
+            items = payload if isinstance(payload, list) else [payload]
+            events = [parse_event(item, signed_at) for item in items]
+        except (ValueError, KeyError, TypeError) as e:
+            return web.json_response({'error': str(e)}, status=400)
+
+        changed = await self.events.put(events)
+        if self.notify and self.bot is not None:
+            for event in changed:
+                if event['status'] in NOTIFY_STATUSES:
+                    # Ответ бэкенду не ждёт Telegram
+                    task = asyncio.create_task(self._notify(event))
+                    self._notifications.add(task)
+                    task.add_done_callback(self._notifications.discard)
+        return web.json_response({'accepted': len(events), 'changed': len(changed)})
+
+    async def _notify(self, event: dict):
+        chat_id = event['chat_id'] or await self.events.get_owner(event['mailing_id'])
+        if chat_id is None:
+            return
+        status = event['status']
+        date_formated = datetime.strptime(event['scheduled_date'], "%Y-%m-%d").strftime("%d.%m.%Y")
+        text = (f"📬 Рассылка №{event['mailing_id']}, {date_formated}: "
+                f"{TASK_STATUS_EMOJI.get(status, '⚪')} {TASK_STATUSES[status]}")
+        if event['task_name'] != 'send_emails':
+            text += f" ({event['task_name']})"
+        try:
+            await self.bot.send_message(chat_id, text)
+        except Exception:
+            logger.warning("Не удалось уведомить чат %s о рассылке %s", chat_id, event['mailing_id'], exc_info=True)
+
@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import signal
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from database.allow_list import allow_list
+from middlewares.rate_limit import rate_limiter
+from server.mailing_events import MailingEventsReceiver
+from utils import api_cache
+from utils.jobs import job_queue
+from utils.parse_pool import parse_pool
+from settings.config import (
+    WEBHOOK_BASE_URL, WEBHOOK_PATH, WEBHOOK_SECRET, WEBAPP_HOST, WEBAPP_PORT, HEALTH_PATH, MAILING_EVENTS_SECRET
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+async def health(request: web.Request) -> web.Response:
+    return web.json_response({
+        'status': 'ok',
+        'jobs': job_queue.size,
+        'parsing': parse_pool.size,
+        'allow_list': allow_list.stats(),
+        'api_cache': api_cache.stats(),
+        'telegram': rate_limiter.stats(),
+    })
+
+
+def build_webhook_app(dp: Dispatcher, bot: Bot) -> web.Application:
+    """aiohttp-приложение: приём апдейтов Telegram с проверкой секрета и health-эндпоинт."""
+    app = web.Application()
+    app.router.add_get(HEALTH_PATH, health)
+    SimpleRequestHandler(dispatcher=dp, bot=bot, secret_token=WEBHOOK_SECRET).register(app, path=WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+async def start_events_server(bot: Bot) -> web.AppRunner:
+    """Режим polling: отдельный сервер только с приёмом событий рассылок и health-эндпоинтом."""
+    app = web.Application()
+    app.router.add_get(HEALTH_PATH, health)
+    MailingEventsReceiver(bot).register(app)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, WEBAPP_HOST, WEBAPP_PORT).start()
+    logger.info("Приём событий рассылок слушает %s:%s", WEBAPP_HOST, WEBAPP_PORT)
+    return runner
+
+
+async def wait_for_stop_signal():
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+
+
+async def serve(app: web.Application, host: str, port: int, on_started=None):
+    """Запускает aiohttp-приложение и держит его до SIGINT/SIGTERM, затем корректно останавливает."""
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    try:
+        if on_started is not None:
+            await on_started()
+        logger.info("Сервер слушает %s:%s", host, port)
+        await wait_for_stop_signal()
+    finally:
+        # on_shutdown приложения останавливает диспетчер и закрывает сессию бота
+        await runner.cleanup()
+
+
+def webhook_url() -> str:
+    if not WEBHOOK_BASE_URL:
+        raise RuntimeError("Для BOT_MODE=webhook нужно задать WEBHOOK_BASE_URL")
+    # Без секрета вебхук принял бы апдейт от любого, кто достучится до порта
+    if not WEBHOOK_SECRET:
+        raise RuntimeError("Для BOT_MODE=webhook нужно задать WEBHOOK_SECRET")
+    return f"{WEBHOOK_BASE_URL.rstrip('/')}{WEBHOOK_PATH}"
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot):
+    """Поднимает веб-сервер, регистрирует вебхук и работает до SIGINT/SIGTERM."""
+    url = webhook_url()
+    app = build_webhook_app(dp, bot)
+    if MAILING_EVENTS_SECRET:
+        MailingEventsReceiver(bot).register(app)
+
+    async def register_webhook():
+        await bot.set_webhook(url, secret_token=WEBHOOK_SECRET, allowed_updates=dp.resolve_used_update_types())
+
+    await serve(app, WEBAPP_HOST, WEBAPP_PORT, register_webhook)
@@ -11,3 +11,106 @@ URL_WEB_SITE = getenv('URL_WEB_SITE')
 HEADER = {
     "Authorization": f"Bearer {JWT_TOKEN}"
 }
+LOG_LEVEL = getenv('LOG_LEVEL', 'INFO')
+
+# Backend client
+API_TIMEOUT = float(getenv('API_TIMEOUT', 30))
+API_UPLOAD_TIMEOUT = float(getenv('API_UPLOAD_TIMEOUT', 300))
+API_POOL_SIZE = int(getenv('API_POOL_SIZE', 20))
+
+# Access
+ALLOW_LIST_TTL = float(getenv('ALLOW_LIST_TTL', 0))
+
+# Uploads
+EXCEL_CHUNK_SIZE = int(getenv('EXCEL_CHUNK_SIZE', 5000))
+PREVIEW_TTL = float(getenv('PREVIEW_TTL', 1800))
+PREVIEW_MAX_ENTRIES = int(getenv('PREVIEW_MAX_ENTRIES', 50))
+# Files larger than this (bytes) are downloaded to a temp file instead of memory
+UPLOAD_SPOOL_THRESHOLD = int(getenv('UPLOAD_SPOOL_THRESHOLD', 5 * 1024 * 1024))
+UPLOAD_TMP_DIR = getenv('UPLOAD_TMP_DIR') or None
+# Local validation of case files. The allowed Приоритет/Статус values are backend-specific, so there are no defaults:
+# the allowed-values check is off until they are set as comma-separated lists, e.g. CASE_STATUSES=Открыт,В работе,Закрыт
+CASE_PRIORITIES = [value.strip() for value in getenv('CASE_PRIORITIES', '').split(',') if value.strip()]
+CASE_STATUSES = [value.strip() for value in getenv('CASE_STATUSES', '').split(',') if value.strip()]
+VALIDATION_MAX_ERRORS = int(getenv('VALIDATION_MAX_ERRORS', 25))
+# Split case files into batches of this many rows (0 sends the whole file in one request)
+CASES_BATCH_SIZE = int(getenv('CASES_BATCH_SIZE', 0))
+CASES_BATCH_CONCURRENCY = int(getenv('CASES_BATCH_CONCURRENCY', 3))
+CASES_BATCH_RETRIES = int(getenv('CASES_BATCH_RETRIES', 3))
+CASES_BATCH_BACKOFF = float(getenv('CASES_BATCH_BACKOFF', 2))
+UPLOAD_BATCHES_TTL = float(getenv('UPLOAD_BATCHES_TTL', 7 * 24 * 3600))
+# Send only new and changed rows of engineers/activities; requires a backend that upserts by key
+DELTA_UPLOADS = getenv('DELTA_UPLOADS', '0') == '1'
+
+# Background jobs
+JOB_WORKERS = int(getenv('JOB_WORKERS', 2))
+JOB_PROGRESS_INTERVAL = float(getenv('JOB_PROGRESS_INTERVAL', 2))
+
+# Backend response cache (seconds, 0 disables)
+CACHE_TTL_STATS = float(getenv('CACHE_TTL_STATS', 60))
+CACHE_TTL_MAILINGS = float(getenv('CACHE_TTL_MAILINGS', 30))
+
+# Update delivery: 'polling' for local development, 'webhook' behind the aiohttp server (requires WEBHOOK_SECRET)
+BOT_MODE = getenv('BOT_MODE', 'polling')
+WEBHOOK_BASE_URL = getenv('WEBHOOK_BASE_URL')
+WEBHOOK_PATH = getenv('WEBHOOK_PATH', '/webhook')
+WEBHOOK_SECRET = getenv('WEBHOOK_SECRET')
+WEBAPP_HOST = getenv('WEBAPP_HOST', '0.0.0.0')
+WEBAPP_PORT = int(getenv('WEBAPP_PORT', 8080))
+HEALTH_PATH = getenv('HEALTH_PATH', '/health')
+
+# Bot SQLite database file
+DB_PATH = getenv('DB_PATH', 'bot_database.db')
+
+# FSM storage
+FSM_TTL = float(getenv('FSM_TTL', 7 * 24 * 3600))
+FSM_FLUSH_INTERVAL = float(getenv('FSM_FLUSH_INTERVAL', 1))
+FSM_FLUSH_BATCH = int(getenv('FSM_FLUSH_BATCH', 100))
+# Webhook mode only: number of worker processes behind the front process, and their local ports.
+# Users, FSM and cache invalidations are shared through SQLite; the background job queue is per worker,
+# so the engineers -> cases -> activities upload order only holds for jobs handled by the same worker
+BOT_WORKERS = int(getenv('BOT_WORKERS', 1))
+WORKER_BASE_PORT = int(getenv('WORKER_BASE_PORT', 8100))
+# Only a cluster needs the shared generation counters; a single process skips their SQLite reads
+CLUSTERED = BOT_MODE == 'webhook' and BOT_WORKERS > 1
+
+# Excel parsing process pool
+PARSE_WORKERS = int(getenv('PARSE_WORKERS', 2))
+PARSE_QUEUE_SIZE = int(getenv('PARSE_QUEUE_SIZE', 8))
+# Parse results kept per file digest so a re-sent file is not parsed again (0 disables)
+PARSE_CACHE_SIZE = int(getenv('PARSE_CACHE_SIZE', 20))
+# Upload history: backend responses older than the TTL and all but the newest file ids are pruned on insert
+UPLOAD_HISTORY_TTL = float(getenv('UPLOAD_HISTORY_TTL', 30 * 24 * 3600))
+UPLOAD_HISTORY_FILES = int(getenv('UPLOAD_HISTORY_FILES', 5000))
+
+# Outbound Telegram rate limits (requests per second); the global limit is shared by cluster workers
+TG_GLOBAL_RATE = float(getenv('TG_GLOBAL_RATE', 30))
+TG_CHAT_RATE = float(getenv('TG_CHAT_RATE', 1))
+TG_CHAT_BURST = float(getenv('TG_CHAT_BURST', 3))
+TG_MAX_RETRIES = int(getenv('TG_MAX_RETRIES', 3))
+TG_CHAT_BUCKETS = int(getenv('TG_CHAT_BUCKETS', 10000))
+
+# Reports longer than this many messages are sent as a CSV attachment
+REPORT_MAX_MESSAGES = int(getenv('REPORT_MAX_MESSAGES', 5))
+
+# Engineer statistics view; sorted/filtered views are kept per snapshot, least recently used evicted first
+ENGINEERS_PAGE_SIZE = int(getenv('ENGINEERS_PAGE_SIZE', 20))
+ENGINEERS_VIEWS = int(getenv('ENGINEERS_VIEWS', 32))
+
+# Statistics history: background snapshots of /stats/all and /stats/count/{id}/ (interval 0 disables)
+STATS_SNAPSHOT_INTERVAL = float(getenv('STATS_SNAPSHOT_INTERVAL', 3600))
+STATS_SNAPSHOT_CONCURRENCY = int(getenv('STATS_SNAPSHOT_CONCURRENCY', 4))
+STATS_HISTORY_TTL = float(getenv('STATS_HISTORY_TTL', 180 * 24 * 3600))
+# /trend window in days and number of points per curve
+TREND_DAYS = int(getenv('TREND_DAYS', 30))
+TREND_POINTS = int(getenv('TREND_POINTS', 20))
+
+# Mailing task status push endpoint: the backend signs "<timestamp>." + body with HMAC-SHA256 (no secret disables it);
+# requests whose signed timestamp differs from the bot's clock by more than MAILING_EVENTS_MAX_AGE seconds are rejected
+MAILING_EVENTS_PATH = getenv('MAILING_EVENTS_PATH', '/mailing/events')
+MAILING_EVENTS_SECRET = getenv('MAILING_EVENTS_SECRET')
+MAILING_EVENTS_MAX_AGE = float(getenv('MAILING_EVENTS_MAX_AGE', 300))
+# Re-read a mailing's tasklog this many seconds after the last read, repairing events the backend failed to push
+MAILING_EVENTS_RESYNC = float(getenv('MAILING_EVENTS_RESYNC', 3600))
+# Notify the mailing's creator when a task finishes
+MAILING_EVENTS_NOTIFY = getenv('MAILING_EVENTS_NOTIFY', '1') == '1'
@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# database/* открывает базу при импорте: тесты получают свою, а не bot_database.db разработчика
+os.environ['DB_PATH'] = os.path.join(tempfile.mkdtemp(prefix='bot-tests-'), 'bot_database.db')
@@ -0,0 +1,70 @@
+import json
+from multidict import CIMultiDict
+from utils.api_client import ApiResponse
+from utils.batch_upload import BatchUpload
+
+
+def response(status_code: int, body: dict) -> ApiResponse:
+    return ApiResponse(status_code, '/cases/', json.dumps(body).encode(), CIMultiDict())
+
+
+def test_aggregate_uses_excel_row_numbers():
+    upload = BatchUpload('/cases/', batch_size=10)
+    upload.responses = {
+        0: response(201, {'new_users': ['a'], 'missing_users': ['x']}),
+        1: response(207, {'missing_users': ['x', 'y'], 'serialization_errors': [{'row': 2, 'errors': 'bad'}]}),
+    }
+    rows = [
+        (0, [[2, 11]], 10, 'done', 201, None, 1),
+        (1, [[12, 21]], 10, 'done', 207, None, 1),
+        (2, [[22, 26]], 5, 'failed', 502, 'HTTP 502', 4),
+    ]
+
+    result = upload._aggregate(rows, 0.0)
+    data = result.json()
+
+    assert result.status_code == 207
+    assert data['new_users'] == ['a']
+    assert data['missing_users'] == ['x', 'y']
+    # Первая строка данных второго пакета — строка 12 исходного файла, как и в подписи пакета
+    assert data['serialization_errors'] == [{'row': 12, 'errors': 'bad'}]
+    assert data['failed_batches'] == ['Строки 22–26: HTTP 502']
+    assert data['message'] == "Загружено пакетов: 2 из 3"
+
+
+def test_aggregate_all_done_is_created():
+    upload = BatchUpload('/cases/', batch_size=10)
+    upload.responses = {0: response(201, {})}
+    result = upload._aggregate([(0, [[2, 4]], 3, 'done', 201, None, 1)], 0.0)
+    assert result.status_code == 201
+    assert result.json()['failed_batches'] == []
+
+
+def test_rows_after_blank_lines_keep_excel_numbers():
+    upload = BatchUpload('/cases/', batch_size=4)
+    upload.responses = {0: response(207, {'serialization_errors': [{'row': 4, 'errors': 'bad'}, {'row': 9, 'errors': '?'}]})}
+    # Пакет из строк 2–3 и 7–8 листа: строки 4–6 пустые
+    rows = [
+        (0, [[2, 3], [7, 8]], 4, 'done', 207, None, 1),
+        (1, [[10, 12], [15, 15]], 4, 'rejected', 400, 'bad file', 1),
+    ]
+
+    data = upload._aggregate(rows, 0.0).json()
+
+    # Строка 4 файла пакета — третья строка данных, то есть строка 7 листа; несуществующая строка остаётся как есть
+    assert data['serialization_errors'] == [{'row': 7, 'errors': 'bad'}, {'row': 9, 'errors': '?'}]
+    assert data['failed_batches'] == ['Строки 10–15: bad file']
+
+
+def test_rejected_batch_keeps_backend_errors():
+    upload = BatchUpload('/cases/', batch_size=10)
+    upload.responses = {0: response(400, {
+        'serialization_errors': [{'row': 3, 'errors': 'bad date'}],
+        'Код': ['Обязательное поле.'],
+    })}
+    rows = [(0, [[12, 21]], 10, 'rejected', 400, 'HTTP 400', 1)]
+
+    data = upload._aggregate(rows, 0.0).json()
+
+    assert data['serialization_errors'] == [{'row': 13, 'errors': 'bad date'}]
+    assert data['failed_batches'] == ['Строки 12–21: HTTP 400 (Код: Обязательное поле.)']
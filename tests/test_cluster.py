@@ -0,0 +1,45 @@
+import asyncio
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+from server import cluster
+from server.cluster import UpdateRouter, update_chat_id, SECRET_HEADER
+
+
+@pytest.mark.parametrize('update, chat_id', [
+    ({'update_id': 1, 'message': {'chat': {'id': 42}, 'from': {'id': 7}}}, 42),
+    ({'update_id': 1, 'callback_query': {'from': {'id': 7}, 'message': {'chat': {'id': 43}}}}, 43),
+    ({'update_id': 1, 'inline_query': {'from': {'id': 44}}}, 44),
+    ({'update_id': 1, 'my_chat_member': {'chat': {'id': -1001}, 'from': {'id': 7}}}, -1001),
+    ({'update_id': 1}, 0),
+])
+def test_update_chat_id(update, chat_id):
+    assert update_chat_id(update) == chat_id
+
+
+def test_worker_port_is_chat_id_modulo_workers():
+    router = UpdateRouter([9001, 9002, 9003])
+    for chat_id in (0, 1, 2, 3, 10, -1001):
+        update = {'update_id': chat_id, 'message': {'chat': {'id': chat_id}}}
+        assert router.worker_port(update) == router.ports[chat_id % 3]
+
+
+def test_chat_updates_go_to_one_worker():
+    router = UpdateRouter([9001, 9002])
+    message = {'update_id': 1, 'message': {'chat': {'id': 5}, 'from': {'id': 5}}}
+    callback = {'update_id': 2, 'callback_query': {'from': {'id': 5}, 'message': {'chat': {'id': 5}}}}
+    assert router.worker_port(message) == router.worker_port(callback) == 9002
+
+
+@pytest.mark.parametrize('body', [b'{not json', b'[1, 2]'])
+def test_malformed_update_is_bad_request(body, monkeypatch):
+    monkeypatch.setattr(cluster, 'WEBHOOK_SECRET', 'secret')
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_post('/webhook', UpdateRouter([9001]).handle)
+        async with TestClient(TestServer(app)) as client:
+            response = await client.post('/webhook', data=body, headers={SECRET_HEADER: 'secret'})
+            return response.status
+
+    assert asyncio.run(scenario()) == 400
@@ -0,0 +1,16 @@
+import pytest
+from database.db import BotDatabase
+
+
+def test_failed_write_is_not_committed_by_next_call(tmp_path):
+    db = BotDatabase(str(tmp_path / 'bot.db'))
+    db.add_user(1, 'a@example.com')
+
+    with pytest.raises(RuntimeError):
+        with db.get_connection() as conn:
+            conn.execute("DELETE FROM users")
+            raise RuntimeError()
+    db.add_user(2, 'b@example.com')
+
+    assert sorted(chat_id for chat_id, _, _ in db.get_all_users()) == [1, 2]
+    db.close()
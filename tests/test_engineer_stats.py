@@ -0,0 +1,28 @@
+from utils.engineer_stats import EngineerStats
+
+DATA = {
+    'engineers': [
+        {'engineer': 'Иванов Иван', 'feedback_stats': '3/1'},
+        {'engineer': 'Петров Пётр', 'feedback_stats': '5/0'},
+        {'engineer': 'Сидоров Олег', 'feedback_stats': 'нет данных'},
+    ],
+    'total_feedbacks': {'total_sent': 8, 'total_unsent': 1},
+}
+
+
+def test_views_filter_and_sort():
+    stats = EngineerStats(DATA)
+    assert stats.view('sent')['name'].tolist() == ['Петров Пётр', 'Иванов Иван', 'Сидоров Олег']
+    assert stats.view('default', ' ИВАН ')['name'].tolist() == ['Иванов Иван']
+
+
+def test_views_are_bounded():
+    stats = EngineerStats(DATA, max_views=3)
+    stats.view('sent')
+    for query in ('ив', 'пет', 'сид', 'олег'):
+        stats.view('default', query)
+        # Часто используемое представление не вытесняется
+        stats.view('sent')
+
+    assert len(stats._views) == 3
+    assert list(stats._views) == [('default', 'сид'), ('default', 'олег'), ('sent', '')]
@@ -0,0 +1,49 @@
+import asyncio
+from database.allow_list import AllowList
+from database.db import BotDatabase
+from database.generations import Generations
+from utils.api_cache import ApiCache
+from utils.api_client import ApiResponse
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls = 0
+
+    async def get(self, url: str) -> ApiResponse:
+        self.calls += 1
+        return ApiResponse(200, url, b'{}', {})
+
+
+def test_invalidate_reaches_other_process_cache(tmp_path):
+    # Два кэша с отдельными соединениями к одному файлу — как два воркера кластера
+    path = str(tmp_path / 'bot.db')
+    first, second = FakeClient(), FakeClient()
+    cache_a = ApiCache(first, generations=Generations(BotDatabase(path)))
+    cache_b = ApiCache(second, generations=Generations(BotDatabase(path)))
+
+    async def scenario():
+        await cache_b.get('http://api/mailing/all/')
+        await cache_b.get('http://api/stats/all')
+        await cache_a.invalidate('/mailing/')
+        await cache_b.get('http://api/mailing/all/')
+        await cache_b.get('http://api/stats/all')
+
+    asyncio.run(scenario())
+    assert second.calls == 3
+
+
+def test_user_added_elsewhere_is_allowed(tmp_path):
+    path = str(tmp_path / 'bot.db')
+    worker_a = AllowList(BotDatabase(path), ttl=3600, generations=Generations(BotDatabase(path)))
+    worker_b = AllowList(BotDatabase(path), ttl=3600, generations=Generations(BotDatabase(path)))
+    worker_b.load()
+
+    async def scenario():
+        assert not await worker_b.is_allowed(42)
+        await worker_a.add_user(42, 'user@example.com')
+        assert await worker_b.is_allowed(42)
+        await worker_a.remove_user(42)
+        return await worker_b.is_allowed(42)
+
+    assert asyncio.run(scenario()) is False
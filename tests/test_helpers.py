@@ -0,0 +1,31 @@
+from io import BytesIO
+import pandas as pd
+from openpyxl import Workbook
+from utils.helpers import iter_excel_chunks, split_upload
+
+
+def make_sheet(*rows) -> bytes:
+    workbook = Workbook()
+    sheet = workbook.active
+    for row in rows:
+        sheet.append(row)
+    buffer = BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+# Строки листа: 1 — заголовок, 4 и 5 — пустые
+SHEET = make_sheet(['Код', 'Статус'], ['A1', 'new'], ['A2', 'new'], [None, None], [], ['A3', 'done'], ['A4', 'done'])
+
+
+def test_chunks_are_indexed_by_sheet_rows():
+    chunks = list(iter_excel_chunks(BytesIO(SHEET), chunk_size=3))
+    assert [chunk.index.tolist() for chunk in chunks] == [[2, 3, 6], [7]]
+    assert chunks[0]['Код'].tolist() == ['A1', 'A2', 'A3']
+
+
+def test_split_upload_records_sheet_row_ranges(tmp_path):
+    batches = split_upload(SHEET, 3, str(tmp_path))
+    assert [(batch['row_ranges'], batch['rows']) for batch in batches] == [([[2, 3], [6, 6]], 3), ([[7, 7]], 1)]
+    first = pd.read_excel(batches[0]['path'])
+    assert first['Код'].tolist() == ['A1', 'A2', 'A3']
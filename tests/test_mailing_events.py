@@ -0,0 +1,99 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import time
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+from database.db import BotDatabase
+from database.mailing_events import MailingEvents
+from server.mailing_events import MailingEventsReceiver, SIGNATURE_HEADER, TIMESTAMP_HEADER
+from settings.config import MAILING_EVENTS_PATH
+
+SECRET = 'secret'
+EVENT = {'mailing_id': 7, 'scheduled_date': '2026-10-01', 'task_name': 'send_emails', 'status': 'SUCCESS'}
+
+
+def sign(body: bytes, secret: str = SECRET, timestamp: float | None = None) -> dict:
+    timestamp = str(int(time.time() if timestamp is None else timestamp))
+    digest = hmac.new(secret.encode(), timestamp.encode() + b'.' + body, hashlib.sha256).hexdigest()
+    return {TIMESTAMP_HEADER: timestamp, SIGNATURE_HEADER: 'sha256=' + digest}
+
+
+def post(tmp_path, *requests: tuple[bytes, dict]) -> tuple[list[int], MailingEvents]:
+    """Отправляет запросы на приёмник событий, возвращает статусы ответов и хранилище событий."""
+    events = MailingEvents(BotDatabase(str(tmp_path / 'bot.db')))
+
+    async def send():
+        app = web.Application()
+        MailingEventsReceiver(None, secret=SECRET, notify=False, events=events, max_age=60).register(app)
+        async with TestClient(TestServer(app)) as client:
+            statuses = []
+            for body, headers in requests:
+                response = await client.post(MAILING_EVENTS_PATH, data=body, headers=headers)
+                statuses.append(response.status)
+            return statuses
+
+    return asyncio.run(send()), events
+
+
+def stored_statuses(events: MailingEvents) -> list[tuple]:
+    with events.db.get_connection() as conn:
+        return conn.execute("SELECT status FROM mailing_tasks").fetchall()
+
+
+def test_signed_event_is_accepted(tmp_path):
+    body = json.dumps(EVENT).encode()
+    statuses, events = post(tmp_path, (body, sign(body)))
+
+    assert statuses == [200]
+    assert stored_statuses(events) == [('SUCCESS',)]
+
+
+def test_bad_signature_is_rejected(tmp_path):
+    body = json.dumps(EVENT).encode()
+    headers = [
+        {},
+        sign(body, 'other'),
+        sign(body + b' '),
+        {**sign(body), TIMESTAMP_HEADER: str(int(time.time()) + 1)},
+        sign(body, timestamp=time.time() - 120),
+    ]
+    statuses, events = post(tmp_path, *((body, header) for header in headers))
+
+    assert statuses == [401] * len(headers)
+    assert stored_statuses(events) == []
+
+
+def test_replayed_event_does_not_override_newer_status(tmp_path):
+    retry = json.dumps({**EVENT, 'status': 'RETRY'}).encode()
+    success = json.dumps(EVENT).encode()
+    captured = sign(retry, timestamp=time.time() - 30)
+    statuses, events = post(tmp_path, (retry, captured), (success, sign(success)), (retry, captured))
+
+    assert statuses == [200, 200, 200]
+    assert stored_statuses(events) == [('SUCCESS',)]
+
+
+def test_signed_invalid_payload_is_bad_request(tmp_path):
+    body = json.dumps({**EVENT, 'status': 'UNKNOWN'}).encode()
+    statuses, _ = post(tmp_path, (body, sign(body)))
+    assert statuses == [400]
+
+
+def test_tasklog_is_reread_after_resync(tmp_path):
+    events = MailingEvents(BotDatabase(str(tmp_path / 'bot.db')), resync=60)
+    assert events.load_tasks(7) == (None, True)
+
+    now = time.time()
+    events.save_events([{**EVENT, 'status': 'RETRY', 'updated_at': now - 100}])
+    events.save_tasklog(7, [{'scheduled_date': '2026-10-01', 'task_name': 'send_emails', 'status': 'SUCCESS'}],
+                        fetched_at=now - 90)
+    # tasklog новее пропущенного события и исправляет статус
+    assert events.load_tasks(7) == ({('2026-10-01', 'send_emails'): 'SUCCESS'}, True)
+
+    events.save_events([{**EVENT, 'status': 'FAILURE', 'updated_at': now - 5}])
+    events.save_tasklog(7, [{'scheduled_date': '2026-10-01', 'task_name': 'send_emails', 'status': 'SUCCESS'}],
+                        fetched_at=now - 10)
+    # Событие, пришедшее после запроса tasklog, остаётся в силе
+    assert events.load_tasks(7) == ({('2026-10-01', 'send_emails'): 'FAILURE'}, False)
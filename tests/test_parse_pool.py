@@ -0,0 +1,96 @@
+import asyncio
+import multiprocessing
+import os
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from utils.parse_pool import ParsePool, ParseCancelled
+
+
+def pid_of_parser():
+    return os.getpid()
+
+
+def run_in_pool(queue):
+    """Тело процесса-воркера кластера: разбор через ParsePool, в очередь — (pid воркера, pid разборщика)."""
+    async def main():
+        pool = ParsePool(workers=1)
+        try:
+            return await pool.run(1, pid_of_parser)
+        finally:
+            pool.shutdown()
+
+    try:
+        queue.put((os.getpid(), asyncio.run(main())))
+    except BaseException as e:
+        queue.put(repr(e))
+
+
+def run_in_worker(daemon: bool):
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    worker = context.Process(target=run_in_pool, args=(queue,), daemon=daemon)
+    worker.start()
+    try:
+        return queue.get(timeout=60)
+    finally:
+        worker.join(timeout=10)
+        if worker.is_alive():
+            # Иначе pytest повиснет на выходе, дожидаясь недемонического процесса
+            worker.kill()
+            worker.join()
+
+
+def test_parse_pool_runs_inside_daemonic_worker():
+    result = run_in_worker(daemon=True)
+    assert isinstance(result, tuple), result
+    worker_pid, parser_pid = result
+    # Дочерние процессы запрещены, разбор идёт в потоке самого воркера
+    assert parser_pid == worker_pid
+
+
+def test_parse_pool_uses_processes_in_cluster_worker():
+    result = run_in_worker(daemon=False)
+    assert isinstance(result, tuple), result
+    worker_pid, parser_pid = result
+    assert parser_pid != worker_pid
+
+
+def thread_pool() -> ParsePool:
+    pool = ParsePool(workers=2)
+    pool._executor = ThreadPoolExecutor(2)
+    return pool
+
+
+def test_new_file_replaces_running_parse():
+    pool = thread_pool()
+
+    async def scenario():
+        first = asyncio.create_task(pool.run(1, time.sleep, 0.2))
+        await asyncio.sleep(0.01)
+        await pool.run(1, time.sleep, 0)
+        with pytest.raises(ParseCancelled) as e:
+            await first
+        return e.value.replaced
+
+    try:
+        assert asyncio.run(scenario()) is True
+    finally:
+        pool.shutdown()
+
+
+def test_cancelled_caller_is_not_a_user_cancel():
+    pool = thread_pool()
+
+    async def scenario():
+        task = asyncio.create_task(pool.run(1, time.sleep, 0.2))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return task.cancelled()
+
+    try:
+        assert asyncio.run(scenario()) is True
+    finally:
+        pool.shutdown()
@@ -0,0 +1,78 @@
+import asyncio
+import pytest
+from aiogram.methods import EditMessageText, SendMessage
+from middlewares.rate_limit import RateLimitMiddleware
+
+
+class FakeTelegram:
+    """make_request, запоминающий отправленные тексты; gate задерживает ответ до set()."""
+
+    def __init__(self):
+        self.sent: list[str] = []
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def __call__(self, bot, method):
+        await self.gate.wait()
+        self.sent.append(method.text)
+        return method.text
+
+
+def edit(text: str) -> EditMessageText:
+    return EditMessageText(chat_id=1, message_id=10, text=text)
+
+
+def make_limiter() -> RateLimitMiddleware:
+    # Один токен на чат и 20 в секунду: вторая правка ждёт очереди около 50 мс
+    return RateLimitMiddleware(global_rate=100, chat_rate=20, chat_burst=1)
+
+
+def test_queued_edits_are_coalesced():
+    async def scenario():
+        limiter, telegram = make_limiter(), FakeTelegram()
+        await limiter(telegram, None, SendMessage(chat_id=1, text='start'))
+        calls = [asyncio.create_task(limiter(telegram, None, edit(text))) for text in ('a', 'b', 'c')]
+        return await asyncio.gather(*calls), telegram.sent, limiter.coalesced
+
+    results, sent, coalesced = asyncio.run(scenario())
+    assert results == ['c', 'c', 'c']
+    assert sent == ['start', 'c']
+    assert coalesced == 2
+
+
+@pytest.mark.parametrize('while_sending', [False, True])
+def test_cancelled_first_edit_does_not_cancel_merged_callers(while_sending):
+    async def scenario():
+        limiter, telegram = make_limiter(), FakeTelegram()
+        await limiter(telegram, None, SendMessage(chat_id=1, text='start'))
+        first = asyncio.create_task(limiter(telegram, None, edit('a')))
+        await asyncio.sleep(0)
+        merged = asyncio.create_task(limiter(telegram, None, edit('b')))
+        await asyncio.sleep(0)
+        if while_sending:
+            telegram.gate.clear()
+            await asyncio.sleep(0.1)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        telegram.gate.set()
+        merged_result = await asyncio.wait_for(merged, 1)
+        # Сообщение снова можно редактировать
+        return merged_result, await asyncio.wait_for(limiter(telegram, None, edit('c')), 1), limiter.stats()['pending_edits']
+
+    assert asyncio.run(scenario()) == ('b', 'c', 0)
+
+
+def test_edit_cancelled_by_all_callers_is_not_sent():
+    async def scenario():
+        limiter, telegram = make_limiter(), FakeTelegram()
+        await limiter(telegram, None, SendMessage(chat_id=1, text='start'))
+        only = asyncio.create_task(limiter(telegram, None, edit('a')))
+        await asyncio.sleep(0)
+        only.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await only
+        await asyncio.sleep(0.1)
+        return telegram.sent, limiter.stats()['pending_edits']
+
+    assert asyncio.run(scenario()) == (['start'], 0)
@@ -0,0 +1,64 @@
+import asyncio
+from utils.reports import Report, split_text
+
+
+class FakeMessage:
+    def __init__(self):
+        self.sent: list[tuple[str, str | None]] = []
+        self.documents: list[bytes] = []
+
+    async def answer(self, text: str, parse_mode: str | None = None):
+        self.sent.append((text, parse_mode))
+
+    async def answer_document(self, document):
+        self.documents.append(document.data)
+
+
+def make_report(*lines: str, **kwargs) -> Report:
+    report = Report(parse_mode='Markdown', **kwargs)
+    for line in lines:
+        report.line(line)
+    return report
+
+
+def test_split_text_cuts_at_last_space():
+    assert split_text('*один* *два* три', 11) == ['*один*', '*два* три']
+    assert split_text('x' * 25, 10) == ['x' * 10, 'x' * 10, 'x' * 5]
+
+
+def test_lines_fill_messages_up_to_limit():
+    chunks = list(make_report('a' * 4, 'b' * 4, 'c' * 4, limit=9).chunks())
+    assert chunks == [('aaaa\nbbbb', True), ('cccc', True)]
+
+
+def test_long_line_is_cut_and_marked_plain():
+    chunks = list(make_report('до', ' '.join(['*жирный*'] * 3), 'после', limit=20).chunks())
+    assert chunks == [('до', True), ('*жирный* *жирный*', False), ('*жирный*', False), ('после', True)]
+    assert all(len(text) <= 20 for text, _ in chunks)
+
+
+def test_cut_chunks_are_sent_without_parse_mode():
+    message = FakeMessage()
+    asyncio.run(make_report('кратко', ' '.join(['*жирный*'] * 3), limit=20).send(message))
+    assert message.sent == [
+        ('кратко', 'Markdown'), ('*жирный* *жирный*', None), ('*жирный*', None),
+    ]
+
+
+def test_too_many_messages_fall_back_to_csv():
+    report = make_report('✅ *Итог*', limit=80, max_messages=2)
+    report.section('*Ошибки:*', (f'- строка {row}: неверная дата' for row in range(20)))
+    message = FakeMessage()
+    asyncio.run(report.send(message))
+
+    assert message.sent == [('✅ *Итог*\n*Ошибки:* 20 — в файле\n📎 Полный отчёт — во вложении.', 'Markdown')]
+    rows = message.documents[0].decode('utf-8-sig').splitlines()
+    assert rows[0] == 'Раздел;Запись' and rows[1] == 'Ошибки:;- строка 0: неверная дата' and len(rows) == 21
+
+
+def test_long_summary_drops_whole_lines():
+    report = make_report(*(f'*строка {index}*' for index in range(10)), limit=80, max_messages=0)
+    text, intact = report.summary()
+    assert intact and len(text) <= 80
+    assert text.endswith('…\n📎 Полный отчёт — во вложении.')
+    assert all(line.count('*') == 2 for line in text.splitlines()[:-2])
@@ -0,0 +1,24 @@
+from utils.trends import Trends
+
+MESSAGE_LIMIT = 4096
+
+
+def make_trends(count: int, name: str) -> Trends:
+    rows = [(index, 1000 + step, step, 10) for index in range(count) for step in range(3)]
+    return Trends({index: f'{name} {index}' for index in range(count)}, rows, [], 1000, 2000, page_size=20)
+
+
+def test_mailings_are_paginated():
+    trends = make_trends(80, 'Рассылка')
+    pages = [trends.render('mailings', page, 30) for page in range(4)]
+
+    assert [(page, total) for _, page, total in pages] == [(0, 4), (1, 4), (2, 4), (3, 4)]
+    assert all(len(text) < MESSAGE_LIMIT for text, _, _ in pages)
+    assert 'Рассылка 79' in pages[3][0] and 'Рассылка 79' not in pages[0][0]
+    # Номер страницы за пределами ограничивается последней
+    assert trends.render('mailings', 10)[1] == 3
+
+
+def test_long_names_fit_in_one_message():
+    text, _, _ = make_trends(20, 'Очень длинное название рассылки ' * 10).render('mailings', 0, 30)
+    assert len(text) < MESSAGE_LIMIT
@@ -0,0 +1,31 @@
+import time
+from database.db import BotDatabase
+from database.upload_history import UploadHistory
+
+
+def make_history(tmp_path, **kwargs) -> UploadHistory:
+    return UploadHistory(BotDatabase(str(tmp_path / 'bot.db')), **kwargs)
+
+
+def test_old_responses_are_pruned_on_insert(tmp_path):
+    history = make_history(tmp_path, ttl=60)
+    history.save_response('old', 'upload_cases', 201, b'{}')
+    with history.db.get_connection() as conn:
+        conn.execute("UPDATE upload_responses SET uploaded_at = ?", (time.time() - 120,))
+        conn.commit()
+
+    history.save_response('new', 'upload_cases', 207, b'{"message": "ok"}')
+
+    assert history.load_response('old', 'upload_cases') is None
+    assert history.load_response('new', 'upload_cases')[:2] == (207, b'{"message": "ok"}')
+
+
+def test_only_newest_file_ids_are_kept(tmp_path):
+    history = make_history(tmp_path, max_files=2)
+    for file_id in ('a', 'b', 'c'):
+        history.save_digest(file_id, f'digest-{file_id}')
+    # Повторно присланный файл становится самым свежим
+    history.save_digest('b', 'digest-b')
+    history.save_digest('d', 'digest-d')
+
+    assert [history.load_digest(file_id) for file_id in 'abcd'] == [None, 'digest-b', None, 'digest-d']
@@ -0,0 +1,25 @@
+import pandas as pd
+from utils.validation import RowValidator
+
+
+def test_codes_are_unique_across_chunks():
+    validator = RowValidator({'required_columns': ['Код'], 'unique_column': 'Код'})
+    # Индекс — номера строк листа, как у iter_excel_chunks; строка 5 листа пустая
+    validator.add(pd.DataFrame({'Код': ['A1', 'A2', ' A1 ']}, index=[2, 3, 4]))
+    validator.add(pd.DataFrame({'Код': ['A3', '', 'A2', 'A3']}, index=[6, 7, 8, 9]))
+
+    assert validator.result() == {
+        'errors': [
+            {'row': 4, 'errors': 'повторяется «Код»'},
+            {'row': 7, 'errors': 'не заполнено «Код»'},
+            {'row': 8, 'errors': 'повторяется «Код»'},
+            {'row': 9, 'errors': 'повторяется «Код»'},
+        ],
+        'error_count': 4,
+    }
+
+
+def test_empty_allowed_values_skip_the_check():
+    validator = RowValidator({'allowed_values': {'Статус': [], 'Приоритет': ['Высокий']}})
+    validator.add(pd.DataFrame({'Статус': ['что угодно'], 'Приоритет': ['Низкий']}, index=[2]))
+    assert validator.result()['errors'] == [{'row': 2, 'errors': 'недопустимое значение «Приоритет»'}]
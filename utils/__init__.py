@@ -1,9 +1,24 @@
-from .helpers import read_excel, get_category_config, get_file_stream, validate_columns
+from .helpers import (
+    read_excel_header, read_excel_preview, iter_excel_chunks, get_category_config,
+    validate_header, detect_category, parse_upload
+)
+from .api_client import api_client, ApiError, ApiHTTPError, ApiTimeoutError
+from .api_cache import api_cache
+from .upload_file import UploadFile
 
 
 __all__ = [
-    'read_excel',
+    'read_excel_header',
+    'read_excel_preview',
+    'iter_excel_chunks',
     'get_category_config',
-    'get_file_stream',
-    'validate_columns'
+    'validate_header',
+    'detect_category',
+    'parse_upload',
+    'api_client',
+    'api_cache',
+    'UploadFile',
+    'ApiError',
+    'ApiHTTPError',
+    'ApiTimeoutError'
 ]
@@ -0,0 +1,107 @@
+import asyncio
+import re
+import time
+from database.generations import Generations, generations
+from utils.api_client import ApiClient, ApiResponse, api_client
+from settings.config import CACHE_TTL_STATS, CACHE_TTL_MAILINGS, CLUSTERED
+
+
+# TTL для read-only эндпоинтов; остальные GET-запросы не кэшируются.
+# Сброс фрагмента URL хранится как счётчик GENERATION_PREFIX + фрагмент (пустой фрагмент — сброс всего)
+GENERATION_PREFIX = 'api_cache:'
+ENDPOINT_TTLS = [
+    (re.compile(r'/stats/all/?$'), CACHE_TTL_STATS),
+    (re.compile(r'/mailing/all/$'), CACHE_TTL_MAILINGS),
+    (re.compile(r'/mailing/\d+/$'), CACHE_TTL_MAILINGS),
+]
+
+
+class ApiCache:
+    """
+    TTL-кэш GET-ответов бэкенда. Одновременные одинаковые запросы ждут один общий вызов.
+    После записей вызывающий код сбрасывает затронутые ключи через invalidate. Сброс отмечается
+    в общих счётчиках generations, и кэши остальных процессов кластера применяют его при следующем get.
+    Без кластера generations=None, и попадание в кэш обходится без запроса к БД.
+    """
+
+    def __init__(self, client: ApiClient, endpoint_ttls: list = ENDPOINT_TTLS,
+                 generations: Generations | None = generations):
+        self.client = client
+        self.endpoint_ttls = endpoint_ttls
+        self.generations = generations
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self._entries: dict[str, tuple[float, ApiResponse]] = {}
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._generation = 0
+        self._seen: dict[str, int] = {}
+
+    def _ttl_for(self, url: str) -> float:
+        for pattern, ttl in self.endpoint_ttls:
+            if pattern.search(url):
+                return ttl
+        return 0
+
+    async def get(self, url: str) -> ApiResponse:
+        ttl = self._ttl_for(url)
+        if ttl <= 0:
+            return await self.client.get(url)
+
+        await self._sync()
+        entry = self._entries.get(url)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+
+        task = self._inflight.get(url)
+        if task is not None:
+            self.shared += 1
+            return await asyncio.shield(task)
+
+        self.misses += 1
+        task = asyncio.create_task(self._fetch(url, ttl))
+        self._inflight[url] = task
+        return await asyncio.shield(task)
+
+    async def _fetch(self, url: str, ttl: float) -> ApiResponse:
+        generation = self._generation
+        try:
+            response = await self.client.get(url)
+        finally:
+            self._inflight.pop(url, None)
+        await self._sync()
+        # Ответ, начатый до invalidate, мог устареть — такой не сохраняем.
+        if response.status_code < 400 and generation == self._generation:
+            self._entries[url] = (time.monotonic() + ttl, response)
+        return response
+
+    async def _sync(self):
+        """Применяет сбросы, сделанные другими процессами после последней проверки."""
+        if self.generations is None:
+            return
+        current = await self.generations.get_prefixed(GENERATION_PREFIX)
+        changed = [key for key, generation in current.items() if self._seen.get(key) != generation]
+        if not changed:
+            return
+        self._seen = current
+        fragments = [key[len(GENERATION_PREFIX):] for key in changed]
+        self._drop(*([] if '' in fragments else fragments))
+
+    async def invalidate(self, *fragments: str):
+        """Удаляет записи, в URL которых есть любой из фрагментов; без аргументов — все."""
+        self._drop(*fragments)
+        if self.generations is not None:
+            await self.generations.bump(*(GENERATION_PREFIX + fragment for fragment in fragments or ('',)))
+
+    def _drop(self, *fragments: str):
+        self._generation += 1
+        for url in list(self._entries):
+            if not fragments or any(fragment in url for fragment in fragments):
+                del self._entries[url]
+
+    def stats(self) -> dict:
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses, 'shared': self.shared}
+
+
+api_cache = ApiCache(api_client, generations=generations if CLUSTERED else None)
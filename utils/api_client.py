@@ -0,0 +1,135 @@
+import asyncio
+import json
+import time
+from typing import BinaryIO
+import aiohttp
+from multidict import CIMultiDict
+from settings.config import HEADER, API_TIMEOUT, API_POOL_SIZE
+
+
+class ApiError(Exception):
+    """Ошибка обращения к бэкенду: сеть, таймаут или неуспешный HTTP-статус."""
+
+
+class ApiTimeoutError(ApiError):
+    """Бэкенд не ответил за отведённое время."""
+
+
+class ApiHTTPError(ApiError):
+    """Бэкенд ответил статусом 4xx/5xx или другим неожиданным статусом."""
+
+    def __init__(self, response: "ApiResponse"):
+        self.response = response
+        super().__init__(f"HTTP {response.status_code}: {response.url}")
+
+
+class ApiResponse:
+    """Полностью прочитанный ответ бэкенда."""
+
+    def __init__(self, status_code: int, url: str, content: bytes, headers: CIMultiDict, elapsed: float = 0.0):
+        self.status_code = status_code
+        self.url = url
+        self.content = content
+        self.headers = headers
+        self.elapsed = elapsed
+
+    def json(self):
+        """Разбирает тело ответа. При невалидном JSON бросает ValueError."""
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise ApiHTTPError(self)
+
+
+async def _on_request_chunk_sent(session, context, params):
+    progress = (context.trace_request_ctx or {}).get('progress')
+    if progress is not None:
+        progress(len(params.chunk))
+
+
+class ApiClient:
+    """
+    Асинхронный клиент бэкенда поверх одной общей aiohttp-сессии.
+    Соединения переиспользуются (keep-alive), у каждого вызова свой таймаут.
+    Колбэк progress(n) вызывается после отправки очередных n байт тела запроса.
+    """
+
+    def __init__(self, headers: dict = HEADER, timeout: float = API_TIMEOUT, pool_size: int = API_POOL_SIZE):
+        self.headers = headers
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._session: aiohttp.ClientSession | None = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Сессию нельзя создать при импорте: ей нужен запущенный event loop.
+        if self._session is None or self._session.closed:
+            trace_config = aiohttp.TraceConfig()
+            trace_config.on_request_chunk_sent.append(_on_request_chunk_sent)
+            self._session = aiohttp.ClientSession(
+                trace_configs=[trace_config],
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=aiohttp.TCPConnector(limit=self.pool_size, ssl=False),
+            )
+        return self._session
+
+    async def request(self, method: str, url: str, timeout: float | None = None, progress=None, **kwargs) -> ApiResponse:
+        if timeout is not None:
+            kwargs['timeout'] = aiohttp.ClientTimeout(total=timeout)
+        if progress is not None:
+            kwargs['trace_request_ctx'] = {'progress': progress}
+        started = time.perf_counter()
+        try:
+            async with self._get_session().request(method, url, **kwargs) as response:
+                content = await response.read()
+                elapsed = time.perf_counter() - started
+                return ApiResponse(response.status, str(response.url), content, CIMultiDict(response.headers), elapsed)
+        except asyncio.TimeoutError as e:
+            raise ApiTimeoutError("Сервер не отвечает (таймаут)") from e
+        except aiohttp.ClientError as e:
+            raise ApiError(str(e)) from e
+
+    async def download(self, url: str, destination: BinaryIO, timeout: float | None = None,
+                       chunk_size: int = 64 * 1024, **kwargs) -> ApiResponse:
+        """
+        GET-запрос, тело которого по кускам пишется в destination, не накапливаясь в памяти.
+        Тело сохраняется только при статусе 200; content у возвращаемого ответа пустой.
+        """
+        if timeout is not None:
+            kwargs['timeout'] = aiohttp.ClientTimeout(total=timeout)
+        started = time.perf_counter()
+        try:
+            async with self._get_session().get(url, **kwargs) as response:
+                if response.status == 200:
+                    async for chunk in response.content.iter_chunked(chunk_size):
+                        destination.write(chunk)
+                    destination.flush()
+                elapsed = time.perf_counter() - started
+                return ApiResponse(response.status, str(response.url), b'', CIMultiDict(response.headers), elapsed)
+        except asyncio.TimeoutError as e:
+            raise ApiTimeoutError("Сервер не отвечает (таймаут)") from e
+        except aiohttp.ClientError as e:
+            raise ApiError(str(e)) from e
+
+    async def get(self, url: str, **kwargs) -> ApiResponse:
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url: str, files: dict | None = None, **kwargs) -> ApiResponse:
+        """POST-запрос. files — как в requests: {'поле': (имя_файла, файл, content_type)}."""
+        if files:
+            form = aiohttp.FormData()
+            for field, (filename, fileobj, content_type) in files.items():
+                form.add_field(field, fileobj, filename=filename, content_type=content_type)
+            kwargs['data'] = form
+        return await self.request('POST', url, **kwargs)
+
+    async def delete(self, url: str, **kwargs) -> ApiResponse:
+        return await self.request('DELETE', url, **kwargs)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+
+api_client = ApiClient()
@@ -0,0 +1,178 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from multidict import CIMultiDict
+from database.upload_batches import upload_batches
+from utils.api_client import ApiClient, ApiResponse, ApiError, api_client
+from utils.helpers import split_upload
+from utils.parse_pool import parse_pool
+from utils.upload_file import UploadFile
+from settings.config import (
+    API_UPLOAD_TIMEOUT, UPLOAD_TMP_DIR, CASES_BATCH_CONCURRENCY, CASES_BATCH_RETRIES, CASES_BATCH_BACKOFF
+)
+
+
+logger = logging.getLogger(__name__)
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+class BatchUpload:
+    """
+    Загрузка большого файла пакетами по batch_size строк.
+    Пакеты уходят параллельно (не больше concurrency запросов), статус каждого пишется в upload_batches:
+    'done' — принят (201/207), 'rejected' — отклонён бэкендом (4xx), 'failed' — сеть или 5xx.
+    Повторы с экспоненциальной паузой берут из таблицы пакеты, ещё не дошедшие до 'done'/'rejected'.
+    Итог собирается по таблице в один ответ в формате бэкенда для handle_upload_response.
+    """
+
+    def __init__(self, url: str, batch_size: int, client: ApiClient = api_client,
+                 concurrency: int = CASES_BATCH_CONCURRENCY, retries: int = CASES_BATCH_RETRIES,
+                 backoff: float = CASES_BATCH_BACKOFF):
+        self.url = url
+        self.batch_size = batch_size
+        self.client = client
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.upload_id = uuid.uuid4().hex
+        # Тела принятых ответов для сборки итога; статусы живут в upload_batches
+        self.responses: dict[int, ApiResponse] = {}
+        self.finished = 0
+
+    async def run(self, upload_file: UploadFile, on_progress=None) -> ApiResponse:
+        """on_progress(завершено, всего) вызывается после каждого пакета, получившего окончательный статус."""
+        started = time.perf_counter()
+        batches = await parse_pool.run(
+            ('batches', self.upload_id), split_upload, upload_file.source(), self.batch_size, UPLOAD_TMP_DIR
+        )
+        try:
+            await upload_batches.start(self.upload_id, [batch['row_ranges'] for batch in batches])
+            semaphore = asyncio.Semaphore(self.concurrency)
+            for attempt in range(self.retries + 1):
+                pending = await upload_batches.get_pending(self.upload_id)
+                if not pending:
+                    break
+                if attempt:
+                    await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+                    logger.warning("Повтор пакетов %s (попытка %d)", pending, attempt + 1)
+                await asyncio.gather(*(self._send(semaphore, index, batches[index], on_progress, len(batches))
+                                       for index in pending))
+        finally:
+            for batch in batches:
+                try:
+                    os.unlink(batch['path'])
+                except FileNotFoundError:
+                    pass
+        return self._aggregate(await upload_batches.get(self.upload_id), time.perf_counter() - started)
+
+    async def _send(self, semaphore: asyncio.Semaphore, index: int, batch: dict, on_progress, total: int):
+        async with semaphore:
+            try:
+                # aiohttp закрывает файл после отправки
+                response = await self.client.post(
+                    self.url,
+                    files={'file': (f'batch_{index + 1}.xlsx', open(batch['path'], 'rb'), XLSX_CONTENT_TYPE)},
+                    timeout=API_UPLOAD_TIMEOUT,
+                )
+            except ApiError as e:
+                await upload_batches.finish(self.upload_id, index, 'failed', None, str(e))
+                return
+        if response.status_code in (201, 207):
+            self.responses[index] = response
+            await upload_batches.finish(self.upload_id, index, 'done', response.status_code)
+        elif response.status_code >= 500:
+            await upload_batches.finish(self.upload_id, index, 'failed', response.status_code,
+                                        self._error(response))
+            return
+        else:
+            # Тело 4xx с ошибками по строкам и полям попадёт в итоговый отчёт
+            self.responses[index] = response
+            await upload_batches.finish(self.upload_id, index, 'rejected', response.status_code,
+                                        self._error(response))
+        self.finished += 1
+        if on_progress is not None:
+            on_progress(self.finished, total)
+
+    @staticmethod
+    def _error(response: ApiResponse) -> str:
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        error = body.get('error') if isinstance(body, dict) else None
+        return error or f'HTTP {response.status_code}'
+
+    def _aggregate(self, rows: list[tuple], elapsed: float) -> ApiResponse:
+        """
+        Склеивает ответы принятых пакетов по строкам upload_batches.
+        Номера строк в serialization_errors пакета переводятся в номера строк исходного файла по отрезкам пакета.
+        У отклонённых пакетов ошибки по строкам идут в serialization_errors, ошибки полей — в запись failed_batches.
+        """
+        data = {'new_users': [], 'missing_users': [], 'serialization_errors': [], 'activities_without_cases': [],
+                'failed_batches': []}
+        accepted = 0
+        partial = False
+        for batch, ranges, count, status, status_code, error, attempts in rows:
+            body = self._body(batch)
+            if status != 'done':
+                failure = f"Строки {ranges[0][0]}–{ranges[-1][1]}: {error or status}"
+                if status == 'rejected':
+                    _add_serialization_errors(data, ranges, body.get('serialization_errors'))
+                    details = [
+                        f"{field}: {m}"
+                        for field, messages in body.items() if field not in ('error', 'serialization_errors')
+                        for m in (messages if isinstance(messages, list) else [messages])
+                    ]
+                    if details:
+                        failure += f" ({'; '.join(details)})"
+                data['failed_batches'].append(failure)
+                continue
+            accepted += 1
+            partial |= status_code == 207
+            data['new_users'] += body.get('new_users') or []
+            data['activities_without_cases'] += body.get('activities_without_cases') or []
+            for user in body.get('missing_users') or []:
+                if user not in data['missing_users']:
+                    data['missing_users'].append(user)
+            _add_serialization_errors(data, ranges, body.get('serialization_errors'))
+
+        if data['failed_batches'] or partial:
+            status_code = 207
+            data['message'] = f"Загружено пакетов: {accepted} из {len(rows)}"
+        else:
+            status_code = 201
+            data['message'] = f"Файл загружен пакетами: {len(rows)}"
+        return ApiResponse(status_code, self.url, json.dumps(data, ensure_ascii=False).encode(), CIMultiDict(), elapsed)
+
+    def _body(self, batch: int) -> dict:
+        response = self.responses.get(batch)
+        if response is None:
+            return {}
+        try:
+            body = response.json()
+        except ValueError:
+            return {}
+        return body if isinstance(body, dict) else {}
+
+
+def _add_serialization_errors(data: dict, ranges: list[list[int]], items: list | None):
+    for item in items or []:
+        row = item.get('row')
+        # В файле пакета заголовок — строка 1, первая строка данных — 2
+        sheet_row = _sheet_row(ranges, row - 2) if isinstance(row, int) else None
+        data['serialization_errors'].append({**item, 'row': row if sheet_row is None else sheet_row})
+
+
+def _sheet_row(ranges: list[list[int]], position: int) -> int | None:
+    """Номер строки листа для position-й (с нуля) строки пакета; None, если такой строки в пакете нет."""
+    if position < 0:
+        return None
+    for start, end in ranges:
+        if position <= end - start:
+            return start + position
+        position -= end - start + 1
+    return None
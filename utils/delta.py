@@ -0,0 +1,72 @@
+from io import BytesIO
+import numpy as np
+import pandas as pd
+
+
+def row_fingerprints(chunk: pd.DataFrame, columns: list[str], key_column: str) -> pd.Series:
+    """
+    Векторно считает 64-битный хэш значений columns для каждой строки.
+    Индекс результата — ключ строки (значение key_column без пробелов по краям).
+    """
+    hashes = pd.util.hash_pandas_object(chunk[columns].astype(str), index=False)
+    keys = chunk[key_column].astype(str).str.strip()
+    # В SQLite INTEGER знаковый, поэтому uint64 переинтерпретируется как int64 без потери битов
+    return pd.Series(hashes.to_numpy().view('int64'), index=keys.to_numpy())
+
+
+def _compare(previous: pd.Series, current: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """Маски строк current: ключа нет в previous (новые) и ключ есть, но хэш другой (изменённые)."""
+    positions = previous.index.get_indexer(current.index)
+    is_new = positions == -1
+    is_changed = ~is_new & (previous.to_numpy()[positions] != current.to_numpy())
+    return is_new, is_changed
+
+
+class DeltaBuilder:
+    """
+    Сравнивает строки файла с отпечатками последней принятой загрузки по мере чтения чанков.
+    При keep_rows откладывает новые и изменённые строки, чтобы отправить на бэкенд только их.
+    """
+
+    def __init__(self, config: dict, previous: pd.Series | None, keep_rows: bool = False):
+        self.columns = config['columns']
+        self.key_column = config['key_column']
+        self.previous = previous
+        self.keep_rows = keep_rows and previous is not None
+        self._fingerprints: list[pd.Series] = []
+        self._rows: list[pd.DataFrame] = []
+        self.total = 0
+
+    def add(self, chunk: pd.DataFrame):
+        fingerprints = row_fingerprints(chunk, self.columns, self.key_column)
+        self._fingerprints.append(fingerprints)
+        self.total += len(chunk)
+        if self.keep_rows:
+            is_new, is_changed = _compare(self.previous, fingerprints)
+            self._rows.append(chunk.loc[is_new | is_changed, self.columns])
+
+    def result(self) -> dict:
+        """
+        {'fingerprints': Series, 'compared': bool, 'new': N, 'changed': M, 'removed': K, 'delta_file': bytes | None}.
+        compared=False — сравнивать не с чем: категорию ещё не загружали.
+        delta_file — XLSX только с новыми и изменёнными строками; собирается, если он меньше исходного файла.
+        """
+        current = pd.concat(self._fingerprints) if self._fingerprints else pd.Series(dtype='int64')
+        current = current[~current.index.duplicated(keep='last')]
+        if self.previous is None:
+            return {'fingerprints': current, 'compared': False, 'new': len(current), 'changed': 0, 'removed': 0,
+                    'delta_file': None}
+
+        is_new, is_changed = _compare(self.previous, current)
+        new = int(is_new.sum())
+        changed = int(is_changed.sum())
+        removed = int((~self.previous.index.isin(current.index)).sum())
+
+        delta_file = None
+        delta_rows = pd.concat(self._rows, ignore_index=True) if self._rows else None
+        if delta_rows is not None and 0 < len(delta_rows) < self.total:
+            delta_file = BytesIO()
+            delta_rows.to_excel(delta_file, index=False)
+            delta_file = delta_file.getvalue()
+        return {'fingerprints': current, 'compared': True, 'new': new, 'changed': changed, 'removed': removed,
+                'delta_file': delta_file}
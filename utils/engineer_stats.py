@@ -0,0 +1,103 @@
+import html
+from collections import OrderedDict
+import pandas as pd
+from utils.api_client import ApiResponse
+from settings.config import ENGINEERS_PAGE_SIZE, ENGINEERS_VIEWS
+
+SORTS = {
+    'default': 'по списку',
+    'sent': 'по отправленным',
+    'unsent': 'по неотправленным',
+}
+
+
+class EngineerStats:
+    """
+    Снимок /stats/all, разобранный в DataFrame один раз: имя, отправлено, не отправлено.
+    Отсортированные и отфильтрованные представления считаются по запросу и запоминаются
+    (не больше max_views, вытесняются самые давно использованные), страница — срез готового представления.
+    """
+
+    def __init__(self, data: dict, page_size: int = ENGINEERS_PAGE_SIZE, max_views: int = ENGINEERS_VIEWS):
+        self.page_size = page_size
+        self.max_views = max_views
+        engineers = data.get('engineers') or []
+        totals = data.get('total_feedbacks') or {}
+        self.total_sent = totals.get('total_sent', 0)
+        self.total_unsent = totals.get('total_unsent', 0)
+
+        names = pd.Series([str(engineer.get('engineer') or '—') for engineer in engineers], dtype=object)
+        stats = pd.Series([str(engineer.get('feedback_stats') or '—') for engineer in engineers], dtype=object)
+        # feedback_stats приходит строкой «отправлено/не отправлено»; нераспознанное считается нулями
+        counts = stats.str.extract(r'^\s*(\d+)\s*/\s*(\d+)\s*$')
+        self.df = pd.DataFrame({
+            'name': names,
+            'search': names.str.lower(),
+            'stats': stats,
+            'sent': pd.to_numeric(counts[0], errors='coerce').fillna(0).astype(int),
+            'unsent': pd.to_numeric(counts[1], errors='coerce').fillna(0).astype(int),
+        })
+        self._views: OrderedDict[tuple[str, str], pd.DataFrame] = OrderedDict()
+
+    def view(self, sort: str = 'default', query: str = '') -> pd.DataFrame:
+        query = query.strip().lower()
+        key = (sort, query)
+        view = self._views.get(key)
+        if view is not None:
+            self._views.move_to_end(key)
+            return view
+        view = self.df
+        if query:
+            view = view[view['search'].str.contains(query, regex=False)]
+        if sort in ('sent', 'unsent'):
+            view = view.sort_values([sort, 'name'], ascending=[False, True], kind='stable')
+        if self.max_views > 0:
+            self._views[key] = view
+            while len(self._views) > self.max_views:
+                self._views.popitem(last=False)
+        return view
+
+    def render(self, page: int = 0, sort: str = 'default', query: str = '') -> tuple[str, int, int]:
+        """HTML страницы, номер страницы (после ограничения диапазоном) и число страниц."""
+        view = self.view(sort, query)
+        total_pages = max(1, -(-len(view) // self.page_size))
+        page = max(0, min(page, total_pages - 1))
+        rows = view.iloc[page * self.page_size:(page + 1) * self.page_size]
+
+        lines = [f"📋 <b>Опрашиваемые инженеры</b> ({len(view)} из {len(self.df)})"]
+        if query:
+            lines.append(f"🔎 Поиск: «{html.escape(query)}»")
+        lines.append(f"↕️ Сортировка: {SORTS.get(sort, SORTS['default'])}")
+        lines.append("👷‍♂️ <b>Имя Фамилия</b> — <b>Отправлено/Не отправлено</b>\n")
+        if rows.empty:
+            lines.append("Нет инженеров по этому запросу." if query else "Нет инженеров с проектами.")
+        else:
+            lines.extend(
+                ("👷‍♂️ " + rows['name'].map(html.escape) + " — " + rows['stats'].map(html.escape)).tolist()
+            )
+        lines.append("\n📊 <b>Общая статистика:</b>")
+        lines.append(f"✅ Отправлено: {self.total_sent}")
+        lines.append(f"❌ Не отправлено: {self.total_unsent}")
+        lines.append(f"<i>Страница {page + 1} из {total_pages}</i>")
+        return "\n".join(lines), page, total_pages
+
+
+class EngineerStatsSnapshots:
+    """
+    Разобранный снимок для последнего ответа /stats/all. api_cache отдаёт один и тот же объект ответа,
+    пока не истёк TTL, поэтому снимок пересобирается только после нового запроса к бэкенду.
+    """
+
+    def __init__(self):
+        self._response: ApiResponse | None = None
+        self._stats: EngineerStats | None = None
+
+    def get(self, response: ApiResponse) -> EngineerStats:
+        """Бросает ValueError, если тело ответа — не JSON."""
+        if response is not self._response:
+            self._stats = EngineerStats(response.json())
+            self._response = response
+        return self._stats
+
+
+engineer_stats = EngineerStatsSnapshots()
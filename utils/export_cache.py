@@ -0,0 +1,76 @@
+import logging
+import os
+import tempfile
+from utils.api_client import ApiClient, ApiHTTPError, api_client
+from settings.config import API_UPLOAD_TIMEOUT, UPLOAD_TMP_DIR
+
+
+logger = logging.getLogger(__name__)
+
+
+class ExportCache:
+    """
+    Последняя скачанная выгрузка на диске вместе с её ETag/Last-Modified.
+    Выгрузка скачивается потоком во временный файл; если бэкенд ответил 304,
+    повторно отдаётся уже сохранённый файл.
+    """
+
+    def __init__(self, client: ApiClient, tmp_dir: str | None = UPLOAD_TMP_DIR):
+        self.client = client
+        self.tmp_dir = tmp_dir
+        self.path: str | None = None
+        self.etag: str | None = None
+        self.last_modified: str | None = None
+
+    def _conditional_headers(self) -> dict:
+        headers = {}
+        if self.path is None:
+            return headers
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    async def fetch(self, url: str, timeout: float = API_UPLOAD_TIMEOUT) -> str:
+        """Возвращает путь к актуальной выгрузке. Любой ответ, кроме 200 и 304, — ApiHTTPError."""
+        with tempfile.NamedTemporaryFile(suffix='.xlsx', dir=self.tmp_dir, delete=False) as temp_file:
+            try:
+                response = await self.client.download(
+                    url, temp_file, timeout=timeout, headers=self._conditional_headers()
+                )
+            except BaseException:
+                temp_file.close()
+                os.unlink(temp_file.name)
+                raise
+
+        if response.status_code == 304 and self.path is not None:
+            os.unlink(temp_file.name)
+            logger.info("Выгрузка не изменилась, отправляю сохранённую копию")
+            return self.path
+
+        if response.status_code != 200:
+            os.unlink(temp_file.name)
+            raise ApiHTTPError(response)
+
+        self._drop_file()
+        self.path = temp_file.name
+        self.etag = response.headers.get('ETag')
+        self.last_modified = response.headers.get('Last-Modified')
+        return self.path
+
+    def _drop_file(self):
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+        self.path = None
+
+    def close(self):
+        self._drop_file()
+        self.etag = None
+        self.last_modified = None
+
+
+export_cache = ExportCache(api_client)
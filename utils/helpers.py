@@ -1,29 +1,205 @@
-from settings.config import URL_WEB_SITE
+from settings.config import URL_WEB_SITE, EXCEL_CHUNK_SIZE, CASE_PRIORITIES, CASE_STATUSES, CASES_BATCH_SIZE
+from collections import Counter
+from collections.abc import Iterator
+import os
+import tempfile
 from io import BytesIO
+from utils.upload_file import open_source
+from utils.delta import DeltaBuilder
+from utils.validation import RowValidator
+from openpyxl import load_workbook
+import numpy as np
 import pandas as pd
 
 
 # Upload_files
-def read_excel(file_stream: BytesIO) -> pd.DataFrame | None:
+def read_excel_header(file_stream: BytesIO) -> list[str] | None:
+    """
+    Читает только строку заголовков первого листа — без разбора данных.
+    Возвращает None, если файл не читается. Позиция потока возвращается в начало.
+    """
     try:
-        return pd.read_excel(file_stream)
+        workbook = load_workbook(file_stream, read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(min_row=1, max_row=1, values_only=True)
+            return [str(cell) for cell in next(rows, ()) if cell is not None]
+        finally:
+            workbook.close()
     except Exception:
         return None
+    finally:
+        file_stream.seek(0)
+
+
+def detect_category(header: list[str]) -> str | None:
+    """Определяет категорию загрузки, которой соответствуют заголовки файла."""
+    configs = {category: get_category_config(category) for category in UPLOAD_CATEGORIES}
+    # Сначала категории с бОльшим числом столбцов: так выбирается самая точная
+    for category in sorted(configs, key=lambda c: len(configs[c]['columns']), reverse=True):
+        if validate_header(header, configs[category]['columns']):
+            return category
+    return None
+
+
+def iter_excel_chunks(file_stream: BytesIO, chunk_size: int = EXCEL_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Построчно читает первый лист (openpyxl, read_only) и отдаёт DataFrame по chunk_size строк.
+    Первая строка листа — заголовки. Пустые строки пропускаются, индекс чанка — номера строк листа
+    в Excel, чтобы ошибки ссылались на строки, которые видит пользователь. Первый чанк отдаётся всегда,
+    даже пустой, чтобы по нему можно было проверить столбцы.
+    """
+    workbook = load_workbook(file_stream, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(cell) if cell is not None else '' for cell in next(rows, ())]
+        width = len(header)
+        chunk = []
+        numbers = []
+        sent = False
+        for number, row in enumerate(rows, start=2):
+            if all(cell is None for cell in row):
+                continue
+            chunk.append(row[:width])
+            numbers.append(number)
+            if len(chunk) >= chunk_size:
+                yield pd.DataFrame(chunk, columns=header, index=pd.Index(numbers, dtype='int64'))
+                chunk, numbers = [], []
+                sent = True
+        if chunk or not sent:
+            yield pd.DataFrame(chunk, columns=header, index=pd.Index(numbers, dtype='int64'))
+    finally:
+        workbook.close()
+
+
+def read_excel_preview(file_stream: BytesIO, config: dict, chunk_size: int = EXCEL_CHUNK_SIZE,
+                       on_chunk=None) -> pd.DataFrame | None:
+    """
+    Потоково читает файл и собирает только данные для превью категории:
+    столбцы config['preview_columns'] или количество строк по config['count_by'].
+    Пиковая память ограничена размером чанка, а не файла. on_chunk(chunk), если задан,
+    получает каждый чанк целиком — так за тот же проход считаются отпечатки строк.
+    Столбцы должны быть проверены заранее (read_excel_header). Возвращает None, если файл не читается.
+    """
+    count_by = config.get('count_by')
+    preview_columns = config.get('preview_columns', [])
+    counts = Counter()
+    parts = []
+    try:
+        for chunk in iter_excel_chunks(file_stream, chunk_size):
+            if on_chunk is not None:
+                on_chunk(chunk)
+            if count_by:
+                counts.update(chunk[count_by].value_counts().to_dict())
+            else:
+                parts.append(chunk[preview_columns])
+    except Exception:
+        return None
+
+    if count_by:
+        return pd.DataFrame(counts.most_common(), columns=[count_by, 'Кол-во кейсов'])
+    return pd.concat(parts, ignore_index=True)
+
+
+def parse_upload(source: bytes | str, category: str, previous: pd.Series | None = None, build_delta: bool = False) -> dict:
+    """
+    Проверяет заголовки и собирает превью загрузки. Выполняется в процессе пула,
+    поэтому принимает содержимое файла или путь к нему (UploadFile.source())
+    и возвращает только компактный результат:
+    {'preview': DataFrame}, {'error': 'read'}, {'error': 'columns', 'suggested': категория | None}
+    или {'error': 'rows', 'errors': [...], 'error_count': N} — строки не прошли RowValidator.
+    Для категорий с config['key_column'] в результат добавляется 'delta' (DeltaBuilder.result)
+    относительно отпечатков previous; при build_delta — с файлом только из изменившихся строк.
+    """
+    config = get_category_config(category)
+    delta = DeltaBuilder(config, previous, keep_rows=build_delta) if config.get('key_column') else None
+    validator = RowValidator(config) if config.get('required_columns') else None
+    handlers = [handler.add for handler in (delta, validator) if handler is not None]
+
+    def on_chunk(chunk):
+        for handler in handlers:
+            handler(chunk)
+
+    with open_source(source) as file_stream:
+        header = read_excel_header(file_stream)
+        if header is None:
+            return {'error': 'read'}
+        if not validate_header(header, config['columns']):
+            return {'error': 'columns', 'suggested': detect_category(header)}
+        preview = read_excel_preview(file_stream, config, on_chunk=on_chunk if handlers else None)
+    if preview is None:
+        return {'error': 'read'}
+    invalid = validator.result() if validator else None
+    if invalid:
+        return {'error': 'rows', **invalid}
+    if delta is None:
+        return {'preview': preview}
+    return {'preview': preview, 'delta': delta.result()}
+
+
+def row_ranges(numbers: pd.Index) -> list[list[int]]:
+    """
+    Возрастающие номера строк одним списком отрезков [первая, последняя].
+    Строки без пропусков дают один отрезок, каждая пустая строка листа между ними — ещё один.
+    """
+    values = numbers.to_numpy()
+    if not len(values):
+        return []
+    breaks = np.flatnonzero(np.diff(values) != 1)
+    starts = values[np.r_[0, breaks + 1]]
+    ends = values[np.r_[breaks, len(values) - 1]]
+    return [[int(start), int(end)] for start, end in zip(starts, ends)]
+
+
+def split_upload(source: bytes | str, batch_size: int, tmp_dir: str | None = None) -> list[dict]:
+    """
+    Разбивает файл на XLSX-пакеты по batch_size строк с теми же заголовками. Выполняется в процессе пула.
+    Возвращает [{'path': временный файл, 'row_ranges': строки пакета в Excel (row_ranges), 'rows': N}]
+    (строка 1 — заголовок, как в RowValidator); удалять файлы — забота вызывающего.
+    """
+    batches = []
+    try:
+        with open_source(source) as file_stream:
+            for chunk in iter_excel_chunks(file_stream, batch_size):
+                if chunk.empty:
+                    continue
+                with tempfile.NamedTemporaryFile(suffix='.xlsx', dir=tmp_dir, delete=False) as batch_file:
+                    batches.append({
+                        'path': batch_file.name, 'row_ranges': row_ranges(chunk.index), 'rows': len(chunk)
+                    })
+                    chunk.to_excel(batch_file, index=False)
+    except BaseException:
+        for batch in batches:
+            os.unlink(batch['path'])
+        raise
+    return batches
+
+
+UPLOAD_CATEGORIES = ('upload_engineers', 'upload_cases', 'upload_managers')
 
 
 def get_category_config(category: str) -> dict | None:
     return {
         'upload_managers': {
             'url': f'{URL_WEB_SITE}/api/v1/activities/',
-            'columns': ['Код активности', 'Название активности', 'Сервис-менеджер']
+            'columns': ['Код активности', 'Название активности', 'Сервис-менеджер'],
+            'preview_columns': ['Название активности', 'Сервис-менеджер'],
+            'key_column': 'Код активности'
         },
         'upload_cases': {
             'url': f'{URL_WEB_SITE}/api/v1/cases/',
-            'columns': ['Код', 'Создано', 'Дата решения', 'Приоритет', 'Статус', 'Тема', 'Описание', 'Автор', 'Исполнитель', 'Активность', 'Вендор', 'Рабочая группа', 'Описание решения', 'Код решения', 'Организация']
+            'columns': ['Код', 'Создано', 'Дата решения', 'Приоритет', 'Статус', 'Тема', 'Описание', 'Автор', 'Исполнитель', 'Активность', 'Вендор', 'Рабочая группа', 'Описание решения', 'Код решения', 'Организация'],
+            'count_by': 'Исполнитель',
+            'required_columns': ['Код', 'Создано', 'Приоритет', 'Статус', 'Исполнитель'],
+            'date_columns': ['Создано', 'Дата решения'],
+            'allowed_values': {'Приоритет': CASE_PRIORITIES, 'Статус': CASE_STATUSES},
+            'unique_column': 'Код',
+            'batch_size': CASES_BATCH_SIZE
         },
         'upload_engineers': {
             'url': f'{URL_WEB_SITE}/api/v1/users/',
-            'columns': ['Почта', 'ФИ']
+            'columns': ['Почта', 'ФИ'],
+            'preview_columns': ['Почта', 'ФИ'],
+            'key_column': 'Почта'
         },
         'download_xlsx': {
             'url': f'{URL_WEB_SITE}/api/v1/activities/export/',
@@ -32,11 +208,5 @@ def get_category_config(category: str) -> dict | None:
     }.get(category)
 
 
-async def get_file_stream(message) -> BytesIO:
-    file = await message.bot.download(message.document.file_id)
-    file.seek(0)
-    return BytesIO(file.read())
-
-
-def validate_columns(df: pd.DataFrame, required: list[str]) -> bool:
-    return all(col in df.columns for col in required)
+def validate_header(header: list[str], required: list[str]) -> bool:
+    return all(col in header for col in required)
@@ -1,87 +1,96 @@
 import pandas as pd
 
 
-def generate_engineers_preview(df: pd.DataFrame, page: int = 0, max_rows: int = 10) -> tuple[str, int, int]:
+class PreviewPages:
     """
-    Генерирует HTML-превью для списка инженеров из DataFrame с пагинацией.
-    Возвращает HTML-код, текущую страницу и общее количество страниц.
+    Пагинированное превью одной загрузки.
+    Строки страницы форматируются векторно одним проходом по срезу DataFrame,
+    каждая страница рендерится не больше одного раза и дальше берётся из кэша.
     """
-    start = page * max_rows
-    end = start + max_rows
-    total_pages = (len(df) + max_rows - 1) // max_rows
 
-    html = '<b>📋 Превью инженеров</b>\n'
-    html += '<i>Листайте, чтобы просмотреть записи</i>\n'
-    html += '<pre>┌' + '─' * 48 + '┐\n'
-
-    html += f"│ {'📧 Почта':<23} │ {'👤 ФИ':<20} │\n"
-    html += '├' + '─' * 48 + '┤\n'
-
-    for index, row in df[start:end].iterrows():
-        username = row.get('Почта', '—')[:25]
-        first_name = row.get('ФИ', '—')[:25]
-        html += f"│ {username:<23} │ {first_name:<20} │\n"
-
-    html += '└' + '─' * 48 + '┘\n'
-    html += f'<i>Страница {page + 1} из {total_pages}</i></pre>'
-
-    return html, page, total_pages
-
-
-def generate_cases_preview(df: pd.DataFrame, page: int = 0, max_rows: int = 10) -> tuple[str, int, int]:
-    """
-    Генерирует HTML-превью для списка кейсов из DataFrame с пагинацией, показывая уникальных исполнителей и их количество кейсов.
-    Возвращает HTML-код, текущую страницу и общее количество страниц.
-    """
-    case_counts = df['Исполнитель'].value_counts().reset_index()
-    case_counts.columns = ['Исполнитель', 'Кол-во кейсов']
-
-    start = page * max_rows
-    end = start + max_rows
-    total_pages = (len(case_counts) + max_rows - 1) // max_rows
-
-    html = '<b>📋 Превью кейсов</b>\n'
-    html += '<i>Листайте, чтобы просмотреть записи</i>\n'
-    html += '<pre>┌' + '─' * 48 + '┐\n'
-
-    html += f"│ {'👤 Исполнитель':<23} │ {'📊 Кол-во кейсов':<20} │\n"
-    html += '├' + '─' * 48 + '┤\n'
-
-    for index, row in case_counts[start:end].iterrows():
-        executor = str(row['Исполнитель'])[:25]
-        count = row['Кол-во кейсов']
-        html += f"│ {executor:<23} │ {count:<20} │\n"
-
-    html += '└' + '─' * 48 + '┘\n'
-    html += f'<i>Страница {page + 1} из {total_pages}</i></pre>'
-
-    return html, page, total_pages
-
-
-def generate_managers_preview(df: pd.DataFrame, page: int = 0, max_rows: int = 10) -> tuple[str, int, int]:
-    """
-    Генерирует HTML-превью для списка активностей из DataFrame с пагинацией.
-    Возвращает HTML-код, текущую страницу и общее количество страниц.
-    """
-    start = page * max_rows
-    end = start + max_rows
-    total_pages = (len(df) + max_rows - 1) // max_rows
-
-    html = '<b>📋 Превью активностей</b>\n'
-    html += '<i>Листайте, чтобы просмотреть записи</i>\n'
-    html += '<pre>┌' + '─' * 48 + '┐\n'
-
-    html += f"│ {'📋 Название активности':<23} │ {'👤 Сервис-менеджер':<20} │\n"
-    html += '├' + '─' * 48 + '┤\n'
-
-    for index, row in df[start:end].iterrows():
-        activity_name = str(row.get('Название активности', '—'))[:20]  # Сокращаем до 20 символов
-        if len(str(row.get('Название активности', ''))) > 20:
-            activity_name += '...'  # Добавляем многоточие, если обрезано
-        manager = str(row.get('Сервис-менеджер', '—'))[:20]
-        html += f"│ {activity_name:<23} │ {manager:<20} │\n"
-
-    html += '└' + '─' * 48 + '┘\n'
-    html += f'<i>Страница {page + 1} из {total_pages}</i></pre>'
-
-    return html, page, total_pages
\ No newline at end of file
+    def __init__(self, title: str, header: str, df: pd.DataFrame, format_lines, max_rows: int = 10):
+        self.title = title
+        self.header = header
+        self.df = df
+        self.format_lines = format_lines
+        self.max_rows = max_rows
+        self.total_pages = (len(df) + max_rows - 1) // max_rows
+        self.summary: str | None = None
+        self._pages: dict[int, str] = {}
+
+    def set_summary(self, summary: str | None):
+        """Строка под заголовком на каждой странице (например, сводка изменений)."""
+        self.summary = summary
+        self._pages.clear()
+
+    def render(self, page: int = 0) -> tuple[str, int, int]:
+        """Возвращает HTML-код страницы, номер страницы и общее количество страниц."""
+        page = max(0, min(page, self.total_pages - 1))
+        html = self._pages.get(page)
+        if html is None:
+            html = self._render(page)
+            self._pages[page] = html
+        return html, page, self.total_pages
+
+    def _render(self, page: int) -> str:
+        start = page * self.max_rows
+        rows = ''.join(self.format_lines(self.df.iloc[start:start + self.max_rows]))
+        summary = f'{self.summary}\n' if self.summary else ''
+        return (
+            f'<b>{self.title}</b>\n'
+            f'{summary}'
+            '<i>Листайте, чтобы просмотреть записи</i>\n'
+            '<pre>┌' + '─' * 48 + '┐\n'
+            f'{self.header}'
+            '├' + '─' * 48 + '┤\n'
+            f'{rows}'
+            '└' + '─' * 48 + '┘\n'
+            f'<i>Страница {page + 1} из {self.total_pages}</i></pre>'
+        )
+
+
+def _table_lines(left: pd.Series, right: pd.Series) -> list[str]:
+    return ('│ ' + left.str.ljust(23) + ' │ ' + right.str.ljust(20) + ' │\n').tolist()
+
+
+def _engineers_lines(df: pd.DataFrame) -> list[str]:
+    return _table_lines(
+        df['Почта'].fillna('—').astype(str).str.slice(0, 25),
+        df['ФИ'].fillna('—').astype(str).str.slice(0, 25),
+    )
+
+
+def _case_counts_lines(case_counts: pd.DataFrame) -> list[str]:
+    return _table_lines(
+        case_counts['Исполнитель'].astype(str).str.slice(0, 25),
+        case_counts['Кол-во кейсов'].astype(str),
+    )
+
+
+def _managers_lines(df: pd.DataFrame) -> list[str]:
+    names = df['Название активности'].fillna('—').astype(str)
+    short_names = names.str.slice(0, 20).where(names.str.len() <= 20, names.str.slice(0, 20) + '...')
+    return _table_lines(short_names, df['Сервис-менеджер'].fillna('—').astype(str).str.slice(0, 20))
+
+
+def build_engineers_pages(df: pd.DataFrame, max_rows: int = 10) -> PreviewPages:
+    header = f"│ {'📧 Почта':<23} │ {'👤 ФИ':<20} │\n"
+    return PreviewPages('📋 Превью инженеров', header, df, _engineers_lines, max_rows)
+
+
+def build_case_counts_pages(case_counts: pd.DataFrame, max_rows: int = 10) -> PreviewPages:
+    """Агрегат по исполнителям считается один раз при чтении файла (read_excel_preview)."""
+    header = f"│ {'👤 Исполнитель':<23} │ {'📊 Кол-во кейсов':<20} │\n"
+    return PreviewPages('📋 Превью кейсов', header, case_counts, _case_counts_lines, max_rows)
+
+
+def build_managers_pages(df: pd.DataFrame, max_rows: int = 10) -> PreviewPages:
+    header = f"│ {'📋 Название активности':<23} │ {'👤 Сервис-менеджер':<20} │\n"
+    return PreviewPages('📋 Превью активностей', header, df, _managers_lines, max_rows)
+
+
+PREVIEW_BUILDERS = {
+    'upload_engineers': build_engineers_pages,
+    'upload_cases': build_case_counts_pages,
+    'upload_managers': build_managers_pages,
+}
@@ -0,0 +1,112 @@
+import asyncio
+import logging
+from aiogram.types import Message
+from settings.config import JOB_WORKERS, JOB_PROGRESS_INTERVAL
+
+
+logger = logging.getLogger(__name__)
+
+# Порядок, в котором бэкенд ждёт данные: кейсы ссылаются на инженеров, активности — на кейсы.
+# Задача стартует только после всех ранее поставленных задач с тем же или меньшим рангом.
+CATEGORY_ORDER = {
+    'upload_engineers': 0,
+    'upload_cases': 1,
+    'upload_managers': 2,
+    'download_xlsx': 3,
+}
+
+
+class Job:
+    """
+    Фоновая задача загрузки/выгрузки с одним статусным сообщением.
+    Текст статуса меняется через set_status, в Telegram уходит не чаще progress_interval.
+    """
+
+    def __init__(self, category: str, func, status_message: Message, after: list["Job"], progress_interval: float):
+        self.category = category
+        self.func = func
+        self.status_message = status_message
+        self.after = after
+        self.progress_interval = progress_interval
+        self.done = asyncio.Event()
+        self.status = status_message.text
+        self._shown_status = self.status
+
+    def set_status(self, status: str):
+        self.status = status
+
+    async def _show_status(self):
+        if self.status == self._shown_status:
+            return
+        self._shown_status = self.status
+        try:
+            await self.status_message.edit_text(self.status)
+        except Exception:
+            logger.debug("Не удалось обновить статус задачи %s", self.category, exc_info=True)
+
+    async def _report_progress(self):
+        while True:
+            await self._show_status()
+            await asyncio.sleep(self.progress_interval)
+
+    async def run(self):
+        for job in self.after:
+            await job.done.wait()
+        reporter = asyncio.create_task(self._report_progress())
+        try:
+            await self.func(self)
+        except Exception as e:
+            logger.exception("Фоновая задача %s завершилась с ошибкой", self.category)
+            self.set_status(f"❌ Ошибка: {str(e)}")
+        finally:
+            reporter.cancel()
+            await self._show_status()
+            self.done.set()
+
+
+class JobQueue:
+    """Очередь фоновых задач с фиксированным числом воркеров."""
+
+    def __init__(self, workers: int = JOB_WORKERS, progress_interval: float = JOB_PROGRESS_INTERVAL):
+        self.workers = workers
+        self.progress_interval = progress_interval
+        self._queue: asyncio.Queue[Job] = asyncio.Queue()
+        self._pending: list[Job] = []
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self):
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, category: str, status_message: Message, func) -> Job:
+        """
+        Ставит задачу в очередь и сразу возвращает управление.
+        func(job) — корутина, выполняющая работу и сообщающая статус через job.set_status.
+        """
+        rank = CATEGORY_ORDER.get(category, len(CATEGORY_ORDER))
+        after = [job for job in self._pending if CATEGORY_ORDER.get(job.category, rank) <= rank]
+        job = Job(category, func, status_message, after, self.progress_interval)
+        self._pending.append(job)
+        self._queue.put_nowait(job)
+        return job
+
+    @property
+    def size(self) -> int:
+        return len(self._pending)
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await job.run()
+            finally:
+                self._pending.remove(job)
+                self._queue.task_done()
+
+
+job_queue = JobQueue()
@@ -0,0 +1,38 @@
+from collections import OrderedDict
+from settings.config import PARSE_CACHE_SIZE
+
+
+class ParseCache:
+    """
+    Результаты parse_upload по (sha256 файла, категория): повторно присланный файл не разбирается заново.
+    Хранится не больше max_entries результатов, вытесняются самые давно использованные.
+    """
+
+    def __init__(self, max_entries: int = PARSE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._results: OrderedDict[tuple[str, str], dict] = OrderedDict()
+
+    def get(self, digest: str, category: str) -> dict | None:
+        result = self._results.get((digest, category))
+        if result is not None:
+            self._results.move_to_end((digest, category))
+        return result
+
+    def put(self, digest: str, category: str, result: dict):
+        if self.max_entries <= 0:
+            return
+        self._results[(digest, category)] = result
+        self._results.move_to_end((digest, category))
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+
+    def discard_category(self, category: str):
+        """Сбрасывает результаты категории: их сводка изменений посчитана от устаревших отпечатков."""
+        for key in [key for key in self._results if key[1] == category]:
+            del self._results[key]
+
+    def __len__(self):
+        return len(self._results)
+
+
+parse_cache = ParseCache()
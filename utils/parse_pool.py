@@ -0,0 +1,84 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from settings.config import PARSE_WORKERS, PARSE_QUEUE_SIZE
+
+
+class ParseQueueFull(Exception):
+    """Все места в очереди разбора заняты."""
+
+
+class ParseCancelled(Exception):
+    """Разбор отменён пользователем или заменён разбором нового файла из того же чата."""
+
+    def __init__(self, replaced: bool = False):
+        super().__init__()
+        self.replaced = replaced
+
+
+class ParsePool:
+    """
+    Пул процессов для CPU-тяжёлого разбора Excel и агрегации превью вне event loop.
+    Одновременно принимается не больше max_pending задач, задачу можно отменить по ключу (chat_id).
+    Отменённая задача, уже начатая в процессе, доработает там, но её результат будет отброшен.
+    В демоническом процессе дочерние процессы запрещены, там разбор идёт в пуле потоков.
+    """
+
+    def __init__(self, workers: int = PARSE_WORKERS, max_pending: int = PARSE_QUEUE_SIZE):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Executor | None = None
+        self._running: dict[int, asyncio.Future] = {}
+        # Задачи, отменённые через cancel(), в отличие от отмены самой ожидающей корутины;
+        # значение — отменена ли задача новой задачей с тем же ключом
+        self._cancelled: dict[asyncio.Future, bool] = {}
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if multiprocessing.current_process().daemon:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='parse')
+            else:
+                # spawn: родитель многопоточный (поток БД, aiohttp), fork в таком процессе небезопасен
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    async def run(self, key: int, func, *args):
+        if len(self._running) >= self.max_pending:
+            raise ParseQueueFull()
+        self.cancel(key, replaced=True)
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._get_executor(), partial(func, *args))
+        self._running[key] = future
+        try:
+            return await future
+        except asyncio.CancelledError:
+            if future in self._cancelled:
+                raise ParseCancelled(self._cancelled[future]) from None
+            raise
+        finally:
+            self._cancelled.pop(future, None)
+            if self._running.get(key) is future:
+                del self._running[key]
+
+    def cancel(self, key: int, replaced: bool = False) -> bool:
+        future = self._running.pop(key, None)
+        if future is None:
+            return False
+        self._cancelled[future] = replaced
+        future.cancel()
+        return True
+
+    @property
+    def size(self) -> int:
+        return len(self._running)
+
+    def shutdown(self):
+        if self._executor is not None:
+            # Ждём только уже начатые задачи: после shutdown(wait=False) выход процесса
+            # иногда зависает на join менеджера пула
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+parse_pool = ParsePool()
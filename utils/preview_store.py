@@ -0,0 +1,69 @@
+import time
+import uuid
+from collections import OrderedDict
+import pandas as pd
+from utils.html_preview import PreviewPages
+from utils.upload_file import UploadFile
+from settings.config import PREVIEW_TTL, PREVIEW_MAX_ENTRIES
+
+
+class PreviewEntry:
+    """
+    Данные одной загрузки: подготовленные страницы превью, файл к отправке,
+    отпечатки его строк и sha256 исходного файла. duplicate — этот файл уже отправлялся в категорию.
+    """
+
+    def __init__(self, category: str, preview: PreviewPages, file: UploadFile,
+                 fingerprints: pd.Series | None = None, digest: str | None = None, duplicate: bool = False):
+        self.category = category
+        self.preview = preview
+        self.file = file
+        self.fingerprints = fingerprints
+        self.digest = digest
+        self.duplicate = duplicate
+        self.created_at = time.monotonic()
+
+
+class PreviewStore:
+    """
+    Хранилище превью загрузок по upload_id. В FSM остаются только ключ и номер страницы.
+    Записи удаляются по TTL, а при переполнении — самые давно использованные (LRU);
+    файл удалённой записи закрывается. Запись, забранную через pop, закрывает вызывающий.
+    """
+
+    def __init__(self, ttl: float = PREVIEW_TTL, max_entries: int = PREVIEW_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, PreviewEntry] = OrderedDict()
+
+    def put(self, category: str, preview: PreviewPages, file: UploadFile,
+            fingerprints: pd.Series | None = None, digest: str | None = None, duplicate: bool = False) -> str:
+        self._evict()
+        upload_id = uuid.uuid4().hex
+        self._entries[upload_id] = PreviewEntry(category, preview, file, fingerprints, digest, duplicate)
+        while len(self._entries) > self.max_entries:
+            _, entry = self._entries.popitem(last=False)
+            entry.file.close()
+        return upload_id
+
+    def get(self, upload_id: str | None) -> PreviewEntry | None:
+        self._evict()
+        entry = self._entries.get(upload_id)
+        if entry is not None:
+            self._entries.move_to_end(upload_id)
+        return entry
+
+    def pop(self, upload_id: str | None) -> PreviewEntry | None:
+        return self._entries.pop(upload_id, None)
+
+    def _evict(self):
+        deadline = time.monotonic() - self.ttl
+        expired = [key for key, entry in self._entries.items() if entry.created_at < deadline]
+        for key in expired:
+            self._entries.pop(key).file.close()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+preview_store = PreviewStore()
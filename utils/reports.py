@@ -0,0 +1,130 @@
+import csv
+import io
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from aiogram.types import BufferedInputFile, Message
+from settings.config import REPORT_MAX_MESSAGES
+
+MESSAGE_LIMIT = 4096
+
+
+def split_text(text: str, limit: int) -> list[str]:
+    """Части text не длиннее limit; граница — последний пробел перед limit, если он есть."""
+    parts = []
+    while len(text) > limit:
+        cut = text.rfind(' ', 0, limit + 1)
+        if cut <= 0:
+            cut = limit
+        parts.append(text[:cut])
+        text = text[cut:].lstrip(' ')
+    parts.append(text)
+    return parts
+
+
+class Report:
+    """
+    Текстовый отчёт из строк и разделов-списков.
+    Уходит несколькими сообщениями с разбиением по границам строк, а если сообщений
+    понадобилось бы больше max_messages — одним сообщением со сводкой и CSV-файлом с содержимым разделов.
+    """
+
+    def __init__(self, filename: str = 'report.csv', parse_mode: str | None = None,
+                 max_messages: int = REPORT_MAX_MESSAGES, limit: int = MESSAGE_LIMIT):
+        self.filename = filename
+        self.parse_mode = parse_mode
+        self.max_messages = max_messages
+        self.limit = limit
+        self._blocks: list[tuple[str, list[str]] | str] = []
+
+    def line(self, text: str = ''):
+        """Строка сводки: попадает в сообщение в любом режиме."""
+        self._blocks.append(text)
+
+    def section(self, title: str, items: Iterable[str]):
+        """Раздел-список; в режиме файла его элементы уходят в CSV."""
+        self._blocks.append((title, [str(item) for item in items]))
+
+    def lines(self) -> Iterator[str]:
+        for block in self._blocks:
+            if isinstance(block, str):
+                yield block
+            else:
+                title, items = block
+                if title:
+                    yield title
+                yield from items
+
+    def chunks(self) -> Iterator[tuple[str, bool]]:
+        """
+        Сообщения не длиннее limit и признак, что разметка в сообщении цела.
+        Строка длиннее limit режется по последнему пробелу перед границей (по символам, если пробела нет);
+        её части могут разорвать разметку, поэтому такие сообщения помечаются и уходят без parse_mode.
+        """
+        chunk = []
+        size = 0
+        for line in self.lines():
+            if len(line) > self.limit:
+                if any(chunk):
+                    yield '\n'.join(chunk), True
+                chunk, size = [], 0
+                for part in split_text(line, self.limit):
+                    if part.strip():
+                        yield part, False
+                continue
+            if chunk and size + 1 + len(line) > self.limit:
+                if any(chunk):
+                    yield '\n'.join(chunk), True
+                chunk, size = [], 0
+            size += len(line) + (1 if chunk else 0)
+            chunk.append(line)
+        if any(chunk):
+            yield '\n'.join(chunk), True
+
+    def summary(self) -> tuple[str, bool]:
+        """Сводка для режима файла: строки, которые не поместились, отбрасываются целиком."""
+        lines = []
+        for block in self._blocks:
+            if isinstance(block, str):
+                lines.append(block)
+            elif block[1]:
+                title = block[0] or 'Записи'
+                lines.append(f"{title} {len(block[1])} — в файле")
+        footer = "📎 Полный отчёт — во вложении."
+        text = '\n'.join(lines)
+        room = self.limit - len(footer) - len('\n…\n')
+        if len(text) + 1 + len(footer) <= self.limit:
+            return f"{text}\n{footer}", True
+        cut = text.rfind('\n', 0, room + 1)
+        if cut > 0:
+            return f"{text[:cut]}\n…\n{footer}", True
+        return f"{split_text(text, room)[0]}\n…\n{footer}", False
+
+    def to_csv(self) -> bytes:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=';')
+        writer.writerow(['Раздел', 'Запись'])
+        for block in self._blocks:
+            if not isinstance(block, str):
+                title = block[0].strip().replace('*', '')
+                writer.writerows((title, item) for item in block[1])
+        # BOM, чтобы Excel открыл кириллицу без мастера импорта
+        return buffer.getvalue().encode('utf-8-sig')
+
+    async def send(self, message: Message, edit: Message | None = None):
+        """
+        Отправляет отчёт в чат message. Если задан edit, первое сообщение отчёта заменяет его текст.
+        Число запросов к Telegram не превышает max_messages + 1.
+        """
+        texts = list(islice(self.chunks(), self.max_messages + 1)) or [('—', True)]
+        as_file = len(texts) > self.max_messages
+        if as_file:
+            texts = [self.summary()]
+        for index, (text, intact) in enumerate(texts):
+            # Разрезанная посреди строки разметка не разберётся в Telegram, такой текст уходит как есть
+            parse_mode = self.parse_mode if intact else None
+            if index == 0 and edit is not None:
+                await edit.edit_text(text, parse_mode=parse_mode)
+            else:
+                await message.answer(text, parse_mode=parse_mode)
+        if as_file:
+            await message.answer_document(BufferedInputFile(self.to_csv(), filename=self.filename))
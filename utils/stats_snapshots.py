@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import time
+from database.stats_history import StatsHistory, stats_history
+from utils.api_cache import ApiCache, api_cache
+from utils.api_client import ApiClient, ApiError, api_client
+from utils.engineer_stats import EngineerStats
+from settings.config import API_URL, STATS_SNAPSHOT_INTERVAL, STATS_SNAPSHOT_CONCURRENCY
+
+
+logger = logging.getLogger(__name__)
+
+
+class StatsSnapshotter:
+    """
+    Фоновый планировщик: раз в interval секунд снимает /stats/all и /stats/count/{id}/
+    по каждой рассылке из /mailing/all/ и пишет результат в историю.
+    Списки берутся через api_cache, поэтому совпавший по времени просмотр не дублирует запрос.
+    """
+
+    def __init__(self, history: StatsHistory = stats_history, client: ApiClient = api_client,
+                 cache: ApiCache = api_cache, interval: float = STATS_SNAPSHOT_INTERVAL,
+                 concurrency: int = STATS_SNAPSHOT_CONCURRENCY):
+        self.history = history
+        self.client = client
+        self.cache = cache
+        self.interval = interval
+        self.concurrency = concurrency
+        self.last_snapshot: float | None = None
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.take()
+            except (ApiError, ValueError):
+                logger.warning("Не удалось снять статистику", exc_info=True)
+            except Exception:
+                logger.exception("Снимок статистики завершился с ошибкой")
+            await asyncio.sleep(self.interval)
+
+    async def take(self):
+        started = time.perf_counter()
+        mailings_response, stats_response = await asyncio.gather(
+            self.cache.get(f"{API_URL}/mailing/all/"),
+            self.cache.get(f"{API_URL}/stats/all"),
+        )
+        mailings_response.raise_for_status()
+        stats_response.raise_for_status()
+        mailings = mailings_response.json().get('data') or []
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        counts = await asyncio.gather(*(self._count(semaphore, mailing['id']) for mailing in mailings))
+        mailing_rows = [
+            (mailing['id'], mailing.get('period_name') or str(mailing['id']), *count)
+            for mailing, count in zip(mailings, counts) if count is not None
+        ]
+
+        df = EngineerStats(stats_response.json()).df
+        totals = df[df['name'] != '—'].groupby('name')[['sent', 'unsent']].sum()
+        engineer_rows = list(zip(totals.index, totals['sent'].tolist(), totals['unsent'].tolist()))
+
+        await self.history.put(mailing_rows, engineer_rows)
+        self.last_snapshot = time.time()
+        logger.info("Снимок статистики: рассылок %d, инженеров %d за %.0f мс",
+                    len(mailing_rows), len(engineer_rows), (time.perf_counter() - started) * 1000)
+
+    async def _count(self, semaphore: asyncio.Semaphore, mailing_id: int) -> tuple[int, int] | None:
+        """(отправлено, не отправлено) рассылки; None, если статистики нет (404) или запрос не удался."""
+        async with semaphore:
+            try:
+                response = await self.client.get(f"{API_URL}/stats/count/{mailing_id}/")
+                if response.status_code != 200:
+                    return None
+                data = response.json()
+            except (ApiError, ValueError):
+                logger.debug("Нет статистики рассылки %s", mailing_id, exc_info=True)
+                return None
+        return int(data.get('total_sent') or 0), int(data.get('total_unsent') or 0)
+
+
+stats_snapshotter = StatsSnapshotter()
@@ -0,0 +1,86 @@
+import html
+from bisect import bisect_right
+from itertools import groupby
+from settings.config import TREND_POINTS, ENGINEERS_PAGE_SIZE
+
+SPARKS = '▁▂▃▄▅▆▇█'
+# Длинные названия сокращаются, чтобы страница из page_size кривых укладывалась в сообщение
+NAME_LENGTH = 60
+VIEWS = {
+    'mailings': 'по рассылкам',
+    'engineers': 'по инженерам',
+}
+
+
+def sparkline(rates: list[float | None]) -> str:
+    """Кривая из блочных символов: доля 0 — нижний, 1 — верхний; точки без данных — пробел."""
+    return ''.join(' ' if rate is None else SPARKS[round(rate * (len(SPARKS) - 1))] for rate in rates)
+
+
+class Trend:
+    """Кривая доли отправленных отзывов одного ключа, снятая в точках сетки (ступенчато между снимками)."""
+
+    def __init__(self, name: str, rows: list[tuple], grid: list[float]):
+        self.name = name
+        times = [row[1] for row in rows]
+        rates = [row[2] / (row[2] + row[3]) if row[2] + row[3] else None for row in rows]
+        self.rates = [rates[index - 1] if (index := bisect_right(times, at)) else None for at in grid]
+        self.sent, self.unsent = rows[-1][2], rows[-1][3]
+
+    @property
+    def last(self) -> float | None:
+        return self.rates[-1]
+
+    @property
+    def change(self) -> float | None:
+        """Изменение доли за окно в процентных пунктах."""
+        first = next((rate for rate in self.rates if rate is not None), None)
+        return None if first is None or self.last is None else (self.last - first) * 100
+
+    def render(self) -> str:
+        rate = '—' if self.last is None else f"{self.last:.0%}"
+        change = '' if not self.change else f" ({self.change:+.0f} п.п.)"
+        return (f"{html.escape(self.name[:NAME_LENGTH])}\n<code>{sparkline(self.rates)}</code> {rate}{change}"
+                f" · {self.sent}/{self.unsent}")
+
+
+class Trends:
+    """
+    Кривые по рассылкам и инженерам за окно [since, now] из локальной истории снимков.
+    Оба представления листаются страницами по page_size, чтобы сообщение укладывалось в лимит Telegram.
+    """
+
+    def __init__(self, names: dict[int, str], mailing_rows: list[tuple], engineer_rows: list[tuple],
+                 since: float, now: float, points: int = TREND_POINTS, page_size: int = ENGINEERS_PAGE_SIZE):
+        self.page_size = page_size
+        step = (now - since) / max(1, points - 1)
+        grid = [since + step * index for index in range(points)]
+        self.mailings = [
+            Trend(names.get(mailing_id, str(mailing_id)), list(rows), grid)
+            for mailing_id, rows in groupby(mailing_rows, key=lambda row: row[0])
+        ]
+        self.engineers = [
+            Trend(engineer, list(rows), grid) for engineer, rows in groupby(engineer_rows, key=lambda row: row[0])
+        ]
+
+    @property
+    def empty(self) -> bool:
+        return not self.mailings and not self.engineers
+
+    def render(self, view: str, page: int = 0, days: int = 0) -> tuple[str, int, int]:
+        """HTML представления, номер страницы (после ограничения диапазоном) и число страниц."""
+        trends = self.engineers if view == 'engineers' else self.mailings
+        total_pages = max(1, -(-len(trends) // self.page_size))
+        page = max(0, min(page, total_pages - 1))
+        trends = trends[page * self.page_size:(page + 1) * self.page_size]
+
+        lines = [f"📈 <b>Доля отправленных отзывов {VIEWS.get(view, VIEWS['mailings'])}</b>"]
+        if days:
+            lines.append(f"<i>За {days} дн., отправлено/не отправлено — по последнему снимку</i>")
+        lines.append("")
+        lines.extend(trend.render() for trend in trends)
+        if not trends:
+            lines.append("Нет данных за период.")
+        if total_pages > 1:
+            lines.append(f"\n<i>Страница {page + 1} из {total_pages}</i>")
+        return "\n".join(lines), page, total_pages
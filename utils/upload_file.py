@@ -0,0 +1,82 @@
+import hashlib
+import tempfile
+from io import BytesIO
+from typing import BinaryIO
+from settings.config import UPLOAD_SPOOL_THRESHOLD, UPLOAD_TMP_DIR
+
+
+class UploadFile:
+    """
+    Файл, присланный пользователем, в единственном экземпляре на всём пути:
+    скачивание из Telegram → разбор в пуле процессов → multipart-загрузка на бэкенд.
+    Небольшие файлы лежат в BytesIO, крупные (больше UPLOAD_SPOOL_THRESHOLD) — во временном файле на диске.
+    """
+
+    def __init__(self, stream: BinaryIO, temp_file=None):
+        self.stream = stream
+        self._temp_file = temp_file
+
+    @classmethod
+    async def download(cls, message, spool_threshold: int = UPLOAD_SPOOL_THRESHOLD) -> "UploadFile":
+        """Скачивает документ; размер известен заранее, поэтому место хранения выбирается до загрузки."""
+        document = message.document
+        if (document.file_size or 0) <= spool_threshold:
+            stream = await message.bot.download(document.file_id)
+            return cls(stream)
+        # Файл удаляется при закрытии; дочерние процессы пула открывают его по имени
+        temp_file = tempfile.NamedTemporaryFile(suffix='.xlsx', dir=UPLOAD_TMP_DIR)
+        try:
+            await message.bot.download(document.file_id, destination=temp_file.file)
+        except BaseException:
+            temp_file.close()
+            raise
+        return cls(temp_file.file, temp_file)
+
+    @property
+    def path(self) -> str | None:
+        return self._temp_file.name if self._temp_file is not None else None
+
+    @property
+    def size(self) -> int:
+        position = self.stream.tell()
+        size = self.stream.seek(0, 2)
+        self.stream.seek(position)
+        return size
+
+    def digest(self, chunk_size: int = 1024 * 1024) -> str:
+        """sha256 содержимого. Файл читается кусками, буфер BytesIO — через memoryview без копии."""
+        sha256 = hashlib.sha256()
+        if self.path is None:
+            with self.stream.getbuffer() as buffer:
+                sha256.update(buffer)
+            return sha256.hexdigest()
+        position = self.stream.tell()
+        self.stream.seek(0)
+        while chunk := self.stream.read(chunk_size):
+            sha256.update(chunk)
+        self.stream.seek(position)
+        return sha256.hexdigest()
+
+    def source(self) -> bytes | str:
+        """Что передать в процесс пула: путь к файлу на диске или содержимое небольшого файла."""
+        if self.path is not None:
+            return self.path
+        return self.stream.getvalue()
+
+    def open(self) -> BinaryIO:
+        """Поток для отправки с начала файла. aiohttp читает его кусками и закрывает после запроса."""
+        self.stream.seek(0)
+        return self.stream
+
+    def close(self):
+        if self._temp_file is not None:
+            self._temp_file.close()
+        else:
+            self.stream.close()
+
+
+def open_source(source: bytes | str) -> BinaryIO:
+    """Открывает результат UploadFile.source() внутри процесса пула."""
+    if isinstance(source, str):
+        return open(source, 'rb')
+    return BytesIO(source)
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+from settings.config import VALIDATION_MAX_ERRORS
+
+
+class RowValidator:
+    """
+    Локальная проверка строк файла до отправки на бэкенд, чанк за чанком, векторно.
+    Правила берутся из конфига категории:
+    required_columns — непустые значения, date_columns — значения разбираются как даты,
+    allowed_values — {столбец: допустимые значения} (пустой набор не проверяется; для кейсов наборы
+    задаются в CASE_PRIORITIES/CASE_STATUSES и по умолчанию пусты),
+    unique_column — значения не повторяются во всём файле.
+    Номер строки берётся из индекса чанка: iter_excel_chunks кладёт туда номера строк листа Excel.
+    """
+
+    def __init__(self, config: dict, max_errors: int = VALIDATION_MAX_ERRORS):
+        self.required_columns = config.get('required_columns', [])
+        self.date_columns = config.get('date_columns', [])
+        self.allowed_values = {column: values for column, values in config.get('allowed_values', {}).items() if values}
+        self.unique_column = config.get('unique_column')
+        self.max_errors = max_errors
+        self.errors: list[dict] = []
+        self.error_count = 0
+        self._seen: set[str] = set()
+
+    def add(self, chunk: pd.DataFrame):
+        messages = pd.Series('', index=chunk.index, dtype=object)
+        columns = {*self.required_columns, *self.date_columns, *self.allowed_values}
+        if self.unique_column:
+            columns.add(self.unique_column)
+        empty = {column: _is_empty(chunk[column]) for column in columns}
+
+        def report(mask, message):
+            nonlocal messages
+            mask = np.asarray(mask, dtype=bool)
+            if mask.any():
+                messages = messages.where(~mask, messages + message + '; ')
+
+        for column in self.required_columns:
+            report(empty[column], f"не заполнено «{column}»")
+
+        for column in self.date_columns:
+            parsed = pd.to_datetime(chunk[column], errors='coerce', dayfirst=True, format='mixed')
+            report(~empty[column] & parsed.isna(), f"«{column}» не является датой")
+
+        for column, allowed in self.allowed_values.items():
+            values = chunk[column].astype(str).str.strip()
+            report(~empty[column] & ~values.isin(allowed), f"недопустимое значение «{column}»")
+
+        if self.unique_column:
+            present = ~empty[self.unique_column]
+            codes = chunk[self.unique_column].astype(str).str.strip()
+            # Поиск в set стоит O(строк чанка); isin по накопленным кодам пересобирал бы их на каждом чанке
+            seen = np.fromiter((code in self._seen for code in codes), dtype=bool, count=len(codes))
+            repeated = (codes.duplicated(keep='first').to_numpy() | seen) & present.to_numpy()
+            report(repeated, f"повторяется «{self.unique_column}»")
+            self._seen.update(codes[present.to_numpy() & ~repeated])
+
+        failed = messages != ''
+        count = int(failed.sum())
+        if not count:
+            return
+        self.error_count += count
+        room = self.max_errors - len(self.errors)
+        if room > 0:
+            for row, message in zip(chunk.index[failed.to_numpy()][:room], messages[failed][:room]):
+                self.errors.append({'row': int(row), 'errors': message.rstrip('; ')})
+
+    def result(self) -> dict | None:
+        """None, если ошибок нет, иначе {'errors': первые max_errors ошибок, 'error_count': всего строк с ошибками}."""
+        if not self.error_count:
+            return None
+        return {'errors': self.errors, 'error_count': self.error_count}
+
+
+def _is_empty(values: pd.Series) -> pd.Series:
+    empty = values.isna()
+    if not (pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values)):
+        return empty
+    try:
+        # .str пропускает не-строки (даты, числа) без дорогого приведения всего столбца к str
+        stripped = values.str.strip()
+    except AttributeError:
+        # В столбце нет ни одной строки
+        return empty
+    return empty | stripped.eq('').fillna(False).astype(bool)